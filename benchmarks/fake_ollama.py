@@ -0,0 +1,167 @@
+"""Local stand-in for the Ollama chat API, for benchmarks and tests.
+
+Streams canned tokens at a fixed rate after a configurable prompt latency, and
+ends each stream with the same metadata Ollama puts on its final chunk.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaServer:
+    """Serves /api/chat on localhost in a background thread."""
+
+    def __init__(self, host='127.0.0.1', port=0, tokens_per_second=50.0, latency=0.1,
+                 response='feat(core): add synthetic change', tokens=None):
+        self.tokens_per_second = tokens_per_second
+        self.latency = latency
+        self.response = response
+        self.tokens = tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == '/api/version':
+                    self._send_json({'version': '0.0.0-fake'})
+                elif self.path == '/api/tags':
+                    self._send_json({'models': []})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if self.path != '/api/chat':
+                    self.send_error(404)
+                    return
+                with server._lock:
+                    server.requests += 1
+                server.handle_chat(self, body)
+
+            def _send_json(self, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _split_tokens(self):
+        if self.tokens is not None:
+            return list(self.tokens)
+        words = self.response.split(' ')
+        return [word if i == 0 else ' ' + word for i, word in enumerate(words)]
+
+    def handle_chat(self, handler, body):
+        model = body.get('model', 'fake')
+        messages = body.get('messages') or []
+        prompt_chars = sum(len(m.get('content', '')) for m in messages)
+        start = time.perf_counter()
+        if messages:
+            time.sleep(self.latency)
+        prompt_eval = time.perf_counter() - start
+        tokens = self._split_tokens() if messages else []
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/x-ndjson')
+        if not body.get('stream', True):
+            data = json.dumps(self._final_chunk(model, ''.join(tokens), prompt_chars, prompt_eval, len(tokens), 0.0, start)).encode()
+            handler.send_header('Content-Length', str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+            return
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.end_headers()
+
+        eval_start = time.perf_counter()
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        for token in tokens:
+            if interval:
+                time.sleep(interval)
+            self._write_chunk(handler, {
+                'model': model,
+                'created_at': '1970-01-01T00:00:00Z',
+                'message': {'role': 'assistant', 'content': token},
+                'done': False,
+            })
+        eval_time = time.perf_counter() - eval_start
+        self._write_chunk(handler, self._final_chunk(model, '', prompt_chars, prompt_eval, len(tokens), eval_time, start))
+        handler.wfile.write(b'0\r\n\r\n')
+
+    @staticmethod
+    def _final_chunk(model, content, prompt_chars, prompt_eval, eval_count, eval_time, start):
+        return {
+            'model': model,
+            'created_at': '1970-01-01T00:00:00Z',
+            'message': {'role': 'assistant', 'content': content},
+            'done': True,
+            'done_reason': 'stop',
+            'total_duration': int((time.perf_counter() - start) * 1e9),
+            'load_duration': 0,
+            'prompt_eval_count': prompt_chars // 4,
+            'prompt_eval_duration': int(prompt_eval * 1e9),
+            'eval_count': eval_count,
+            'eval_duration': int(eval_time * 1e9),
+        }
+
+    @staticmethod
+    def _write_chunk(handler, payload):
+        data = json.dumps(payload).encode() + b'\n'
+        handler.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        handler.wfile.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--latency', type=float, default=0.1, help='seconds before the first token')
+    parser.add_argument('--response', default='feat(core): add synthetic change')
+    args = parser.parse_args()
+    server = FakeOllamaServer(port=args.port, tokens_per_second=args.tokens_per_second,
+                              latency=args.latency, response=args.response)
+    print(f'Fake Ollama listening on {server.url}')
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""Benchmark gitgenie against a fake Ollama server and synthetic repositories.
+
+Usage:
+    python benchmarks/run.py                       # run the default matrix
+    python benchmarks/run.py --save-baseline       # store results as the baseline
+    python benchmarks/run.py --diff-sizes 1KB,100MB --commit-counts 10,50000
+    python benchmarks/run.py --index-entries 500000   # commit write, git vs GitPython
+
+Each scenario is timed --repeat times and the median is reported. Results are
+compared against benchmarks/baseline.json (if it exists) and the run fails when
+any scenario is slower than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'src'))
+
+from fake_ollama import FakeOllamaServer  # noqa: E402
+import synth_repo  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    for unit in ('GB', 'MB', 'KB', 'B'):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * UNITS[unit])
+    return int(text)
+
+
+def format_size(size):
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= UNITS[unit]:
+            return f'{size // UNITS[unit]}{unit}'
+    return f'{size}B'
+
+
+def measure(func, repeat, setup=None):
+    """Run func repeat times and return the median wall time in seconds.
+
+    setup, if given, runs untimed before every call.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def _configure(server):
+    """Point gitgenie at the fake server and reset its process-wide state."""
+    from gitgenie.config import reset_config
+    from gitgenie.llm_client import reset_client
+
+    os.environ['GITGENIE_OLLAMA_HOST'] = server.url
+    os.environ['GITGENIE_CACHE_ENABLED'] = '0'
+    os.environ['GITGENIE_WARM_UP'] = '0'
+    reset_config()
+    reset_client()
+
+
+def bench_diff(workdir, size, repeat, e2e_max_bytes):
+    from click.testing import CliRunner
+    from gitgenie.cli import main
+    from gitgenie.commit_analyzer import build_commit_prompt, prepare_staged_diff
+    from gitgenie.git_utils import get_staged_changes
+
+    path = synth_repo.make_repo(os.path.join(workdir, f'diff-{size}'), diff_bytes=size)
+    os.chdir(path)
+    label = format_size(size)
+    results = {}
+    results[f'get_staged_changes[{label}]'] = measure(get_staged_changes, repeat)
+    # Everything `commit` does locally before the first request: read, filter,
+    # summarize, then pack into one prompt or split into chunks.
+    results[f'prompt_build[{label}]'] = measure(lambda: build_commit_prompt(prepare_staged_diff()[0]), repeat)
+    if size <= e2e_max_bytes:
+        runner = CliRunner()
+        results[f'commit_e2e[{label}]'] = measure(
+            lambda: runner.invoke(main, ['commit', '--no-cache'], input='q\n'), repeat,
+        )
+    return results
+
+
+def bench_history(workdir, commits, repeat):
+    from click.testing import CliRunner
+    from gitgenie.cli import main
+    from gitgenie.git_utils import get_commit_log
+
+    path = synth_repo.make_repo(os.path.join(workdir, f'history-{commits}'), commits=commits)
+    os.chdir(path)
+    results = {}
+    results[f'get_commit_log[{commits}]'] = measure(get_commit_log, repeat)
+    runner = CliRunner()
+    results[f'pr_e2e[{commits}]'] = measure(
+        lambda: runner.invoke(main, ['pr', 'main', '--no-cache']), repeat,
+    )
+    return results
+
+
+def bench_commit_write(workdir, entries, repeat):
+    """Time commit_with_message with each commit backend on an index of the given size."""
+    from gitgenie.config import reset_config
+    from gitgenie.git_utils import commit_with_message
+
+    path = synth_repo.init_repo(os.path.join(workdir, f'index-{entries}'))
+    synth_repo.add_index_entries(path, entries)
+    os.chdir(path)
+    results = {}
+    changes = iter(range(1 << 30))
+    for backend in ('git', 'gitpython'):
+        os.environ['GITGENIE_COMMIT_BACKEND'] = backend
+        reset_config()
+        results[f'commit_write[{backend},{entries}]'] = measure(
+            lambda: commit_with_message('chore: synthetic change'), repeat,
+            setup=lambda: synth_repo.stage_blob_change(path, seed=next(changes)),
+        )
+    del os.environ['GITGENIE_COMMIT_BACKEND']
+    reset_config()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline, current, ratio) for every scenario that regressed."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous and current > previous * (1 + threshold):
+            regressions.append((name, previous, current, current / previous))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gitgenie with a fake Ollama server.')
+    parser.add_argument('--diff-sizes', default='1KB,1MB,10MB', help='comma separated, e.g. 1KB,100MB')
+    parser.add_argument('--commit-counts', default='10,1000,10000', help='comma separated, e.g. 10,50000')
+    parser.add_argument('--index-entries', default='100000', help='comma separated index sizes for the commit write')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tokens-per-second', type=float, default=200.0)
+    parser.add_argument('--latency', type=float, default=0.05, help='fake prompt-eval latency in seconds')
+    parser.add_argument('--e2e-max-size', default='10MB', help='skip end-to-end commit runs above this diff size')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown, 0.2 = 20%%')
+    parser.add_argument('--output', help='also write results as JSON to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='gitgenie-bench-')
+    original_dir = os.getcwd()
+    results = {}
+    try:
+        with FakeOllamaServer(tokens_per_second=args.tokens_per_second, latency=args.latency) as server:
+            _configure(server)
+            for size in [parse_size(s) for s in args.diff_sizes.split(',') if s]:
+                results.update(bench_diff(workdir, size, args.repeat, parse_size(args.e2e_max_size)))
+            for count in [int(c) for c in args.commit_counts.split(',') if c]:
+                results.update(bench_history(workdir, count, args.repeat))
+            for entries in [int(e) for e in args.index_entries.split(',') if e]:
+                results.update(bench_commit_write(workdir, entries, args.repeat))
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    width = max(len(name) for name in results)
+    for name, seconds in results.items():
+        previous = baseline.get(name)
+        change = f'{(seconds / previous - 1) * 100:+7.1f}%' if previous else ''
+        print(f'{name:<{width}}  {seconds * 1000:10.1f} ms  {change}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved baseline to {args.baseline}')
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, previous, current, ratio in regressions:
+        print(f'REGRESSION {name}: {previous * 1000:.1f} ms -> {current * 1000:.1f} ms ({ratio:.2f}x)')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
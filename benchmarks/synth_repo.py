@@ -0,0 +1,102 @@
+"""Build synthetic git repositories with staged diffs and commit histories of a given size."""
+import os
+import random
+import subprocess
+
+FILE_SIZE = 1024 * 1024
+AUTHOR = 'Bench <bench@example.com>'
+
+
+def _git(path, *args, input=None):
+    return subprocess.run(
+        ['git', *args], cwd=path, input=input, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    ).stdout
+
+
+def init_repo(path):
+    """Create a repository with one commit on main."""
+    os.makedirs(path, exist_ok=True)
+    _git(path, 'init', '-q', '-b', 'main')
+    _git(path, 'config', 'user.name', 'Bench')
+    _git(path, 'config', 'user.email', 'bench@example.com')
+    _git(path, 'config', 'commit.gpgsign', 'false')
+    with open(os.path.join(path, 'README.md'), 'w') as f:
+        f.write('# synthetic\n')
+    _git(path, 'add', 'README.md')
+    _git(path, 'commit', '-q', '-m', 'chore: initial commit')
+    return path
+
+
+def _source_lines(rng, count):
+    words = ['value', 'config', 'result', 'user', 'item', 'index', 'cache', 'request']
+    for i in range(count):
+        yield f'    {rng.choice(words)}_{i} = compute_{rng.choice(words)}({i}, {rng.randint(0, 9999)})\n'
+
+
+def stage_diff(path, diff_bytes, seed=0):
+    """Write and stage new files so that the staged diff is roughly diff_bytes long."""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(path, 'src'), exist_ok=True)
+    remaining = diff_bytes
+    index = 0
+    while remaining > 0:
+        target = min(remaining, FILE_SIZE)
+        name = os.path.join('src', f'module_{index}.py')
+        written = 0
+        with open(os.path.join(path, name), 'w') as f:
+            f.write(f'def function_{index}():\n')
+            for line in _source_lines(rng, 1 << 30):
+                if written >= target:
+                    break
+                f.write(line)
+                written += len(line) + 1
+        remaining -= written
+        index += 1
+    _git(path, 'add', '-A')
+
+
+def add_history(path, commits, branch='feature', base='main', seed=0):
+    """Add commits on a new branch using git fast-import, then check it out."""
+    rng = random.Random(seed)
+    kinds = ['feat', 'fix', 'refactor', 'docs', 'test', 'chore']
+    chunks = []
+    timestamp = 1_700_000_000
+    for i in range(commits):
+        message = f'{rng.choice(kinds)}(mod{i % 50}): synthetic change number {i}\n'.encode()
+        content = f'change {i}\n'.encode() * rng.randint(1, 20)
+        header = f'commit refs/heads/{branch}\nmark :{i + 1}\ncommitter {AUTHOR} {timestamp + i} +0000\n'.encode()
+        parent = f'from refs/heads/{base}^0\n'.encode() if i == 0 else b''
+        chunks.append(
+            header
+            + b'data %d\n%s' % (len(message), message)
+            + parent
+            + f'M 100644 inline history/file_{i % 100}.txt\n'.encode()
+            + b'data %d\n%s\n' % (len(content), content)
+        )
+    _git(path, 'fast-import', '--quiet', input=b''.join(chunks))
+    _git(path, 'checkout', '-q', branch)
+
+
+def add_index_entries(path, count):
+    """Commit count index entries that all point at one blob, without writing them to the working tree."""
+    blob = _git(path, 'hash-object', '-w', '--stdin', input=b'synthetic\n').decode().strip()
+    info = ''.join(f'100644 {blob}\tindex/{i // 1000:04d}/file_{i}.txt\n' for i in range(count))
+    _git(path, 'update-index', '--add', '--index-info', input=info.encode())
+    _git(path, 'commit', '-q', '-m', f'chore: add {count} index entries')
+
+
+def stage_blob_change(path, name='README.md', seed=0):
+    """Stage new content for name straight into the index."""
+    blob = _git(path, 'hash-object', '-w', '--stdin', input=f'# synthetic {seed}\n'.encode()).decode().strip()
+    _git(path, 'update-index', '--add', '--cacheinfo', f'100644,{blob},{name}')
+
+
+def make_repo(path, diff_bytes=0, commits=0, seed=0):
+    """Create a repository with the given history length and staged diff size."""
+    init_repo(path)
+    if commits:
+        add_history(path, commits, seed=seed)
+    if diff_bytes:
+        stage_diff(path, diff_bytes, seed=seed)
+    return path
@@ -0,0 +1,288 @@
+"""Model servers gitgenie can talk to, and routing between them.
+
+A backend streams one chat completion. Ollama hosts are served by
+llm_client.LLMClient, and OpenAI-compatible servers (llama.cpp, vLLM, ...) by
+OpenAIBackend. The Router picks a backend per request by task and prompt size,
+prefers the ones with the lowest recent latency, and fails over to the next
+one when a backend errors out.
+"""
+import io
+import json
+import threading
+import time
+
+import httpx
+
+from . import profiling
+from .config import get_setting
+from .sinks import resolve_sink, streaming
+from .throttle import backoff_delay, get_throttle, is_retryable
+from .token_budget import count_tokens
+
+# Tasks callers pass to generate_text, so backends can be limited to some of them.
+TASKS = ('commit', 'summary', 'merge', 'pr')
+
+
+class Backend:
+    """Base class for a model server: throttling, retries and stats around one streaming request.
+
+    Subclasses implement _stream() and warm_up(). tasks limits the backend to
+    some TASKS (None means all); min_prompt_tokens and max_prompt_tokens limit
+    it to prompts of that estimated size. context_window overrides the size
+    token_budget assumes for the model.
+    """
+
+    kind = None
+
+    def __init__(self, model=None, host=None, connect_timeout=None, read_timeout=None,
+                 name=None, tasks=None, min_prompt_tokens=0, max_prompt_tokens=None, context_window=None):
+        self.model = model or get_setting('model')
+        self.host = host
+        self.connect_timeout = connect_timeout if connect_timeout is not None else get_setting('connect_timeout')
+        self.read_timeout = read_timeout if read_timeout is not None else get_setting('read_timeout')
+        self.name = name or f"{self.kind}:{self.model}@{host or 'default'}"
+        self.tasks = tuple(tasks) if tasks else None
+        self.min_prompt_tokens = min_prompt_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self.context_window = context_window
+        self._lock = threading.Lock()
+
+    def accepts(self, task=None, prompt_tokens=0):
+        """True if this backend is configured to serve task for a prompt of prompt_tokens."""
+        if task is not None and self.tasks is not None and task not in self.tasks:
+            return False
+        if prompt_tokens < self.min_prompt_tokens:
+            return False
+        return self.max_prompt_tokens is None or prompt_tokens <= self.max_prompt_tokens
+
+    def _stream(self, prompt, sink, options, stop_when, stats):
+        """Run one streaming request, writing chunks to sink and filling in stats. Raises on any error."""
+        raise NotImplementedError
+
+    def generate_with_stats(self, prompt, echo=True, options=None, stop_when=None, sink=None):
+        """Like generate(), but returns (text or None, stats)."""
+        sink = resolve_sink(sink, echo)
+        stats = {'backend': self.name, 'chunks': 0, 'queue_wait': 0.0, 'retries': 0}
+        throttle = get_throttle(self.host)
+        attempts = max(0, get_setting('retry_attempts'))
+        for attempt in range(attempts + 1):
+            try:
+                with throttle.slot(stats):
+                    result = self._stream(prompt, sink, options, stop_when, stats)
+                break
+            except Exception as e:
+                stats['error'] = str(e) or type(e).__name__
+                if attempt == attempts or stats['chunks'] or not is_retryable(e):
+                    return None, stats
+                stats['retries'] += 1
+                with profiling.phase('retry_backoff'):
+                    time.sleep(backoff_delay(attempt))
+        stats.pop('error', None)
+        profiling.record_generation(stats)
+        return result, stats
+
+    def generate(self, prompt, echo=True, options=None, stop_when=None, sink=None):
+        """Stream a chat response for prompt. Returns the text, or None on any error.
+
+        Chunks go to sink (a sinks.Sink or a callable); without one, echo
+        chooses between the default terminal sink and silence.
+
+        options use Ollama's names (num_predict, num_ctx, temperature, stop,
+        ...). stop_when is called with the text so far after every chunk;
+        when it returns True the stream is closed and the text returned early.
+
+        Each attempt waits for a request slot (see throttle.py). If the server
+        is busy or unreachable before anything was streamed, the request is
+        retried up to retry_attempts times with jittered backoff.
+        """
+        return self.generate_with_stats(prompt, echo, options, stop_when, sink)[0]
+
+    def warm_up(self):
+        """Get the model ready without generating anything. Returns True on success."""
+        return False
+
+    def warm_up_in_background(self):
+        """Start warm_up() in a daemon thread so it never delays the caller."""
+        thread = threading.Thread(target=self.warm_up, name='gitgenie-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+
+class OpenAIBackend(Backend):
+    """Server with an OpenAI-compatible /v1/chat/completions endpoint, e.g. llama.cpp or vLLM."""
+
+    kind = 'openai'
+
+    # Ollama option names and their OpenAI equivalents. num_ctx has none; the
+    # context size is fixed when these servers start.
+    OPTION_NAMES = {'num_predict': 'max_tokens', 'temperature': 'temperature', 'top_p': 'top_p',
+                    'stop': 'stop', 'seed': 'seed'}
+
+    def __init__(self, model=None, host=None, connect_timeout=None, read_timeout=None, api_key=None, **kwargs):
+        super().__init__(model, host or 'http://127.0.0.1:8080', connect_timeout, read_timeout, **kwargs)
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        """The httpx.Client, created on first use and shared afterwards."""
+        with self._lock:
+            if self._client is None:
+                headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+                self._client = httpx.Client(
+                    base_url=self.host.rstrip('/'),
+                    headers=headers,
+                    timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                )
+            return self._client
+
+    def _request_body(self, prompt, options):
+        body = {
+            'model': self.model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'stream': True,
+            'stream_options': {'include_usage': True},
+        }
+        for name, value in (options or {}).items():
+            if name in self.OPTION_NAMES:
+                body[self.OPTION_NAMES[name]] = value
+        return body
+
+    def _stream(self, prompt, sink, options, stop_when, stats):
+        start = time.perf_counter()
+        first_token = None
+        text = io.StringIO()
+        with profiling.phase('generation'), streaming(sink):
+            with self.client.stream('POST', '/v1/chat/completions', json=self._request_body(prompt, options)) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get('usage')
+                    if usage:
+                        stats['prompt_eval_count'] = usage.get('prompt_tokens')
+                        stats['eval_count'] = usage.get('completion_tokens')
+                    if not chunk.get('choices'):
+                        continue
+                    content = chunk['choices'][0].get('delta', {}).get('content') or ''
+                    if content:
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                        stats['chunks'] += 1
+                        sink.write(content)
+                        text.write(content)
+                        if stop_when is not None and stop_when(text.getvalue()):
+                            stats['stopped_early'] = True
+                            break
+        end = time.perf_counter()
+        stats['total_time'] = end - start
+        if first_token is not None:
+            stats['time_to_first_token'] = first_token - start
+            stats['streaming_time'] = end - first_token
+        return text.getvalue()
+
+    def warm_up(self):
+        try:
+            self.client.get('/v1/models').raise_for_status()
+            return True
+        except Exception:
+            return False
+
+
+class Router:
+    """Sends each request to the best backend for it, failing over on errors.
+
+    Backends that accept the task and prompt size are tried in order of their
+    recent latency (an exponentially weighted average of time to first token,
+    weighted by `smoothing`). Backends without a measurement yet go first, so
+    every backend gets one. A backend that fails is skipped for `cooldown`
+    seconds unless nothing else can take the request.
+    """
+
+    def __init__(self, backends, cooldown=None, smoothing=None):
+        self.backends = list(backends)
+        self.cooldown = cooldown if cooldown is not None else get_setting('backend_cooldown')
+        self.smoothing = smoothing if smoothing is not None else get_setting('backend_latency_smoothing')
+        self.latency = {}
+        self.down_until = {}
+        self._lock = threading.Lock()
+
+    def record_success(self, backend, seconds):
+        with self._lock:
+            previous = self.latency.get(backend.name)
+            if previous is None:
+                self.latency[backend.name] = seconds
+            else:
+                self.latency[backend.name] = self.smoothing * seconds + (1 - self.smoothing) * previous
+            self.down_until.pop(backend.name, None)
+
+    def record_failure(self, backend):
+        with self._lock:
+            self.down_until[backend.name] = time.monotonic() + self.cooldown
+
+    def candidates(self, task=None, prompt_tokens=0):
+        """Backends to try for a request, best first."""
+        eligible = [b for b in self.backends if b.accepts(task, prompt_tokens)]
+        if not eligible:
+            # Nothing is configured for a prompt this size; don't drop the request.
+            eligible = [b for b in self.backends if b.accepts(task, b.min_prompt_tokens)] or self.backends
+        now = time.monotonic()
+        with self._lock:
+            up = [b for b in eligible if self.down_until.get(b.name, 0) <= now]
+            down = [b for b in eligible if self.down_until.get(b.name, 0) > now]
+            up.sort(key=lambda b: self.latency.get(b.name) or 0.0)
+            down.sort(key=lambda b: self.down_until[b.name])
+        return up + down
+
+    def generate(self, prompt, echo=True, options=None, stop_when=None, task=None, sink=None):
+        """Generate with the best backend for task, trying the next one on failure.
+
+        Like a backend's own retries, failover only happens while nothing has
+        been streamed: the sink already shows the failed backend's partial
+        output, and the next backend's text would be appended to it.
+        """
+        sink = resolve_sink(sink, echo)
+        for backend in self.candidates(task, count_tokens(prompt)):
+            start = time.perf_counter()
+            result, stats = backend.generate_with_stats(prompt, options=options, stop_when=stop_when, sink=sink)
+            if result is not None:
+                self.record_success(backend, stats.get('time_to_first_token', time.perf_counter() - start))
+                return result
+            self.record_failure(backend)
+            if stats['chunks']:
+                return None
+        return None
+
+    def warm_up(self, task=None):
+        """Warm up the backend the next request for task would use."""
+        candidates = self.candidates(task)
+        return candidates[0].warm_up() if candidates else False
+
+
+def make_backend(spec):
+    """Build a backend from a config entry such as
+    {"type": "openai", "host": "http://gpu:8000", "model": "qwen2.5-coder", "tasks": ["commit"]}.
+    """
+    from .llm_client import LLMClient
+
+    spec = dict(spec)
+    kind = spec.pop('type', 'ollama')
+    if kind == 'ollama':
+        return LLMClient(**spec)
+    if kind == 'openai':
+        return OpenAIBackend(**spec)
+    raise ValueError(f'unknown backend type: {kind}')
+
+
+def build_router():
+    """Router over the `backends` setting, or over one Ollama backend built from model and ollama_host."""
+    from .llm_client import LLMClient
+
+    specs = get_setting('backends')
+    if not specs:
+        return Router([LLMClient()])
+    return Router([make_backend(spec) for spec in specs])
@@ -0,0 +1,141 @@
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .commit_analyzer import apply_structure_summary, generate_commit_message, prepare_staged_diff
+from .config import get_setting
+from .diff_filter import compact_diff
+from .git_utils import get_commit_diff, get_session, use_session
+
+
+def repo_jobs(paths):
+    """One job per repository: generate a message for its staged changes."""
+    return [{'repo': os.path.abspath(path)} for path in paths]
+
+
+def commit_jobs(revision_range, repo=None, limit=None):
+    """One job per commit in revision_range, newest first.
+
+    Returns None outside a git repository or if the range can't be read.
+    """
+    session = get_session(repo)
+    if not session.is_git_repo():
+        return None
+    try:
+        return [
+            {'repo': session.root, 'sha': commit['sha'], 'original_message': commit['message']}
+            for commit in session.iter_log(revision_range, limit)
+        ]
+    except Exception:
+        return None
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def read_job_diff(job):
+    """Read the diff for a job, the same way the interactive commands prepare it."""
+    session = get_session(job['repo'])
+    if not session.is_git_repo():
+        raise ValueError('not a git repository')
+    with use_session(session):
+        if 'sha' not in job:
+            diff, _ = prepare_staged_diff()
+            return diff
+        diff = get_commit_diff(job['sha'], context_lines=get_setting('diff_context_lines'))
+        if diff is None:
+            raise ValueError(f"could not read commit {job['sha']}")
+        if diff and get_setting('diff_filter_enabled'):
+            diff = compact_diff(diff).diff
+        return apply_structure_summary(diff, [], f"{job['sha']}^", job['sha'])
+
+
+class BatchRunner:
+    """Generates commit messages for many jobs and writes one JSON line per job.
+
+    Diffs are read by a pool of `git_workers` threads, and every diff that is
+    ready is queued for the model, which sees at most `concurrency` requests at
+    a time. Lines are written as jobs finish, so their order is not the input
+    order; each carries the job's index.
+    """
+
+    def __init__(self, out, use_cache=True, git_workers=None, concurrency=None):
+        self.out = out
+        self.use_cache = use_cache
+        self.git_workers = git_workers or get_setting('batch_git_workers')
+        self.concurrency = concurrency or get_setting('max_concurrency')
+        self.counts = {'ok': 0, 'empty': 0, 'error': 0}
+        self._lock = threading.Lock()
+
+    def _emit(self, result):
+        with self._lock:
+            self.counts[result['status']] += 1
+            self.out.write(json.dumps(result) + '\n')
+            self.out.flush()
+
+    def _result(self, index, job, started, status, **fields):
+        result = {'index': index, 'repo': job['repo']}
+        if 'sha' in job:
+            result['sha'] = job['sha']
+        result['status'] = status
+        result.update(fields)
+        result['latency_ms'] = _ms(time.perf_counter() - started)
+        return result
+
+    def _generate(self, index, job, diff, started, read_time, queued_at):
+        generate_start = time.perf_counter()
+        try:
+            with use_session(get_session(job['repo'])):
+                # One request at a time per job, so chunk summaries stay within `concurrency` too.
+                message = generate_commit_message(diff, max_workers=1, use_cache=self.use_cache, echo=False)
+        except Exception as e:
+            message, error = None, str(e)
+        else:
+            error = None if message else 'generation failed'
+        timings = {
+            'read_ms': _ms(read_time),
+            'queue_ms': _ms(generate_start - queued_at),
+            'generate_ms': _ms(time.perf_counter() - generate_start),
+        }
+        if error:
+            self._emit(self._result(index, job, started, 'error', error=error, **timings))
+        else:
+            self._emit(self._result(index, job, started, 'ok', message=message, **timings))
+
+    def _read(self, index, job):
+        started = time.perf_counter()
+        try:
+            diff = read_job_diff(job)
+        except Exception as e:
+            self._emit(self._result(index, job, started, 'error', error=str(e)))
+            return None
+        read_time = time.perf_counter() - started
+        if not diff:
+            self._emit(self._result(index, job, started, 'empty', read_ms=_ms(read_time)))
+            return None
+        return index, job, diff, started, read_time
+
+    def run(self, jobs):
+        """Process every job and return the counts of ok, empty and error results."""
+        with ThreadPoolExecutor(max_workers=max(1, self.git_workers), thread_name_prefix='gitgenie-read') as readers, \
+                ThreadPoolExecutor(max_workers=max(1, self.concurrency), thread_name_prefix='gitgenie-llm') as generators:
+            reads = [readers.submit(self._read, index, job) for index, job in enumerate(jobs)]
+            for future in as_completed(reads):
+                ready = future.result()
+                if ready is not None:
+                    generators.submit(self._generate, *ready, time.perf_counter())
+        return dict(self.counts)
+
+
+def run_batch(jobs, out=None, use_cache=True, git_workers=None, concurrency=None):
+    """Generate messages for jobs, writing JSON lines to out (stdout by default)."""
+    runner = BatchRunner(out or sys.stdout, use_cache, git_workers, concurrency)
+    return runner.run(jobs)
+
+
+if __name__ == '__main__':
+    print(run_batch(repo_jobs(sys.argv[1:] or ['.'])))
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from .config import get_setting
+from .git_utils import get_git_dir
+
+CACHE_FILENAME = 'cache.sqlite'
+
+
+def cache_key(*parts):
+    """Build a content-addressed key from the given parts (diff, model, template, ...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8', errors='surrogateescape'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """SQLite cache of generated text with age- and size-based eviction."""
+
+    def __init__(self, path, max_bytes=None, max_age=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, '
+                'created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                'SELECT value, created_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.max_age is not None and now - created_at > self.max_age:
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            return value
+
+    def set(self, key, value):
+        """Store value under key and evict old entries."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, value, len(value.encode('utf-8', errors='surrogateescape')), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.max_age is not None:
+            conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.max_age,))
+        if self.max_bytes is None:
+            return
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute('SELECT key, size FROM responses ORDER BY accessed_at ASC').fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM responses')
+
+
+def get_cache():
+    """Return the cache for the current repository, or None if caching is unavailable."""
+    if not get_setting('cache_enabled'):
+        return None
+    git_dir = get_git_dir()
+    if git_dir is None:
+        return None
+    try:
+        return ResponseCache(
+            os.path.join(git_dir, 'gitgenie', CACHE_FILENAME),
+            max_bytes=get_setting('cache_max_bytes'),
+            max_age=get_setting('cache_max_age_days') * 86400,
+        )
+    except sqlite3.Error:
+        return None
+
+
+def cache_get(key):
+    """Look up key in the repository cache. Errors are treated as a miss."""
+    cache = get_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(key)
+    except sqlite3.Error:
+        return None
+
+
+def cache_set(key, value):
+    """Store value in the repository cache. Errors are ignored."""
+    cache = get_cache()
+    if cache is None or value is None:
+        return
+    try:
+        cache.set(key, value)
+    except sqlite3.Error:
+        pass
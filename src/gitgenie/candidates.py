@@ -0,0 +1,106 @@
+import random
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from .commit_analyzer import generate_commit_message
+from .config import get_setting
+from .git_utils import bind_session
+
+
+class CandidatePool:
+    """Generates commit message candidates in the background.
+
+    Up to `count` requests are kept in flight at once (bounded by max_workers),
+    so the regenerate loop can show the next candidate as soon as it is ready
+    instead of starting a fresh generation. Every request sends the same diff
+    prompt, which lets Ollama reuse the evaluated prompt prefix; a different
+    seed and a higher temperature keep the candidates from being identical.
+
+    Candidates are generated on daemon threads, so a candidate still in
+    flight when the command ends doesn't keep the process alive.
+    """
+
+    def __init__(self, diff, count, max_workers=None, temperature=None):
+        self.diff = diff
+        self.count = max(1, count)
+        self.temperature = temperature if temperature is not None else get_setting('candidate_temperature')
+        if max_workers is None:
+            max_workers = min(self.count, get_setting('max_concurrency'))
+        self._slots = threading.BoundedSemaphore(max(1, max_workers))
+        self._pending = deque()
+        self._seen = set()
+        self._random = random.Random()
+
+    def _generate(self, seed):
+        # One request at a time per candidate, so max_workers bounds the requests in flight.
+        return generate_commit_message(
+            self.diff, max_workers=1, use_cache=False, echo=False, temperature=self.temperature, seed=seed,
+        )
+
+    def _submit(self, seed):
+        future = Future()
+        generate = bind_session(self._generate)
+
+        def run():
+            with self._slots:
+                if not future.set_running_or_notify_cancel():
+                    return
+                try:
+                    future.set_result(generate(seed))
+                except BaseException as e:
+                    future.set_exception(e)
+
+        threading.Thread(target=run, name='gitgenie-candidate', daemon=True).start()
+        return future
+
+    def prefetch(self):
+        """Top up the queue so `count` candidates are in flight or ready."""
+        while len(self._pending) < self.count:
+            seed = self._random.randrange(2 ** 31)
+            self._pending.append(self._submit(seed))
+
+    def mark_seen(self, message):
+        """Remember a message so it is not offered again."""
+        if message:
+            self._seen.add(message.strip())
+
+    def next(self):
+        """Return the next new candidate, waiting for it if needed. None if generation failed.
+
+        Candidates identical to ones already shown are skipped, unless every
+        candidate in flight turns out to be a repeat.
+        """
+        self.prefetch()
+        fallback = None
+        for _ in range(self.count):
+            message = self._pending.popleft().result()
+            self.prefetch()
+            if message is None:
+                continue
+            if message.strip() not in self._seen:
+                self.mark_seen(message)
+                return message
+            fallback = message
+        return fallback
+
+    def take_all(self):
+        """Wait for every candidate in flight and return the distinct new ones."""
+        self.prefetch()
+        candidates = []
+        while self._pending:
+            message = self._pending.popleft().result()
+            if message is not None and message.strip() not in self._seen:
+                self.mark_seen(message)
+                candidates.append(message)
+        return candidates
+
+    def close(self):
+        """Cancel the candidates that haven't started.
+
+        Ones already running are abandoned; they run on daemon threads, so the
+        process can exit without waiting for them.
+        """
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
@@ -1,56 +1,403 @@
+import threading
+import time
+
 import click
-from .git_utils import get_staged_changes, is_git_repo, get_commit_log, commit_with_message
-from .commit_analyzer import generate_commit_message
-from .pr_generator import generate_pr_description
+from .git_utils import get_session, is_git_repo, set_default_repo
+from .config import get_setting
+from . import profiling
+
+# Heavy modules (GitPython, the ollama client) are imported inside the commands
+# that need them, so --help and error paths start quickly.
+
+# Commands that talk to the model and benefit from loading it early.
+WARM_UP_COMMANDS = ('commit', 'pr', 'batch', 'eval')
+
+# Commands that can run outside a git repository.
+NO_REPO_COMMANDS = ('batch',)
+
+profile_option = click.option(
+    '--profile', type=click.Choice(['table', 'json']), is_flag=False, flag_value='table', default=None,
+    help='Print phase timings when done, as a table or as JSON lines.',
+)
 
 @click.group()
-def main():
+@click.option('--repo', type=click.Path(file_okay=False), default=None,
+              help='Run against the repository at this path instead of the current directory.')
+@click.pass_context
+def main(ctx, repo):
     """Main entry point for the GitGenie CLI."""
-    if not is_git_repo():
+    ctx.ensure_object(dict)
+    start = time.perf_counter()
+    set_default_repo(repo)
+    if ctx.invoked_subcommand not in NO_REPO_COMMANDS and not is_git_repo():
         click.echo("Error: Not a git repository")
         raise click.Abort()
+    ctx.obj['repo_discovery'] = time.perf_counter() - start
+    if ctx.invoked_subcommand in WARM_UP_COMMANDS and get_setting('warm_up'):
+        threading.Thread(target=_warm_up, name='gitgenie-warm-up', daemon=True).start()
+
+
+def _warm_up():
+    """Import the Ollama client and load the model, off the main thread."""
+    from .llm_client import get_client
+
+    get_client().warm_up()
+
+
+def _start_profiling(ctx, command, fmt):
+    """Start profiling the command and print the report when it finishes."""
+    if fmt is None:
+        return
+    profiler = profiling.start(command)
+    profiler.record('repo_discovery', ctx.obj.get('repo_discovery', 0.0))
+
+    def report():
+        profiling.stop()
+        click.echo(profiler.render(fmt), err=True)
+
+    ctx.call_on_close(report)
 
 @main.command()
-def commit():
-    diff = get_staged_changes()
-    
-    if not diff:
-        click.echo("Error: No staged changes")
+@click.option('--no-cache', is_flag=True, help='Ignore cached messages and always ask the model.')
+@click.option('--candidates', type=click.IntRange(min=0), default=None,
+              help='Generate this many alternative messages in the background for [r]egenerate and [l]ist.')
+@click.option('--split', is_flag=True, help='Make one commit per package or scope of the staged files.')
+@profile_option
+@click.pass_context
+def commit(ctx, no_cache, candidates, split, profile):
+    from .candidates import CandidatePool
+    from .commit_analyzer import generate_commit_message, prepare_staged_diff
+    from .daemon import load_precomputed
+    from .git_utils import commit_with_message
+    from .heuristic import heuristic_message
+    from .sinks import DetachableSink, LiveSink, default_sink
+
+    _start_profiling(ctx, 'commit', profile)
+    if split and _commit_split(no_cache):
         return
-    
-    click.echo('Generating commit message...')
-    commit_message = generate_commit_message(diff)
+    if candidates is None:
+        candidates = get_setting('candidates')
+
+    # The daemon's message needs no diff, so look for it before preparing one.
+    diff = None
+    commit_message = None
+    if not no_cache:
+        with profiling.phase('precomputed_lookup'):
+            commit_message = load_precomputed()
+        if commit_message is not None:
+            click.echo('Using precomputed commit message:')
+            click.echo(commit_message)
+    if commit_message is None:
+        # The draft needs only `git diff --numstat`, so show it before the slower diff preparation.
+        draft = None
+        if get_setting('heuristic_draft') or get_setting('heuristic_fallback'):
+            with profiling.phase('heuristic'):
+                draft = heuristic_message(get_session().root)
+        fallback = draft if get_setting('heuristic_fallback') else None
+        sink = default_sink(placeholder=draft if get_setting('heuristic_draft') else None)
+        if draft and get_setting('heuristic_draft') and not isinstance(sink, LiveSink):
+            click.echo(f'Draft: {draft}')
+        sink = DetachableSink(sink)
+        prepared = {}
+
+        def prepare_and_generate():
+            prepared['diff'], notes = prepare_staged_diff()
+            if not prepared['diff']:
+                return None
+            for note in notes:
+                click.echo(note)
+            click.echo('Generating commit message...')
+            packing_notes = []
+            message = generate_commit_message(
+                prepared['diff'], use_cache=not no_cache, notes=packing_notes, sink=sink,
+            )
+            for note in packing_notes:
+                click.echo(note)
+            return message
+
+        # Without a draft to fall back to, wait as long as generation takes.
+        budget = get_setting('commit_budget') if fallback else 0
+        finished, commit_message = _run_within(budget, prepare_and_generate)
+        if not finished:
+            sink.detach()
+            click.echo(f'Warning: no message after {budget:g}s, using the heuristic message:')
+            click.echo(fallback)
+            commit_message = fallback
+        else:
+            diff = prepared.get('diff')
+            if not diff:
+                click.echo("Error: No staged changes")
+                return
+            if commit_message is None and fallback:
+                click.echo('Warning: the model did not respond, using the heuristic message:')
+                click.echo(fallback)
+                commit_message = fallback
     if commit_message is None:
         click.echo('Error: Failed to generate commit message')
         return
 
+    if diff is None and candidates:
+        diff, _ = prepare_staged_diff()
+    pool = None
+    if candidates and diff:
+        pool = CandidatePool(diff, candidates)
+        pool.mark_seen(commit_message)
+        pool.prefetch()
+    prompt_text = "[c]ommit, [r]egenerate, [l]ist, [q]uit" if pool else "[c]ommit, [r]egenerate, [q]uit"
+
+    try:
+        while True:
+            option = click.prompt(prompt_text)
+            if option == 'q':
+                click.echo('Cancelled')
+                break
+            elif option == 'c':
+                with profiling.phase('commit_write'):
+                    result = commit_with_message(commit_message) 
+                if result:
+                    click.echo('Committed successfully!')
+                    break
+                else:
+                    click.echo('Error: failed to commit')
+            elif option == 'r':
+                click.echo('Regenerating...')
+                if pool:
+                    commit_message = pool.next()
+                    if commit_message is not None:
+                        click.echo(commit_message)
+                else:
+                    if diff is None:
+                        diff, _ = prepare_staged_diff()
+                    commit_message = generate_commit_message(diff, use_cache=False) if diff else None
+                if commit_message is None:
+                    click.echo('Error: Failed to generate commit message')
+                    return
+            elif option == 'l' and pool:
+                options = [commit_message] + pool.take_all()
+                for number, message in enumerate(options, start=1):
+                    click.echo(f"{number}. {message}")
+                choice = click.prompt('Choose a message', type=click.IntRange(1, len(options)), default=1)
+                commit_message = options[choice - 1]
+                pool.prefetch()
+            else:
+                click.echo("Invalid option. Please enter c, r, l, or q" if pool else "Invalid option. Please enter c, r, or q")
+    finally:
+        if pool:
+            pool.close()
+
+def _run_within(budget, func):
+    """Run func on a daemon thread. Returns (True, result), or (False, None) once budget seconds pass.
+
+    A budget of 0 waits for func however long it takes. Abandoned work keeps
+    running in the background but doesn't hold up the process exit.
+    """
+    from .git_utils import bind_session
+
+    result = {}
+    run = bind_session(func)
+
+    def target():
+        try:
+            result['value'] = run()
+        except BaseException as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target, name='gitgenie-generate', daemon=True)
+    thread.start()
+    thread.join(budget or None)
+    if thread.is_alive():
+        return False, None
+    if 'error' in result:
+        raise result['error']
+    return True, result.get('value')
+
+
+def _commit_split(no_cache):
+    """Run `commit --split`. Returns False if everything staged is in one scope."""
+    from .split import commit_split, generate_split_messages, plan_split
+
+    groups = plan_split()
+    if not groups:
+        click.echo("Error: No staged changes")
+        return True
+    if len(groups) == 1:
+        click.echo(f'All staged changes are in {groups[0].label}, making a single commit')
+        return False
+
+    click.echo(f'Generating {len(groups)} commit messages...')
+    generate_split_messages(groups, use_cache=not no_cache)
+    for number, group in enumerate(groups, start=1):
+        click.echo(f"{number}. {group.label} ({len(group.entries)} files)")
+        for note in group.notes:
+            click.echo(f"   {note}")
+        click.echo(f"   {group.message or '(no message)'}")
+    if any(group.message is None for group in groups):
+        click.echo('Error: Failed to generate commit message')
+        return True
+
     while True:
-        option = click.prompt("[c]ommit, [r]egenerate, [q]uit")
+        option = click.prompt("[c]ommit all, [q]uit")
         if option == 'q':
             click.echo('Cancelled')
             break
         elif option == 'c':
-            result = commit_with_message(commit_message) 
-            if result:
-                click.echo('Committed successfully!')
+            commits = commit_split(groups)
+            if commits:
+                click.echo(f'Created {len(commits)} commits')
                 break
             else:
                 click.echo('Error: failed to commit')
-        elif option == 'r':
-            click.echo('Regenerating...')
-            commit_message = generate_commit_message(diff)
-            if commit_message is None:
-                click.echo('Error: Failed to generate commit message')
-                return
         else:
-            click.echo("Invalid option. Please enter c, r, or q")
+            click.echo("Invalid option. Please enter c or q")
+    return True
+
+@main.command()
+@click.option('--interval', type=float, default=None, help='Seconds between checks of the index.')
+@click.option('--debounce', type=float, default=None, help='Seconds the index must stay unchanged before generating.')
+def daemon(interval, debounce):
+    """Precompute commit messages in the background as changes are staged."""
+    from .daemon import run_daemon
+
+    click.echo('Watching the index for staged changes (Ctrl+C to stop)...')
+    try:
+        run_daemon(interval, debounce, log=click.echo)
+    except KeyboardInterrupt:
+        click.echo('Stopped')
+
+@main.group()
+def hook():
+    """Manage the prepare-commit-msg hook for plain `git commit`."""
+
+@hook.command('install')
+@click.option('--force', is_flag=True, help='Overwrite an existing prepare-commit-msg hook.')
+def hook_install(force):
+    from .hook import install_hook
+
+    try:
+        path = install_hook(force, get_session().root)
+    except FileExistsError as e:
+        click.echo(f'Error: {e} already exists (use --force to replace it)')
+        return
+    click.echo(f'Installed hook at {path}')
+
+@hook.command('uninstall')
+def hook_uninstall():
+    from .hook import uninstall_hook
+
+    if uninstall_hook(get_session().root):
+        click.echo('Removed hook')
+    else:
+        click.echo('No gitgenie hook installed')
+
+@main.command()
+@click.argument('repos', nargs=-1, type=click.Path(exists=True, file_okay=False))
+@click.option('--repos-file', type=click.File('r'), default=None,
+              help='Read repository paths from this file, one per line.')
+@click.option('--range', 'revision_range', default=None,
+              help='Generate a message for every commit in this revision range (e.g. main..HEAD) instead.')
+@click.option('--limit', type=click.IntRange(min=1), default=None, help='Only process this many commits of --range.')
+@click.option('-o', '--output', type=click.File('w'), default='-', help='Write JSON lines here (default: stdout).')
+@click.option('--concurrency', type=click.IntRange(min=1), default=None,
+              help='Maximum model requests in flight (default: max_concurrency).')
+@click.option('--git-workers', type=click.IntRange(min=1), default=None,
+              help='Threads reading diffs from git (default: batch_git_workers).')
+@click.option('--no-cache', is_flag=True, help='Ignore cached messages and always ask the model.')
+@profile_option
+@click.pass_context
+def batch(ctx, repos, repos_file, revision_range, limit, output, concurrency, git_workers, no_cache, profile):
+    """Generate messages for many repositories or commits without prompting.
+
+    With REPOS (or --repos-file), each repository's staged changes get a
+    message. With --range, every commit in the range of the current repository
+    does. Results are written as JSON lines with per-item timings and status.
+    """
+    from .batch import commit_jobs, repo_jobs, run_batch
+
+    _start_profiling(ctx, 'batch', profile)
+    if revision_range:
+        jobs = commit_jobs(revision_range, limit=limit)
+        if jobs is None:
+            click.echo(f'Error: Could not read commits in {revision_range}', err=True)
+            return
+    else:
+        paths = list(repos)
+        if repos_file:
+            paths += [line.strip() for line in repos_file if line.strip() and not line.startswith('#')]
+        jobs = repo_jobs(paths)
+    if not jobs:
+        click.echo('Nothing to do', err=True)
+        return
+
+    start = time.perf_counter()
+    counts = run_batch(jobs, output, use_cache=not no_cache, git_workers=git_workers, concurrency=concurrency)
+    click.echo(
+        f"{len(jobs)} items in {time.perf_counter() - start:.1f}s: "
+        f"{counts['ok']} ok, {counts['empty']} empty, {counts['error']} failed",
+        err=True,
+    )
+
+@main.command('eval')
+@click.option('-n', '--limit', type=click.IntRange(min=1), default=20, help='Replay this many commits, newest first.')
+@click.option('--rev', 'revision', default='HEAD', help='Replay the history of this revision.')
+@click.option('--variants', 'variants_file', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='JSON file with a list of variants (default: eval_variants).')
+@click.option('--variant', 'names', multiple=True, help='Only run the variant with this name (repeatable).')
+@click.option('-o', '--output', type=click.Path(dir_okay=False), default='gitgenie-eval.jsonl',
+              help='Report file, JSON lines or .csv. Results already in it are skipped.')
+@click.option('--fresh', is_flag=True, help='Discard the existing report and start over.')
+@click.option('--concurrency', type=click.IntRange(min=1), default=None,
+              help='Jobs in flight at once (default: max_concurrency).')
+def eval_command(limit, revision, variants_file, names, output, fresh, concurrency):
+    """Replay recent commits and score generated messages against the originals."""
+    from .evaluation import Report, eval_jobs, load_variants, render_summary, run_eval, summarize
+
+    try:
+        variants = load_variants(variants_file)
+    except (OSError, ValueError) as e:
+        click.echo(f'Error: {e}', err=True)
+        return
+    if names:
+        variants = [variant for variant in variants if variant['name'] in names]
+        if not variants:
+            click.echo(f"Error: No variant named {', '.join(names)}", err=True)
+            return
+
+    report = Report(output)
+    if fresh:
+        report.reset()
+    done = [(r['sha'], r['variant']) for r in report.load() if r['status'] != 'error']
+    jobs = eval_jobs(limit, revision, variants, done)
+    if jobs is None:
+        click.echo(f'Error: Could not read the history of {revision}', err=True)
+        return
+    if done:
+        click.echo(f'Resuming: {len(done)} results already in {output}', err=True)
+
+    progress = {'count': 0}
+
+    def on_result(record):
+        progress['count'] += 1
+        status = f"error: {record['error']}" if record['status'] == 'error' else record['message'] or '(empty diff)'
+        click.echo(f"[{progress['count']}/{len(jobs)}] {record['variant']} {record['sha'][:7]} {status}", err=True)
+
+    run_eval(jobs, report, concurrency, on_result=on_result)
+    records = [r for r in report.load() if r['variant'] in {v['name'] for v in variants}]
+    click.echo(render_summary(summarize(records)))
 
 @main.command()
 @click.argument('base_branch', default='main')
-def pr(base_branch):
+@click.option('--no-cache', is_flag=True, help='Ignore cached descriptions and always ask the model.')
+@profile_option
+@click.pass_context
+def pr(ctx, base_branch, no_cache, profile):
+    from .git_utils import get_commit_log
+    from .pr_generator import generate_pr_description
+
+    _start_profiling(ctx, 'pr', profile)
     click.echo(f'Generating PR description (comparing against ${base_branch})...')
     
-    commits = get_commit_log(base_branch)
+    with profiling.phase('commit_log'):
+        commits = get_commit_log(base_branch)
     
     if commits is None:
         click.echo("Error: Could not get commit log")
@@ -62,17 +409,16 @@ def pr(base_branch):
     
     click.echo(f"Found {len(commits)} commits\n")
     
-    pr_description = generate_pr_description(commits)
+    click.echo("--- Generated PR Description ---")
+    pr_description = generate_pr_description(commits, base_branch, use_cache=not no_cache)
     
     if pr_description is None:
         click.echo("Error: Failed to generate PR description")
         return
     
-    click.echo("\n--- Generated PR Description ---")
-    click.echo(pr_description)
     click.echo("--------------------------------\n")
 
 
 if __name__ == '__main__':
     print('hello, world')
-    main()
\ No newline at end of file
+    main()
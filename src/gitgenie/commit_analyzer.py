@@ -1,10 +1,21 @@
-from .git_utils import get_staged_changes
-from .llm_client import generate_text
+import re
+import threading
+from functools import partial
 
-def generate_commit_message(diff):
-    prompt = f"""You are an expert at writing git commit messages following the Conventional Commits specification.
+from . import profiling
+from .cache import cache_get, cache_key, cache_set
+from .config import get_setting
+from .diff_filter import compact_diff
+from .diff_parser import chunk_diff
+from .git_utils import bind_session, get_staged_changes, get_staged_diff
+from .llm_client import generate_text, generation_options
+from .sinks import resolve_sink, streaming
+from .structure import summarize_diff
+from .token_budget import count_tokens, fit_text, pack_diff, prompt_budget
 
-Analyze the following git diff and generate a clear, concise commit message.
+COMMIT_PROMPT_TEMPLATE = """You are an expert at writing git commit messages following the Conventional Commits specification.
+
+Analyze the following git diff and generate a clear, concise commit message. A large diff starts with a summary of the changed files and definitions, followed by an excerpt of its biggest hunks.
 
 Rules:
 1. Use the format: type(scope): description
@@ -25,7 +36,278 @@ Git diff:
 
 Generate only the commit message, nothing else. No explanation, no code blocks, just the commit message."""
 
-    return generate_text(prompt)
+CHUNK_SUMMARY_PROMPT_TEMPLATE = """You are reviewing one part of a larger git diff.
+
+Summarize what changed in this part in 1-3 short bullet points. Focus on behavior, not on file paths or line numbers.
+
+Git diff (part {index} of {total}):
+{diff}
+
+Generate only the bullet points, nothing else."""
+
+COMBINE_PROMPT_TEMPLATE = """You are an expert at writing git commit messages following the Conventional Commits specification.
+
+A large git diff was split into parts and each part was summarized. Using these summaries, generate a single clear, concise commit message for the whole change.
+
+Rules:
+1. Use the format: type(scope): description
+2. Types: feat, fix, docs, style, refactor, test, chore, perf
+3. Keep the description under 72 characters
+4. Use imperative mood (e.g., "add" not "added" or "adds")
+5. Describe the overall change, not each part
+
+Summaries:
+{summaries}
+
+Generate only the commit message, nothing else. No explanation, no code blocks, just the commit message."""
+
+COMMIT_TYPES = ('feat', 'fix', 'docs', 'style', 'refactor', 'test', 'chore', 'perf', 'build', 'ci', 'revert')
+
+SUBJECT_PATTERN = re.compile(r'^(?:%s)(?:\([^()\n]+\))?!?: \S.*$' % '|'.join(COMMIT_TYPES))
+
+# Generation limits per task. A subject line is well under 64 tokens, and the
+# stop sequences catch the explanations models like to add after the message.
+COMMIT_GENERATION = {'num_predict': 64, 'temperature': 0.2, 'stop': ['\nExplanation', '\nThis commit', '\nNote:']}
+SUMMARY_GENERATION = {'num_predict': 160, 'temperature': 0.2}
+
+
+def _clean_line(line):
+    return line.strip().strip('`"\'').strip()
+
+
+def is_subject_complete(text):
+    """True once the streamed text contains a finished type(scope): description line."""
+    return any(SUBJECT_PATTERN.match(_clean_line(line)) for line in text.split('\n')[:-1])
+
+
+def extract_commit_message(text):
+    """Pull the commit message out of model output, dropping preambles and code fences."""
+    for line in text.splitlines():
+        candidate = _clean_line(line)
+        if SUBJECT_PATTERN.match(candidate):
+            return candidate
+    lines = [line for line in text.strip().splitlines() if not line.strip().startswith('```')]
+    return '\n'.join(lines).strip()
+
+
+def prepare_staged_diff(paths=None):
+    """Collect and compact the staged diff the way it is sent to the model.
+
+    Returns (diff, notes) where notes are short messages for the user about
+    truncation and filtering. diff is None outside a git repository. paths
+    limits the diff to some of the staged files.
+    """
+    notes = []
+    with profiling.phase('diff'):
+        staged = get_staged_diff(context_lines=get_setting('diff_context_lines'), paths=paths)
+    if staged is None:
+        return None, notes
+    diff = staged.text
+    if staged.truncated:
+        notes.append(f'Warning: staged diff exceeds the size budget, using the first {staged.bytes_read} bytes')
+    if diff and get_setting('diff_filter_enabled'):
+        with profiling.phase('diff_filter'):
+            filtered = compact_diff(diff)
+        if filtered.tokens_saved:
+            notes.append(f'Filtered diff: {filtered.summary()}')
+        diff = filtered.diff
+    diff = apply_structure_summary(diff, notes)
+    return diff, notes
+
+
+def apply_structure_summary(diff, notes, old_rev='HEAD', new_rev=''):
+    """Return diff, or its structural summary if structure_summary is on and diff is big enough.
+
+    old_rev and new_rev are passed to summarize_structure. A note is appended
+    to notes when the diff is summarized.
+    """
+    if diff and get_setting('structure_summary') and count_tokens(diff) > get_setting('structure_min_tokens'):
+        with profiling.phase('structure'):
+            summarized = summarize_structure(diff, old_rev, new_rev)
+        if summarized is not None:
+            notes.append(summarized[1])
+            return summarized[0]
+    return diff
+
+
+def summarize_structure(diff, old_rev='HEAD', new_rev=''):
+    """Replace most of a large diff with a structural summary plus its biggest hunks.
+
+    Returns (text, note), or None if the result would not be smaller.
+    """
+    summary = summarize_diff(diff, old_rev, new_rev)
+    excerpt = pack_diff(diff, get_setting('structure_diff_budget'), overview=False)
+    text = f"{summary.render()}\nDiff excerpt:\n{excerpt.text}"
+    before, after = count_tokens(diff), count_tokens(text)
+    if after >= before:
+        return None
+    note = (
+        f'Summarized {len(summary.files)} files and {summary.symbol_count} changed definitions: '
+        f'~{after} tokens instead of ~{before}'
+    )
+    return text, note
+
+
+def commit_prompt_template():
+    """The commit prompt: the commit_prompt setting if set, else COMMIT_PROMPT_TEMPLATE."""
+    return get_setting('commit_prompt') or COMMIT_PROMPT_TEMPLATE
+
+
+def report_packing(name, packing, notes=None):
+    """Record how a prompt was packed, and tell the user if anything was left out."""
+    profiling.record_packing(name, packing)
+    if notes is not None and not packing.complete:
+        notes.append(f'Packed the {name} prompt into {packing.summary()}')
+
+
+def _summarize_chunk(prompt, use_cache=True):
+    key = cache_key('chunk-summary', prompt, get_setting('model'))
+    if use_cache:
+        cached = cache_get(key)
+        if cached is not None:
+            return cached
+    summary = generate_text(prompt, echo=False, options=generation_options(prompt, **SUMMARY_GENERATION), task='summary')
+    cache_set(key, summary)
+    return summary
+
+
+def _map_detached(func, items, max_workers):
+    """Like ThreadPoolExecutor.map, but on daemon threads.
+
+    A caller that gave up on the result (the hook, `commit` past its budget)
+    doesn't then hold up the process exit, as executor threads would.
+    """
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    results = [None] * len(items)
+    indexes = iter(range(len(items)))
+    lock = threading.Lock()
+    errors = []
+    run = bind_session(func)
+
+    def worker():
+        while True:
+            with lock:
+                i = next(indexes, None)
+            if i is None or errors:
+                return
+            try:
+                results[i] = run(items[i])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, name='gitgenie-summary', daemon=True)
+               for _ in range(min(max_workers, len(items)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def summarize_chunks(chunks, max_workers=None, use_cache=True):
+    """Summarize each diff chunk concurrently. Returns the summaries in order, or None on failure.
+
+    Summaries are cached per chunk, so regenerating a message for the same diff
+    only redoes the final combine step. use_cache=False skips the lookup, like
+    it does in generate_commit_message.
+    """
+    if max_workers is None:
+        max_workers = get_setting('max_concurrency')
+    total = len(chunks)
+    budget = prompt_budget(CHUNK_SUMMARY_PROMPT_TEMPLATE, SUMMARY_GENERATION['num_predict'], task='summary')
+    prompts = []
+    with profiling.phase('prompt_build'):
+        for i, chunk in enumerate(chunks, start=1):
+            packing = pack_diff(chunk, budget)
+            report_packing(f'chunk {i}/{total}', packing)
+            prompts.append(CHUNK_SUMMARY_PROMPT_TEMPLATE.format(index=i, total=total, diff=packing.text))
+    summaries = _map_detached(partial(_summarize_chunk, use_cache=use_cache), prompts, max_workers)
+    if any(summary is None for summary in summaries):
+        return None
+    return summaries
+
+
+def build_commit_prompt(diff, max_tokens=None, notes=None):
+    """Do the local work of turning diff into a request: returns (prompt, None) or (None, chunks).
+
+    Diffs within max_tokens (or any diff with large_diff_strategy "pack") are
+    packed into a single commit prompt; bigger ones are split into chunks to
+    summarize first.
+    """
+    if max_tokens is None:
+        max_tokens = get_setting('chunk_token_budget')
+    if count_tokens(diff) <= max_tokens or get_setting('large_diff_strategy') == 'pack':
+        template = commit_prompt_template()
+        with profiling.phase('prompt_build'):
+            packing = pack_diff(diff, prompt_budget(template, COMMIT_GENERATION['num_predict'], task='commit'))
+            prompt = template.format(diff=packing.text)
+        report_packing('commit', packing, notes)
+        return prompt, None
+    chunk_budget = prompt_budget(CHUNK_SUMMARY_PROMPT_TEMPLATE, SUMMARY_GENERATION['num_predict'], task='summary')
+    with profiling.phase('prompt_build'):
+        return None, chunk_diff(diff, min(max_tokens, chunk_budget))
+
+
+def generate_commit_message(diff, max_tokens=None, max_workers=None, use_cache=True, echo=True,
+                            temperature=None, seed=None, notes=None, sink=None):
+    """Generate a commit message for a diff.
+
+    Diffs that fit within max_tokens go to the model in a single prompt. Bigger
+    diffs are split into chunks, each chunk is summarized (up to max_workers at
+    a time) and the summaries are combined into the final message.
+
+    Results are cached per diff, model and prompt template. Pass use_cache=False
+    to skip the lookup and always generate a fresh message (it is still stored).
+    temperature and seed override the defaults, e.g. to get varied candidates.
+    The final message streams to sink, or to the terminal if echo is set.
+
+    Every prompt is packed to fit the context window (see token_budget). If
+    anything had to be left out, a note is appended to notes.
+    """
+    if max_tokens is None:
+        max_tokens = get_setting('chunk_token_budget')
+    strategy = get_setting('large_diff_strategy')
+    template = commit_prompt_template()
+    key = cache_key(
+        'commit', diff, get_setting('model'), max_tokens, strategy, prompt_budget(template, task='commit'),
+        template, CHUNK_SUMMARY_PROMPT_TEMPLATE, COMBINE_PROMPT_TEMPLATE,
+    )
+    if use_cache:
+        with profiling.phase('cache_lookup'):
+            cached = cache_get(key)
+        if cached is not None:
+            with streaming(resolve_sink(sink, echo)) as output:
+                output.write(cached)
+            return cached
+
+    prompt, chunks = build_commit_prompt(diff, max_tokens, notes)
+    if chunks is not None:
+        summaries = summarize_chunks(chunks, max_workers, use_cache)
+        if summaries is None:
+            return None
+        with profiling.phase('prompt_build'):
+            packing = fit_text(
+                '\n'.join(s.strip() for s in summaries),
+                prompt_budget(COMBINE_PROMPT_TEMPLATE, COMMIT_GENERATION['num_predict'], task='commit'),
+                'summaries',
+            )
+            prompt = COMBINE_PROMPT_TEMPLATE.format(summaries=packing.text)
+        report_packing('combine', packing, notes)
+    options = generation_options(prompt, **COMMIT_GENERATION)
+    if temperature is not None:
+        options['temperature'] = temperature
+    if seed is not None:
+        options['seed'] = seed
+    message = generate_text(prompt, echo=echo, options=options, stop_when=is_subject_complete, task='commit',
+                            sink=sink)
+    if message is not None:
+        message = extract_commit_message(message)
+
+    cache_set(key, message)
+    return message
 
 if __name__ == '__main__':
     diff = get_staged_changes()
@@ -38,4 +320,4 @@ if __name__ == '__main__':
         if result:
             print(f"Generated message: {result}")
         else:
-            print("Error: Failed to generate message")
\ No newline at end of file
+            print("Error: Failed to generate message")
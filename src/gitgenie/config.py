@@ -0,0 +1,137 @@
+import contextvars
+import json
+import os
+from contextlib import contextmanager
+
+DEFAULTS = {
+    'model': 'llama3',
+    'ollama_host': None,
+    'connect_timeout': 5.0,
+    'read_timeout': 300.0,
+    'keep_alive': '30m',
+    'warm_up': True,
+    'live_output': True,
+    'live_refresh_per_second': 12,
+    'min_context': 2048,
+    'max_context': 8192,
+    'backends': [],
+    'backend_cooldown': 30.0,
+    'backend_latency_smoothing': 0.3,
+    'throttle_slots': 0,
+    'throttle_timeout': 120.0,
+    'throttle_dir': None,
+    'retry_attempts': 3,
+    'retry_base_delay': 0.5,
+    'retry_max_delay': 8.0,
+    'tokenizer': 'heuristic',
+    'context_limits': {},
+    'commit_prompt': None,
+    'large_diff_strategy': 'chunk',
+    'chunk_token_budget': 3000,
+    'max_concurrency': 4,
+    'structure_summary': True,
+    'structure_min_tokens': 1500,
+    'structure_diff_budget': 1000,
+    'structure_parallel_min_files': 16,
+    'structure_workers': 0,
+    'diff_filter_enabled': True,
+    'diff_exclude': [
+        '*.lock', 'package-lock.json', 'pnpm-lock.yaml', 'go.sum', 'composer.lock',
+        'vendor/*', 'node_modules/*', 'third_party/*',
+        '*.min.js', '*.min.css', '*.map',
+        '*_pb2.py', '*_pb2_grpc.py', '*.pb.go', '*.pb.cc', '*.pb.h',
+    ],
+    'diff_context_lines': 2,
+    'diff_max_bytes': 16 * 1024 * 1024,
+    'diff_max_tokens': 200000,
+    'diff_collapse_threshold': 3,
+    'heuristic_draft': True,
+    'heuristic_fallback': True,
+    'commit_budget': 60.0,
+    'candidates': 0,
+    'candidate_temperature': 0.8,
+    'split_rules': [],
+    'split_markers': ['pyproject.toml', 'setup.py', 'package.json', 'Cargo.toml', 'go.mod'],
+    'pr_batch_size': 10,
+    'batch_git_workers': 8,
+    'eval_variants': [],
+    'commit_backend': 'git',
+    'hook_budget': 4.0,
+    'daemon_interval': 0.5,
+    'daemon_debounce': 1.0,
+    'cache_enabled': True,
+    'cache_max_bytes': 50 * 1024 * 1024,
+    'cache_max_age_days': 30,
+}
+
+CONFIG_PATH = os.path.join(os.path.expanduser('~'), '.config', 'gitgenie', 'config.json')
+
+_config = None
+_overrides = contextvars.ContextVar('gitgenie_setting_overrides', default=None)
+
+
+def load_config(path=None):
+    """Load settings from the JSON config file, falling back to DEFAULTS."""
+    config = dict(DEFAULTS)
+    path = path or os.environ.get('GITGENIE_CONFIG', CONFIG_PATH)
+    try:
+        with open(path) as f:
+            config.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return config
+
+
+def get_setting(name):
+    """Return a setting. GITGENIE_<NAME> environment variables win over the config file.
+
+    Values set with override_settings() win over both.
+    """
+    global _config
+    overrides = _overrides.get()
+    if overrides and name in overrides:
+        return overrides[name]
+    if _config is None:
+        _config = load_config()
+    default = _config.get(name)
+    value = os.environ.get(f'GITGENIE_{name.upper()}')
+    if value is None:
+        return default
+    if isinstance(default, (list, dict)) and value.lstrip().startswith(('[', '{')):
+        # JSON for structured settings such as backends and context_limits.
+        try:
+            return json.loads(value)
+        except ValueError:
+            return default
+    if isinstance(default, list):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    if isinstance(default, bool):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, (int, float)):
+        try:
+            return type(default)(value)
+        except ValueError:
+            return default
+    return value
+
+
+@contextmanager
+def override_settings(**settings):
+    """Use these setting values in this thread or context, on top of any outer overrides."""
+    token = _overrides.set({**(_overrides.get() or {}), **settings})
+    try:
+        yield
+    finally:
+        _overrides.reset(token)
+
+
+def settings_key():
+    """Identifies the active overrides, for caches of objects built from settings ('' if none)."""
+    overrides = _overrides.get()
+    return json.dumps(overrides, sort_keys=True, default=str) if overrides else ''
+
+
+def reset_config():
+    """Forget the loaded config so the next get_setting() reads it again."""
+    global _config
+    _config = None
@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+
+from .commit_analyzer import generate_commit_message, prepare_staged_diff
+from .config import get_setting
+from .git_utils import get_git_dir, get_staged_key
+
+PRECOMPUTED_FILENAME = 'precomputed.json'
+
+
+def _precomputed_path(git_dir):
+    return os.path.join(git_dir, 'gitgenie', PRECOMPUTED_FILENAME)
+
+
+def save_precomputed(git_dir, key, message):
+    """Atomically write the message generated for the staged changes identified by key."""
+    path = _precomputed_path(git_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'key': key, 'message': message, 'created_at': time.time()}, f)
+    os.replace(tmp_path, path)
+
+
+def load_precomputed():
+    """Return the precomputed message if it was made for the current staged changes, else None."""
+    git_dir = get_git_dir()
+    if git_dir is None:
+        return None
+    try:
+        with open(_precomputed_path(git_dir)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not data.get('message') or data.get('key') != get_staged_key():
+        return None
+    return data['message']
+
+
+def _index_state(index_path):
+    try:
+        stat = os.stat(index_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def precompute(git_dir, log=None):
+    """Generate and save a message for the staged changes. Returns their key, or None."""
+    key = get_staged_key()
+    if key is None:
+        return None
+    diff, _ = prepare_staged_diff()
+    if not diff:
+        return key
+    message = generate_commit_message(diff, echo=False)
+    if message is None:
+        if log:
+            log(f'Failed to generate a message for staged changes {key[:7]}')
+        return None
+    save_precomputed(git_dir, key, message)
+    if log:
+        log(f'Precomputed message for staged changes {key[:7]}: {message}')
+    return key
+
+
+def run_daemon(interval=None, debounce=None, stop_event=None, log=None):
+    """Watch .git/index and precompute a commit message whenever the staged changes settle.
+
+    The index is polled every `interval` seconds. After it changes, nothing
+    happens until it has stayed the same for `debounce` seconds, so a burst of
+    `git add` calls triggers one generation. Runs until stop_event is set.
+    """
+    if interval is None:
+        interval = get_setting('daemon_interval')
+    if debounce is None:
+        debounce = get_setting('daemon_debounce')
+    if stop_event is None:
+        stop_event = threading.Event()
+    git_dir = get_git_dir()
+    if git_dir is None:
+        return
+    index_path = os.path.join(git_dir, 'index')
+
+    last_state = None
+    changed_at = time.monotonic()
+    last_key = None
+    pending = True
+    while not stop_event.is_set():
+        state = _index_state(index_path)
+        if state != last_state:
+            last_state = state
+            changed_at = time.monotonic()
+            pending = True
+        elif pending and time.monotonic() - changed_at >= debounce:
+            pending = False
+            key = get_staged_key()
+            if key is not None and key != last_key:
+                last_key = precompute(git_dir, log)
+        stop_event.wait(interval)
@@ -0,0 +1,159 @@
+from fnmatch import fnmatch
+
+from .config import get_setting
+from .diff_parser import estimate_tokens, file_diff_path, split_diff_by_file, split_file_hunks
+from .git_utils import get_generated_paths
+
+
+class FilterResult:
+    """A compacted diff plus what was removed to get there."""
+
+    def __init__(self, diff, original_tokens, omitted, collapsed):
+        self.diff = diff
+        self.original_tokens = original_tokens
+        self.tokens = estimate_tokens(diff) if diff else 0
+        self.omitted = omitted
+        self.collapsed = collapsed
+
+    @property
+    def tokens_saved(self):
+        return max(0, self.original_tokens - self.tokens)
+
+    def summary(self):
+        """One-line human summary, e.g. for the CLI."""
+        parts = [f"saved ~{self.tokens_saved} tokens"]
+        if self.omitted:
+            parts.append(f"omitted {len(self.omitted)} files")
+        if self.collapsed:
+            parts.append(f"collapsed {self.collapsed} repeated hunks")
+        return ', '.join(parts)
+
+
+def matches_glob(path, pattern):
+    """Match a path against a glob. Patterns without a slash match the file name anywhere."""
+    if '/' not in pattern:
+        return fnmatch(path.rsplit('/', 1)[-1], pattern)
+    return fnmatch(path, pattern) or fnmatch(path, '*/' + pattern)
+
+
+def is_binary(file_diff):
+    for line in file_diff.splitlines():
+        if line.startswith('@@'):
+            return False
+        if line.startswith('Binary files ') or line == 'GIT binary patch':
+            return True
+    return False
+
+
+def _changed_lines(hunk):
+    return [line for line in hunk.splitlines()[1:] if line[:1] in ('+', '-')]
+
+
+def is_whitespace_only(hunk):
+    """True if the hunk's removed and added lines differ only in whitespace.
+
+    Lines are compared one by one with runs of whitespace collapsed to a
+    space, so re-indentation, trailing spaces and blank lines count, but
+    whitespace that separated tokens (`return a` -> `returna`) does not.
+    """
+    changed = _changed_lines(hunk)
+    if not changed:
+        return False
+    removed = [' '.join(line[1:].split()) for line in changed if line[0] == '-']
+    added = [' '.join(line[1:].split()) for line in changed if line[0] == '+']
+    return [line for line in removed if line] == [line for line in added if line]
+
+
+def _hunk_signature(hunk):
+    return tuple(line.strip() for line in _changed_lines(hunk))
+
+
+def _with_newline(text):
+    return text if text.endswith('\n') else text + '\n'
+
+
+def _omit_reason(path, file_diff, exclude, generated):
+    if is_binary(file_diff):
+        return 'binary'
+    if path in generated:
+        return 'generated'
+    for pattern in exclude:
+        if matches_glob(path, pattern):
+            return f'excluded by {pattern}'
+    return None
+
+
+def compact_diff(diff, exclude=None, use_gitattributes=True, drop_whitespace=True, collapse_threshold=None):
+    """Strip noise from a diff before it goes into a prompt.
+
+    Removes binary files, files matching the exclude globs and files marked
+    linguist-generated in .gitattributes, drops hunks that only change
+    whitespace, and collapses hunks (or pure renames) that repeat the same
+    change collapse_threshold times or more into one representative plus a
+    count. Omitted files are listed at the end so the model still knows
+    they changed.
+    """
+    if exclude is None:
+        exclude = get_setting('diff_exclude')
+    if collapse_threshold is None:
+        collapse_threshold = get_setting('diff_collapse_threshold')
+
+    files = [(file_diff_path(f), f) for f in split_diff_by_file(diff)]
+    generated = get_generated_paths([path for path, _ in files]) if use_gitattributes else set()
+
+    omitted = []
+    kept = []
+    for path, file_diff in files:
+        reason = _omit_reason(path, file_diff, exclude, generated)
+        if reason:
+            omitted.append((path, reason))
+        else:
+            kept.append((path, split_file_hunks(file_diff)))
+
+    signature_counts = {}
+    rename_count = 0
+    for path, (header, hunks) in kept:
+        if not hunks and 'rename from ' in header:
+            rename_count += 1
+        for hunk in hunks:
+            signature = _hunk_signature(hunk)
+            signature_counts[signature] = signature_counts.get(signature, 0) + 1
+
+    collapse = collapse_threshold and collapse_threshold > 1
+    seen = set()
+    renames_shown = False
+    collapsed = 0
+    output = []
+    for path, (header, hunks) in kept:
+        if not hunks:
+            if collapse and 'rename from ' in header and rename_count >= collapse_threshold:
+                if renames_shown:
+                    collapsed += 1
+                    continue
+                renames_shown = True
+                output.append(_with_newline(header) + f"# ... and {rename_count - 1} more renamed files\n")
+                continue
+            output.append(header)
+            continue
+        body = []
+        for hunk in hunks:
+            if drop_whitespace and is_whitespace_only(hunk):
+                continue
+            signature = _hunk_signature(hunk)
+            count = signature_counts.get(signature, 0)
+            if collapse and signature and count >= collapse_threshold:
+                if signature in seen:
+                    collapsed += 1
+                    continue
+                seen.add(signature)
+                hunk = _with_newline(hunk) + f"# ... same change repeated in {count - 1} more hunks\n"
+            body.append(hunk)
+        if body:
+            output.append(header + ''.join(body))
+
+    if omitted:
+        if output:
+            output[-1] = _with_newline(output[-1])
+        output.append('# Omitted files:\n' + ''.join(f"#   {path} ({reason})\n" for path, reason in omitted))
+
+    return FilterResult(''.join(output), estimate_tokens(diff) if diff else 0, omitted, collapsed)
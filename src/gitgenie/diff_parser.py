@@ -0,0 +1,167 @@
+def estimate_tokens(text):
+    """Rough token count for a piece of text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def split_diff_by_file(diff):
+    """Split a unified diff into one string per file."""
+    files = []
+    current = []
+    for line in diff.splitlines(keepends=True):
+        if line.startswith('diff --git ') and current:
+            files.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        files.append(''.join(current))
+    return files
+
+
+def file_diff_path(file_diff):
+    """Return the path a single file's diff applies to (the new path for renames)."""
+    old_path = None
+    for line in file_diff.splitlines():
+        if line.startswith('@@'):
+            break
+        if line.startswith('+++ b/'):
+            return line[6:]
+        if line.startswith('rename to '):
+            return line[10:]
+        if line.startswith('--- a/'):
+            old_path = line[6:]
+    if old_path is not None:
+        return old_path
+    first = file_diff.split('\n', 1)[0]
+    if first.startswith('diff --git ') and ' b/' in first:
+        return first.rsplit(' b/', 1)[1]
+    return ''
+
+
+def split_file_hunks(file_diff):
+    """Split a single file's diff into its header and a list of hunks."""
+    header = []
+    hunks = []
+    for line in file_diff.splitlines(keepends=True):
+        if line.startswith('@@'):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+    return ''.join(header), [''.join(hunk) for hunk in hunks]
+
+
+def _split_lines(header, text, max_tokens):
+    """Split an oversized hunk by lines, repeating the file header in each piece."""
+    pieces = []
+    current = header
+    for line in text.splitlines(keepends=True):
+        if current != header and estimate_tokens(current + line) > max_tokens:
+            pieces.append(current)
+            current = header
+        current += line
+    if current != header:
+        pieces.append(current)
+    return pieces
+
+
+def _split_file(file_diff, max_tokens):
+    header, hunks = split_file_hunks(file_diff)
+    if not hunks:
+        return _split_lines('', file_diff, max_tokens)
+    pieces = []
+    current = header
+    for hunk in hunks:
+        if estimate_tokens(header + hunk) > max_tokens:
+            if current != header:
+                pieces.append(current)
+                current = header
+            pieces.extend(_split_lines(header, hunk, max_tokens))
+        elif estimate_tokens(current + hunk) > max_tokens:
+            pieces.append(current)
+            current = header + hunk
+        else:
+            current += hunk
+    if current != header:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_diff(diff, max_tokens):
+    """Pack a diff into chunks that each fit within max_tokens.
+
+    Whole files are packed together where possible. Files that are too big on
+    their own are split per hunk, and hunks that are still too big are split by
+    lines. Every piece of a split file keeps the file header so the model knows
+    which file it is looking at.
+    """
+    chunks = []
+    current = ''
+    for file_diff in split_diff_by_file(diff):
+        if estimate_tokens(file_diff) > max_tokens:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.extend(_split_file(file_diff, max_tokens))
+        elif current and estimate_tokens(current + file_diff) > max_tokens:
+            chunks.append(current)
+            current = file_diff
+        else:
+            current += file_diff
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class DiffRecord:
+    """One piece of a streamed diff: a file header ('file') or a hunk ('hunk')."""
+
+    __slots__ = ('kind', 'path', 'text')
+
+    def __init__(self, kind, path, text):
+        self.kind = kind
+        self.path = path
+        self.text = text
+
+    def __repr__(self):
+        return f'DiffRecord({self.kind!r}, {self.path!r}, {len(self.text)} chars)'
+
+
+def iter_diff_records(lines, max_record_chars=64 * 1024):
+    """Incrementally parse diff lines into file-header and hunk records.
+
+    Only one record is held in memory at a time. A hunk longer than
+    max_record_chars is emitted in several 'hunk' records for the same path, so
+    even a single huge hunk never has to be materialized.
+    """
+    kind = None
+    buffer = []
+    size = 0
+    path = ''
+    for line in lines:
+        if line.startswith('diff --git '):
+            if buffer:
+                yield DiffRecord(kind, path, ''.join(buffer))
+            kind, buffer, size = 'file', [line], len(line)
+            path = line.rstrip('\n').rsplit(' b/', 1)[-1]
+            continue
+        if line.startswith('@@'):
+            if buffer:
+                yield DiffRecord(kind, path, ''.join(buffer))
+            kind, buffer, size = 'hunk', [line], len(line)
+            continue
+        if kind == 'file' and line.startswith(('+++ b/', 'rename to ')):
+            path = line.rstrip('\n').split(' ', 1)[1]
+            if path.startswith('b/'):
+                path = path[2:]
+            elif path.startswith('to '):
+                path = path[3:]
+        if kind == 'hunk' and size + len(line) > max_record_chars and buffer:
+            yield DiffRecord(kind, path, ''.join(buffer))
+            buffer, size = [], 0
+        buffer.append(line)
+        size += len(line)
+        if kind is None:
+            kind = 'file'
+    if buffer:
+        yield DiffRecord(kind, path, ''.join(buffer))
@@ -0,0 +1,274 @@
+"""Replay commit history to compare the speed and quality of generated messages.
+
+Every commit of the last N is turned back into a diff and run through
+generate_commit_message once per variant. A variant is a name plus setting
+overrides, e.g. {"name": "pack-4k", "large_diff_strategy": "pack",
+"max_context": 4096}. Each result records the latency, token counts and
+scores against the message the commit actually has, and is appended to the
+report as soon as it is ready, so an interrupted run can be resumed.
+"""
+import csv
+import difflib
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import profiling
+from .batch import commit_jobs, read_job_diff
+from .commit_analyzer import generate_commit_message
+from .config import DEFAULTS, get_setting, override_settings
+from .git_utils import bind_session
+from .token_budget import count_tokens
+
+CONVENTIONAL_PATTERN = re.compile(r'^(?P<type>[a-z]+)(?:\((?P<scope>[^)]*)\))?!?: (?P<description>\S.*)$', re.IGNORECASE)
+MAX_SUBJECT_LENGTH = 72
+
+REPORT_FIELDS = [
+    'variant', 'sha', 'status', 'error', 'original', 'message', 'latency_ms', 'diff_tokens',
+    'prompt_tokens', 'generated_tokens', 'type_match', 'scope_match', 'length_ok', 'similarity',
+]
+NUMERIC_FIELDS = ('latency_ms', 'diff_tokens', 'prompt_tokens', 'generated_tokens', 'similarity')
+BOOLEAN_FIELDS = ('type_match', 'scope_match', 'length_ok')
+
+
+def _subject(message):
+    for line in (message or '').splitlines():
+        if line.strip():
+            return line.strip()
+    return ''
+
+
+def parse_subject(message):
+    """(type, scope, description) of a Conventional Commit subject, or None if it isn't one."""
+    match = CONVENTIONAL_PATTERN.match(_subject(message))
+    if match is None:
+        return None
+    return match.group('type').lower(), (match.group('scope') or '').strip().lower(), match.group('description')
+
+
+def score_message(message, original):
+    """Compare a generated message with the original one.
+
+    type_match and scope_match are None when the original is not a
+    Conventional Commit. similarity is difflib's ratio between the
+    descriptions (or whole subjects), from 0 to 1.
+    """
+    generated = parse_subject(message)
+    expected = parse_subject(original)
+    subject = _subject(message)
+    scores = {
+        'type_match': None,
+        'scope_match': None,
+        'length_ok': generated is not None and len(subject) <= MAX_SUBJECT_LENGTH,
+    }
+    if expected is not None:
+        scores['type_match'] = generated is not None and generated[0] == expected[0]
+        scores['scope_match'] = generated is not None and generated[1] == expected[1]
+    if generated is not None and expected is not None:
+        a, b = generated[2], expected[2]
+    else:
+        a, b = subject, _subject(original)
+    scores['similarity'] = round(difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio(), 3)
+    return scores
+
+
+def load_variants(path=None):
+    """Variants from a JSON file, else the eval_variants setting, else the current settings as "default".
+
+    Raises ValueError for a variant without a name or with unknown settings.
+    """
+    if path is not None:
+        with open(path) as f:
+            variants = json.load(f)
+    else:
+        variants = get_setting('eval_variants')
+    if not isinstance(variants, list) or not variants:
+        variants = [{'name': 'default'}]
+    names = set()
+    for variant in variants:
+        if not isinstance(variant, dict) or not variant.get('name'):
+            raise ValueError('every variant needs a name')
+        if variant['name'] in names:
+            raise ValueError(f"duplicate variant {variant['name']}")
+        names.add(variant['name'])
+        unknown = [key for key in variant if key != 'name' and key not in DEFAULTS]
+        if unknown:
+            raise ValueError(f"unknown settings in variant {variant['name']}: {', '.join(unknown)}")
+    return variants
+
+
+def _coerce(record):
+    """Turn CSV strings back into numbers, booleans and None."""
+    for field in NUMERIC_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            record[field] = float(value) if value else None
+    for field in BOOLEAN_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            record[field] = {'True': True, 'False': False}.get(value)
+    return record
+
+
+class Report:
+    """Results file, JSON lines or CSV (by extension), appended to one record at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self.is_csv = path.lower().endswith('.csv')
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Records already in the report; later records for the same commit and variant win."""
+        records = {}
+        try:
+            with open(self.path, newline='') as f:
+                if self.is_csv:
+                    rows = csv.DictReader(f)
+                else:
+                    rows = (json.loads(line) for line in f if line.strip())
+                for row in rows:
+                    records[(row['sha'], row['variant'])] = _coerce(dict(row))
+        except (OSError, ValueError):
+            pass
+        return list(records.values())
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def append(self, record):
+        with self._lock:
+            new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', newline='') as f:
+                if self.is_csv:
+                    writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+                    if new:
+                        writer.writeheader()
+                    writer.writerow({field: record.get(field) for field in REPORT_FIELDS})
+                else:
+                    f.write(json.dumps(record) + '\n')
+
+
+def eval_jobs(limit, revision='HEAD', variants=None, done=()):
+    """One job per commit and variant, newest commits first, skipping (sha, variant) pairs in done.
+
+    Returns None if the history can't be read.
+    """
+    commits = commit_jobs(revision, limit=limit)
+    if commits is None:
+        return None
+    done = set(done)
+    return [
+        dict(commit, variant=variant)
+        for commit in commits
+        for variant in variants or [{'name': 'default'}]
+        if (commit['sha'], variant['name']) not in done
+    ]
+
+
+def run_job(job):
+    """Generate a message for one commit under one variant and score it."""
+    variant = job['variant']
+    overrides = {key: value for key, value in variant.items() if key != 'name'}
+    record = {'variant': variant['name'], 'sha': job['sha'], 'original': _subject(job['original_message'])}
+    with override_settings(**overrides), profiling.scope('eval') as profiler:
+        started = time.perf_counter()
+        try:
+            diff = read_job_diff(job)
+            # One request at a time per job, so chunk summaries stay within the job concurrency.
+            message = generate_commit_message(diff, max_workers=1, use_cache=False, echo=False) if diff else None
+        except Exception as e:
+            diff, message, error = None, None, str(e)
+        else:
+            error = None if message or not diff else 'generation failed'
+        record['latency_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    generation = profiler.generation_summary()
+    record['status'] = 'error' if error else 'ok' if message else 'empty'
+    record['error'] = error
+    record['message'] = message
+    record['diff_tokens'] = count_tokens(diff) if diff else None
+    record['prompt_tokens'] = generation.get('prompt_eval_count')
+    record['generated_tokens'] = generation.get('eval_count') or (count_tokens(message) if message else None)
+    if message:
+        record.update(score_message(message, job['original_message']))
+    return record
+
+
+def run_eval(jobs, report, concurrency=None, on_result=None):
+    """Run jobs in parallel, appending each record to report. Returns the new records."""
+    if concurrency is None:
+        concurrency = get_setting('max_concurrency')
+    records = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='gitgenie-eval') as executor:
+        futures = [executor.submit(bind_session(run_job), job) for job in jobs]
+        for future in as_completed(futures):
+            record = future.result()
+            report.append(record)
+            records.append(record)
+            if on_result is not None:
+                on_result(record)
+    return records
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return statistics.fmean(values) if values else None
+
+
+def _rate(values):
+    values = [v for v in values if v is not None]
+    return sum(1 for v in values if v) / len(values) if values else None
+
+
+def summarize(records):
+    """Per-variant aggregates: counts, latency percentiles, mean tokens and score rates."""
+    by_variant = {}
+    for record in records:
+        by_variant.setdefault(record['variant'], []).append(record)
+    summary = []
+    for name, items in by_variant.items():
+        ok = [r for r in items if r['status'] == 'ok']
+        latencies = sorted(r['latency_ms'] for r in ok if r.get('latency_ms') is not None)
+        summary.append({
+            'variant': name,
+            'commits': len(items),
+            'errors': sum(1 for r in items if r['status'] == 'error'),
+            'latency_p50_ms': latencies[len(latencies) // 2] if latencies else None,
+            'latency_p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+            'prompt_tokens': _mean(r.get('prompt_tokens') for r in ok),
+            'generated_tokens': _mean(r.get('generated_tokens') for r in ok),
+            'type_match': _rate(r.get('type_match') for r in ok),
+            'scope_match': _rate(r.get('scope_match') for r in ok),
+            'length_ok': _rate(r.get('length_ok') for r in ok),
+            'similarity': _mean(r.get('similarity') for r in ok),
+        })
+    return summary
+
+
+def render_summary(summary):
+    """Plain-text table of summarize() output."""
+    columns = [
+        ('variant', 'variant', '{}'), ('commits', 'commits', '{}'), ('errors', 'errors', '{}'),
+        ('latency_p50_ms', 'p50 ms', '{:.0f}'), ('latency_p95_ms', 'p95 ms', '{:.0f}'),
+        ('prompt_tokens', 'prompt tok', '{:.0f}'), ('generated_tokens', 'gen tok', '{:.0f}'),
+        ('type_match', 'type', '{:.0%}'), ('scope_match', 'scope', '{:.0%}'),
+        ('length_ok', 'length', '{:.0%}'), ('similarity', 'similarity', '{:.2f}'),
+    ]
+    rows = [[title for _, title, _ in columns]]
+    for item in summary:
+        rows.append(['-' if item[key] is None else fmt.format(item[key]) for key, _, fmt in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+if __name__ == '__main__':
+    import sys
+
+    report = Report(sys.argv[1] if len(sys.argv) > 1 else 'gitgenie-eval.jsonl')
+    run_eval(eval_jobs(5, variants=load_variants()) or [], report)
+    print(render_summary(summarize(report.load())))
@@ -1,53 +1,601 @@
-from git import Repo, InvalidGitRepositoryError
+import contextvars
+import hashlib
+import os
+import subprocess
+import threading
+from contextlib import contextmanager
 
-def _get_repo():
-    """Private helper to get the repo object. Returns None if not a git repo."""
+from .config import get_setting
+from .diff_parser import estimate_tokens, iter_diff_records
+
+LOG_FIELD_SEPARATOR = '\x1f'
+LOG_FORMAT = '%H%x1f%an%x1f%cI%x1f%B'
+LOG_READ_SIZE = 64 * 1024
+DIFF_LINE_LIMIT = 64 * 1024
+MAX_LISTED_FILES = 200
+
+def _find_worktree(start):
+    """Walk up from start to the first directory containing a .git entry."""
+    path = os.path.abspath(start)
+    while True:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            if os.path.exists(os.path.join(dot_git, 'HEAD')):
+                return path
+        elif os.path.isfile(dot_git):
+            with open(dot_git) as f:
+                if f.read(8) == 'gitdir: ':
+                    return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+class StagedDiff:
+    """Staged diff text collected within a budget, plus what was left out."""
+
+    def __init__(self, text, truncated=False, bytes_read=0):
+        self.text = text
+        self.truncated = truncated
+        self.bytes_read = bytes_read
+
+def _stream_git_lines(repo_dir, args):
+    """Yield decoded output lines of a git command without buffering the whole output.
+
+    Very long lines are yielded in pieces of at most DIFF_LINE_LIMIT bytes. The
+    process is killed if the caller stops reading early.
+    """
+    process = subprocess.Popen(['git', *args], cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
     try:
-        repo = Repo(search_parent_directories=True)
-        if repo.bare:
+        while True:
+            line = process.stdout.readline(DIFF_LINE_LIMIT)
+            if not line:
+                break
+            yield line.decode('utf-8', errors='replace')
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+# Output options for every patch gitgenie parses. The explicit prefixes keep
+# the a/ and b/ paths diff_parser expects under diff.noprefix,
+# diff.mnemonicPrefix or diff.srcPrefix.
+PATCH_OPTIONS = ('--no-color', '--no-ext-diff', '--src-prefix=a/', '--dst-prefix=b/')
+
+
+def _literal_pathspecs(paths):
+    """Pathspecs that match exactly these paths, even if they contain glob characters."""
+    return [f':(literal){path}' for path in paths or []]
+
+
+def _staged_numstat(repo_dir, paths=None):
+    """Yield (added, deleted, path) for every staged file (or those under paths)."""
+    output = subprocess.run(
+        ['git', 'diff', '--staged', '--numstat', '-z', '--no-renames', '--', *_literal_pathspecs(paths)],
+        cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    ).stdout.decode('utf-8', errors='replace')
+    for entry in output.split('\0'):
+        if entry:
+            added, deleted, path = entry.split('\t', 2)
+            yield added, deleted, path
+
+def _parse_log_record(record):
+    sha, author, date, message = record.decode('utf-8', errors='replace').split(LOG_FIELD_SEPARATOR, 3)
+    return {
+        'sha': sha,
+        'hash': sha[:7],
+        'message': message.strip(),
+        'author': author,
+        'date': date,
+    }
+
+def _iter_log_records(repo_dir, revision_range, limit=None):
+    """Stream NUL-separated records from a single `git log -z` process."""
+    args = ['git', 'log', '-z', f'--format={LOG_FORMAT}']
+    if limit is not None:
+        args.append(f'--max-count={limit}')
+    args += [revision_range, '--']
+    process = subprocess.Popen(args, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        pending = b''
+        while True:
+            data = process.stdout.read(LOG_READ_SIZE)
+            if not data:
+                break
+            records = (pending + data).split(b'\0')
+            pending = records.pop()
+            for record in records:
+                yield _parse_log_record(record)
+        if pending:
+            yield _parse_log_record(pending)
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, args, stderr=stderr)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.stderr.close()
+        process.wait()
+
+
+class RepoSession:
+    """One repository, discovered once and shared by every helper.
+
+    Discovery walks up from `path` (default: the current directory) without
+    GitPython. Git commands run with the working tree as their cwd, and the
+    GitPython Repo is only built if a helper needs it.
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path or os.getcwd())
+        self.root = self._discover()
+        self._repo = None
+        self._lock = threading.Lock()
+
+    def _discover(self):
+        if 'GIT_DIR' in os.environ:
+            from git import Repo, InvalidGitRepositoryError
+
+            try:
+                repo = Repo(self.path, search_parent_directories=True)
+            except InvalidGitRepositoryError:
+                return None
+            return None if repo.bare else repo.working_tree_dir
+        try:
+            return _find_worktree(self.path)
+        except OSError:
             return None
-        return repo
-    except InvalidGitRepositoryError:
-        return None
-    
-def is_git_repo():
-    return _get_repo() is not None
-
-def get_staged_changes():
-    repo = _get_repo()
-    if repo is None:
-        return None
-    staged_changes = repo.git.diff('--staged')
-    return staged_changes
-
-def get_commit_log(main_branch_name='main'):
-    repo = _get_repo()
-    if repo is None:
-        return None
+
+    @property
+    def repo(self):
+        """The GitPython Repo, or None if this is not a git working tree."""
+        if self.root is None:
+            return None
+        with self._lock:
+            if self._repo is None:
+                from git import Repo, InvalidGitRepositoryError
+
+                try:
+                    repo = Repo(self.root)
+                except InvalidGitRepositoryError:
+                    return None
+                if repo.bare:
+                    return None
+                self._repo = repo
+            return self._repo
+
+    def is_git_repo(self):
+        return self.root is not None
+
+    def get_git_dir(self):
+        """Return the path of the .git directory, or None if not a git repo."""
+        if self.root is None:
+            return None
+        if 'GIT_DIR' in os.environ:
+            return self.repo.git_dir
+        dot_git = os.path.join(self.root, '.git')
+        if os.path.isfile(dot_git):
+            with open(dot_git) as f:
+                return os.path.normpath(os.path.join(self.root, f.read()[8:].strip()))
+        return dot_git
+
+    def get_staged_diff(self, context_lines=None, max_bytes=None, max_tokens=None, paths=None):
+        """Stream `git diff --staged` into a StagedDiff without exceeding the budget.
+
+        Records are read one at a time from the git process. Once the next record
+        would go over max_bytes or max_tokens, git is stopped and the remaining
+        files are listed by name with their line counts instead. paths limits
+        the diff to those files.
+        """
+        if self.root is None:
+            return None
+        if max_bytes is None:
+            max_bytes = get_setting('diff_max_bytes')
+        if max_tokens is None:
+            max_tokens = get_setting('diff_max_tokens')
+        args = ['diff', '--staged', *PATCH_OPTIONS]
+        if context_lines is not None:
+            args.append(f'--unified={context_lines}')
+        if paths:
+            args += ['--', *_literal_pathspecs(paths)]
+
+        parts = []
+        size = 0
+        tokens = 0
+        shown = set()
+        complete = set()
+        truncated = False
+        lines = _stream_git_lines(self.root, args)
+        try:
+            for record in iter_diff_records(lines):
+                record_tokens = estimate_tokens(record.text)
+                record_bytes = len(record.text.encode('utf-8'))
+                if (max_bytes and size + record_bytes > max_bytes) or (max_tokens and tokens + record_tokens > max_tokens):
+                    truncated = True
+                    if record.kind == 'file':
+                        complete.update(shown)
+                    break
+                if record.kind == 'file' and parts:
+                    complete.update(shown)
+                parts.append(record.text)
+                shown.add(record.path)
+                size += record_bytes
+                tokens += record_tokens
+        finally:
+            lines.close()
+
+        if truncated:
+            remaining = [entry for entry in _staged_numstat(self.root, paths) if entry[2] not in complete]
+            note = [f"# Diff truncated after {size} bytes. Files not fully shown ({len(remaining)}):\n"]
+            for added, deleted, path in remaining[:MAX_LISTED_FILES]:
+                note.append(f"#   {path} (+{added} -{deleted})\n")
+            if len(remaining) > MAX_LISTED_FILES:
+                note.append(f"#   ... and {len(remaining) - MAX_LISTED_FILES} more\n")
+            if parts and not parts[-1].endswith('\n'):
+                parts.append('\n')
+            parts.extend(note)
+        return StagedDiff(''.join(parts).rstrip('\n'), truncated, size)
+
+    def get_staged_changes(self, context_lines=None, max_bytes=None, max_tokens=None):
+        staged = self.get_staged_diff(context_lines, max_bytes, max_tokens)
+        if staged is None:
+            return None
+        return staged.text
+
+    def get_staged_entries(self):
+        """Return the staged changes as (mode, sha, status, path) from `git diff --staged --raw`.
+
+        mode and sha describe the staged version; for deletions (status 'D')
+        they are the all-zero values git uses for a missing file.
+        """
+        if self.root is None:
+            return None
+        try:
+            output = subprocess.run(
+                ['git', 'diff', '--staged', '--raw', '-z', '--no-renames', '--no-abbrev'], cwd=self.root,
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            ).stdout.decode('utf-8', errors='replace')
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        fields = output.split('\0')
+        entries = []
+        for i in range(0, len(fields) - 1, 2):
+            _, mode, _, sha, status = fields[i].lstrip(':').split(' ')
+            entries.append((mode, sha, status[:1], fields[i + 1]))
+        return entries
+
+    def find_indexed_files(self, names):
+        """Return the paths in the index whose file name is one of names, in any directory."""
+        if self.root is None or not names:
+            return []
+        try:
+            output = subprocess.run(
+                ['git', 'ls-files', '-z', '--cached', '--', *(f':(glob)**/{name}' for name in names)],
+                cwd=self.root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            ).stdout.decode('utf-8', errors='replace')
+        except (OSError, subprocess.CalledProcessError):
+            return []
+        return [path for path in output.split('\0') if path]
+
+    def commit_staged_groups(self, groups):
+        """Commit staged entries as a chain of commits, one per (entries, message) group.
+
+        Each tree is built in a temporary index (GIT_INDEX_FILE) starting from
+        HEAD, so neither the real index nor the working tree is touched, and the
+        branch is only moved once every commit exists. Returns the new commit
+        hashes in order, or None on failure.
+        """
+        if self.root is None or not groups:
+            return None
+        git_dir = self.get_git_dir()
+        index_file = os.path.join(git_dir, f'gitgenie-split-{os.getpid()}.index')
+        env = dict(os.environ, GIT_INDEX_FILE=index_file)
+
+        def git(*args, input=None):
+            return subprocess.run(
+                ['git', *args], cwd=self.root, env=env, input=input,
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            ).stdout.decode().strip()
+
+        try:
+            try:
+                head = git('rev-parse', '--verify', '-q', 'HEAD')
+            except subprocess.CalledProcessError:
+                head = None
+            if head:
+                git('read-tree', head)
+            else:
+                git('read-tree', '--empty')
+            parent = head
+            commits = []
+            for entries, message in groups:
+                info = ''.join(f'{mode} {sha}\t{path}\0' for mode, sha, _, path in entries)
+                git('update-index', '-z', '--index-info', input=info.encode())
+                tree = git('write-tree')
+                parent_args = ['-p', parent] if parent else []
+                parent = git('commit-tree', tree, *parent_args, '-F', '-', input=message.encode())
+                commits.append(parent)
+            git('update-ref', '-m', 'gitgenie: split commit', 'HEAD', parent, head or '')
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        finally:
+            if os.path.exists(index_file):
+                os.remove(index_file)
+        return commits
+
+    def get_staged_key(self):
+        """Return a hash identifying the staged changes, or None.
+
+        Read-only: hashes `git diff --cached --raw` (blob ids per path), run with
+        --no-optional-locks so git never takes .git/index.lock or rewrites the
+        index, unlike `git write-tree`.
+        """
+        if self.root is None:
+            return None
+        try:
+            output = subprocess.run(
+                ['git', '--no-optional-locks', 'diff', '--cached', '--raw', '-z', '--no-abbrev', '--no-renames'],
+                cwd=self.root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return hashlib.sha1(output).hexdigest()
+
+    def get_commit_diff(self, sha, context_lines=None):
+        """Return the patch a commit introduced (against its first parent), or None on failure."""
+        if self.root is None:
+            return None
+        args = ['git', 'show', '--format=', *PATCH_OPTIONS, '--first-parent', '-m']
+        if context_lines is not None:
+            args.append(f'--unified={context_lines}')
+        try:
+            output = subprocess.run(
+                [*args, sha, '--'], cwd=self.root,
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return output.decode('utf-8', errors='replace').rstrip('\n')
+
+    def get_generated_paths(self, paths):
+        """Return the subset of paths marked linguist-generated in .gitattributes."""
+        if self.root is None or not paths:
+            return set()
+        try:
+            output = subprocess.run(
+                ['git', 'check-attr', '-z', '--stdin', 'linguist-generated'],
+                cwd=self.root, input='\0'.join(paths).encode(),
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            ).stdout.decode('utf-8', errors='replace')
+        except (OSError, subprocess.CalledProcessError):
+            return set()
+        fields = output.split('\0')
+        generated = set()
+        for i in range(0, len(fields) - 2, 3):
+            path, _, value = fields[i:i + 3]
+            if value in ('set', 'true'):
+                generated.add(path)
+        return generated
+
+    def read_blobs(self, specs, max_size=None):
+        """Read several objects (e.g. 'HEAD:path' or ':path' for the index) with one `git cat-file --batch`.
+
+        Returns a dict from spec to bytes, with None for objects that don't exist.
+        With max_size, sizes are checked first with `git cat-file --batch-check`
+        and blobs bigger than that are left out of the dict without being read.
+        """
+        if self.root is None or not specs:
+            return {}
+        specs = list(specs)
+        blobs = {}
+        if max_size is not None:
+            try:
+                output = subprocess.run(
+                    ['git', 'cat-file', '--batch-check'], cwd=self.root,
+                    input=''.join(f'{spec}\n' for spec in specs).encode(),
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+                ).stdout
+            except (OSError, subprocess.CalledProcessError):
+                return {spec: None for spec in specs}
+            wanted = []
+            for spec, line in zip(specs, output.splitlines()):
+                header = line.split()
+                if len(header) != 3 or header[1] != b'blob':
+                    blobs[spec] = None
+                elif int(header[2]) <= max_size:
+                    wanted.append(spec)
+            specs = wanted
+            if not specs:
+                return blobs
+        try:
+            output = subprocess.run(
+                ['git', 'cat-file', '--batch'], cwd=self.root, input=''.join(f'{spec}\n' for spec in specs).encode(),
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return {spec: None for spec in specs}
+        position = 0
+        for spec in specs:
+            end = output.index(b'\n', position)
+            header = output[position:end].split()
+            position = end + 1
+            if len(header) != 3 or header[1] not in (b'blob', b'tree', b'commit', b'tag'):
+                blobs[spec] = None
+                continue
+            size = int(header[2])
+            blobs[spec] = output[position:position + size] if header[1] == b'blob' else None
+            position += size + 1
+        return blobs
+
+    def iter_log(self, revision_range, limit=None):
+        """Lazily yield the commits in a git revision range, newest first."""
+        if self.root is None:
+            return
+        yield from _iter_log_records(self.root, revision_range, limit)
+
+    def iter_commit_log(self, main_branch_name='main', limit=None):
+        """Lazily yield commits on the current branch that are not on main_branch_name.
+
+        Newest commits come first, as dicts with sha, hash, message, author and date.
+        Raises subprocess.CalledProcessError if git log fails (e.g. unknown branch).
+        """
+        yield from self.iter_log(f"{main_branch_name}..HEAD", limit)
+
+    def get_commit_log(self, main_branch_name='main', limit=None):
+        if self.root is None:
+            return None
+        try:
+            return list(self.iter_commit_log(main_branch_name, limit))
+        except Exception:
+            return None
+
+    def commit_with_message(self, message):
+        """Commit the index with message. Returns True, or None on failure.
+
+        With commit_backend "git" (the default) this runs `git commit -F -`, so
+        hooks, signing and the user's git config apply, and git updates the
+        index itself instead of GitPython rewriting it in Python. GitPython is
+        used for commit_backend "gitpython" or when git can't be run.
+        """
+        if self.root is None:
+            return None
+        if get_setting('commit_backend') != 'gitpython':
+            try:
+                result = subprocess.run(['git', 'commit', '-q', '-F', '-'], cwd=self.root, input=message.encode())
+            except OSError:
+                pass
+            else:
+                return True if result.returncode == 0 else None
+        repo = self.repo
+        if repo is None:
+            return None
+        try:
+            repo.index.commit(message)
+            return True
+        except Exception:
+            return None
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_default_path = None
+_current_session = contextvars.ContextVar('gitgenie_session', default=None)
+
+
+def set_default_repo(path):
+    """Make helpers use the repository at path instead of the current directory."""
+    global _default_path
+    _default_path = os.path.abspath(path) if path else None
+
+
+def get_session(path=None):
+    """Return the shared RepoSession for path.
+
+    Without a path this is the session activated with use_session(), else the
+    one for the --repo path, else the one for the current directory.
+    Successful discoveries are cached for the life of the process.
+    """
+    if path is None:
+        current = _current_session.get()
+        if current is not None:
+            return current
+        path = _default_path or os.getcwd()
+    path = os.path.abspath(path)
+    with _sessions_lock:
+        session = _sessions.get(path)
+    if session is not None:
+        return session
+    session = RepoSession(path)
+    if session.root is not None:
+        with _sessions_lock:
+            session = _sessions.setdefault(path, session)
+    return session
+
+
+@contextmanager
+def use_session(session):
+    """Run the module-level helpers against session in this thread or context."""
+    token = _current_session.set(session)
     try:
-        feature_branch = repo.active_branch.name
-        commits_unique_to_feature_branch = list(repo.iter_commits(f"{main_branch_name}..{feature_branch}"))
-        commit_list = []
-        for commit in commits_unique_to_feature_branch:
-            commit_list.append({
-                'hash': commit.hexsha[:7],
-                'message': commit.message.strip(),
-                'author': commit.author.name,
-                'date': commit.committed_datetime.isoformat(),
-            })
-        return commit_list
-    except Exception:
-        return None
+        yield session
+    finally:
+        _current_session.reset(token)
+
+
+def bind_session(func):
+    """Wrap func so worker threads run it against the caller's current session.
+
+    The rest of the caller's context (setting overrides, a scoped profiler)
+    comes along too.
+    """
+    session = get_session()
+    context = contextvars.copy_context()
+
+    def call(*args, **kwargs):
+        with use_session(session):
+            return func(*args, **kwargs)
+
+    def run(*args, **kwargs):
+        return context.copy().run(call, *args, **kwargs)
+    return run
+
+
+def reset_sessions():
+    """Forget every cached RepoSession and the --repo default."""
+    global _default_path
+    with _sessions_lock:
+        _sessions.clear()
+    _default_path = None
+
+
+def _get_repo():
+    """Private helper to get the repo object. Returns None if not a git repo."""
+    return get_session().repo
+
+def is_git_repo():
+    """Cheap check for a non-bare working tree, without importing GitPython."""
+    return get_session().is_git_repo()
+
+def get_git_dir():
+    return get_session().get_git_dir()
+
+def get_staged_diff(context_lines=None, max_bytes=None, max_tokens=None, paths=None):
+    return get_session().get_staged_diff(context_lines, max_bytes, max_tokens, paths)
+
+def get_staged_changes(context_lines=None, max_bytes=None, max_tokens=None):
+    return get_session().get_staged_changes(context_lines, max_bytes, max_tokens)
+
+def get_staged_key():
+    return get_session().get_staged_key()
+
+def get_staged_entries():
+    return get_session().get_staged_entries()
+
+def find_indexed_files(names):
+    return get_session().find_indexed_files(names)
+
+def commit_staged_groups(groups):
+    return get_session().commit_staged_groups(groups)
+
+def get_commit_diff(sha, context_lines=None):
+    return get_session().get_commit_diff(sha, context_lines)
+
+def get_generated_paths(paths):
+    return get_session().get_generated_paths(paths)
+
+def read_blobs(specs, max_size=None):
+    return get_session().read_blobs(specs, max_size)
+
+def iter_commit_log(main_branch_name='main', limit=None):
+    return get_session().iter_commit_log(main_branch_name, limit)
+
+def get_commit_log(main_branch_name='main', limit=None):
+    return get_session().get_commit_log(main_branch_name, limit)
     
 def commit_with_message(message):
-    repo = _get_repo()
-    if repo is None:
-        return None
-    try:
-        repo.index.commit(message)
-        return True
-    except Exception:
-        return None
+    return get_session().commit_with_message(message)
 
 
 if __name__ == '__main__':
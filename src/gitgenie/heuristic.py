@@ -0,0 +1,153 @@
+"""LLM-free Conventional Commit drafts from `git diff --staged --numstat` and file paths.
+
+The type comes from what kind of files changed (tests, docs, build files,
+code) and whether they were added, removed or edited; the scope from the
+path the changed files have in common. Only the standard library is used,
+so the hook can call this without loading the rest of gitgenie.
+"""
+import posixpath
+import re
+import subprocess
+
+# Directories that say nothing about the scope.
+GENERIC_DIRS = {
+    'src', 'lib', 'app', 'apps', 'pkg', 'packages', 'internal', 'cmd', 'source',
+    'test', 'tests', '__tests__', 'spec', 'specs', 'doc', 'docs', '.github',
+}
+TEST_DIRS = {'test', 'tests', '__tests__', 'spec', 'specs', 'testing'}
+DOC_DIRS = {'doc', 'docs', 'documentation'}
+DOC_EXTENSIONS = {'.md', '.rst', '.txt', '.adoc'}
+DOC_NAMES = {'readme', 'changelog', 'license', 'contributing', 'authors', 'notice'}
+BUILD_NAMES = {
+    'pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt', 'package.json', 'package-lock.json',
+    'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock', 'cargo.toml', 'cargo.lock', 'go.mod', 'go.sum',
+    'makefile', 'dockerfile', 'tox.ini', 'noxfile.py', 'manifest.in', '.gitignore', '.gitattributes',
+    '.editorconfig', '.pre-commit-config.yaml', 'jenkinsfile', '.gitlab-ci.yml',
+}
+TEST_FILE_PATTERN = re.compile(r'(^test_.*\.py$|_test\.(py|go)$|\.(test|spec)\.[jt]sx?$|Test\.java$)')
+
+# Changes at most this many lines in total count as a fix rather than a refactor.
+FIX_MAX_LINES = 10
+MAX_SUBJECT_LENGTH = 72
+
+
+def classify(path):
+    """Kind of file at path: 'test', 'docs', 'build' or 'code'."""
+    parts = path.lower().split('/')
+    name = parts[-1]
+    stem, extension = posixpath.splitext(name)
+    if TEST_FILE_PATTERN.search(path.split('/')[-1]) or TEST_DIRS.intersection(parts[:-1]):
+        return 'test'
+    if name in BUILD_NAMES or name.startswith('requirements') or parts[0] in ('.github', '.circleci'):
+        return 'build'
+    if extension in DOC_EXTENSIONS or stem in DOC_NAMES or DOC_DIRS.intersection(parts[:-1]):
+        return 'docs'
+    return 'code'
+
+
+def _subject_name(path):
+    """Short name for a file: its stem without test prefixes and suffixes."""
+    stem = posixpath.splitext(posixpath.basename(path))[0]
+    stem = re.sub(r'^test_|_test$|\.(test|spec)$|Test$', '', stem)
+    return stem.lower() if stem.isupper() else stem
+
+
+def infer_scope(paths):
+    """The deepest non-generic directory or module the paths share, or None."""
+    names = []
+    for path in paths:
+        parts = [p for p in path.split('/')[:-1] if p.lower() not in GENERIC_DIRS]
+        names.append(parts + [_subject_name(path)])
+    common = names[0]
+    for parts in names[1:]:
+        length = 0
+        while length < min(len(common), len(parts)) and common[length] == parts[length]:
+            length += 1
+        common = common[:length]
+    if not common:
+        return None
+    scope = re.sub(r'[^a-z0-9_.-]', '-', common[-1].lower()).strip('-')
+    return scope or None
+
+
+def _describe(verb, paths):
+    names = []
+    for path in paths:
+        name = _subject_name(path)
+        if name not in names:
+            names.append(name)
+    if len(names) == 1:
+        return f'{verb} {names[0]}'
+    if len(names) == 2:
+        return f'{verb} {names[0]} and {names[1]}'
+    return f'{verb} {len(paths)} files'
+
+
+def draft_message(files):
+    """Conventional Commit subject for files, a list of (path, added, deleted, status).
+
+    status is 'A', 'D' or 'M'. Returns None for an empty list.
+    """
+    if not files:
+        return None
+    kinds = {}
+    for entry in files:
+        kinds.setdefault(classify(entry[0]), []).append(entry)
+    for kind in ('code', 'test', 'docs', 'build'):
+        if kind in kinds:
+            main = kinds[kind]
+            break
+
+    statuses = {status for _, _, _, status in main}
+    added = sum(a for _, a, _, _ in main)
+    deleted = sum(d for _, _, d, _ in main)
+    if statuses == {'D'}:
+        verb = 'remove'
+    elif statuses == {'A'}:
+        verb = 'add'
+    else:
+        verb = 'update'
+
+    if kind == 'test':
+        commit_type = 'test'
+    elif kind == 'docs':
+        commit_type = 'docs'
+    elif kind == 'build':
+        commit_type = 'chore'
+    elif 'A' in statuses or added >= 2 * deleted + FIX_MAX_LINES:
+        commit_type = 'feat'
+    elif verb == 'update' and added + deleted <= FIX_MAX_LINES:
+        commit_type = 'fix'
+    else:
+        commit_type = 'refactor'
+
+    paths = [path for path, _, _, _ in main]
+    scope = infer_scope(paths)
+    subject = f"{commit_type}({scope}): " if scope else f"{commit_type}: "
+    return (subject + _describe(verb, paths))[:MAX_SUBJECT_LENGTH]
+
+
+def staged_files(cwd=None):
+    """(path, added, deleted, status) for every staged file, from one git diff call."""
+    output = subprocess.run(
+        ['git', '-c', 'core.quotePath=off', 'diff', '--staged', '--no-renames', '--numstat', '--summary'],
+        cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+    ).stdout.decode('utf-8', errors='replace')
+    counts = {}
+    statuses = {}
+    for line in output.splitlines():
+        if '\t' in line:
+            added, deleted, path = line.split('\t', 2)
+            counts[path] = (int(added) if added.isdigit() else 0, int(deleted) if deleted.isdigit() else 0)
+        elif line.startswith((' create mode ', ' delete mode ')):
+            path = line.split(' ', 4)[4]
+            statuses[path] = 'A' if line.startswith(' create') else 'D'
+    return [(path, added, deleted, statuses.get(path, 'M')) for path, (added, deleted) in counts.items()]
+
+
+def heuristic_message(cwd=None):
+    """Draft message for the staged changes, or None if nothing is staged or git fails."""
+    try:
+        return draft_message(staged_files(cwd))
+    except (OSError, subprocess.CalledProcessError):
+        return None
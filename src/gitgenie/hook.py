@@ -0,0 +1,178 @@
+"""prepare-commit-msg hook for plain `git commit`.
+
+Kept light on imports: the precomputed fast path only needs the standard
+library, and the generator modules are imported only when they are needed.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+
+HOOK_NAME = 'prepare-commit-msg'
+HOOK_MARKER = '# installed by gitgenie'
+HOOK_SCRIPT = """#!/bin/sh
+{marker}
+exec "{python}" -m gitgenie.hook "$@"
+"""
+
+# Commit sources for which git already has a message: -m/-F, merges,
+# squashes and -c/-C/--amend. A template (-t or commit.template) is not a
+# message, so the 'template' source is checked against the template instead.
+SKIP_SOURCES = ('message', 'merge', 'squash', 'commit')
+# `git commit -v` puts the diff below this line (after the comment character).
+SCISSORS = '------------------------ >8 ------------------------'
+
+
+def _git(*args, cwd=None):
+    return subprocess.run(
+        ['git', *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+    ).stdout.decode('utf-8', errors='replace').strip()
+
+
+def hook_path(repo_dir=None):
+    """Path of the prepare-commit-msg hook, honouring core.hooksPath."""
+    path = _git('rev-parse', '--git-path', f'hooks/{HOOK_NAME}', cwd=repo_dir)
+    return os.path.abspath(os.path.join(repo_dir or os.getcwd(), path))
+
+
+def install_hook(force=False, repo_dir=None):
+    """Install the hook. Returns the path, or raises FileExistsError for a foreign hook."""
+    path = hook_path(repo_dir)
+    if os.path.exists(path) and not force:
+        with open(path) as f:
+            if HOOK_MARKER not in f.read():
+                raise FileExistsError(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(HOOK_SCRIPT.format(marker=HOOK_MARKER, python=sys.executable))
+    os.chmod(path, 0o755)
+    return path
+
+
+def uninstall_hook(repo_dir=None):
+    """Remove the hook if gitgenie installed it. Returns True if it was removed."""
+    path = hook_path(repo_dir)
+    try:
+        with open(path) as f:
+            if HOOK_MARKER not in f.read():
+                return False
+    except OSError:
+        return False
+    os.remove(path)
+    return True
+
+
+def _has_message(message_file, template_lines=()):
+    """True if the file holds text above the scissors line that isn't a comment or from the template."""
+    try:
+        with open(message_file) as f:
+            for line in f:
+                if line.rstrip('\n').endswith(SCISSORS):
+                    break
+                if line.strip() and not line.startswith('#') and line.strip() not in template_lines:
+                    return True
+    except OSError:
+        pass
+    return False
+
+
+def _template_lines():
+    """Lines of the commit.template file, or None if it isn't set or can't be read."""
+    try:
+        with open(_git('config', '--path', 'commit.template')) as f:
+            return {line.strip() for line in f}
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _user_wrote_message(message_file, source):
+    if source != 'template':
+        return _has_message(message_file)
+    # The file is the template, unless it differs from commit.template (with -t it can't be told apart).
+    template_lines = _template_lines()
+    return template_lines is not None and _has_message(message_file, template_lines)
+
+
+def _precomputed_message():
+    """Read the daemon's message for the current staged changes without importing gitgenie's heavy modules."""
+    from .git_utils import get_staged_key
+
+    try:
+        git_dir = _git('rev-parse', '--git-dir')
+        with open(os.path.join(git_dir, 'gitgenie', 'precomputed.json')) as f:
+            data = json.load(f)
+        if data.get('message') and data.get('key') == get_staged_key():
+            return data['message']
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        pass
+    return None
+
+
+def _generate_within(budget):
+    """Generate a message in a background thread, giving up after budget seconds."""
+    result = {}
+
+    def run():
+        from .commit_analyzer import generate_commit_message, prepare_staged_diff
+
+        diff, _ = prepare_staged_diff()
+        if diff:
+            result['message'] = generate_commit_message(diff, echo=False)
+
+    thread = threading.Thread(target=run, name='gitgenie-hook', daemon=True)
+    thread.start()
+    thread.join(budget)
+    return result.get('message')
+
+
+def _write_message(message_file, message):
+    with open(message_file) as f:
+        existing = f.read()
+    # Keep template text out of the subject paragraph.
+    separator = '\n' if existing[:1] not in ('', '\n', '#') else ''
+    with open(message_file, 'w') as f:
+        f.write(message.strip() + '\n' + separator + existing)
+
+
+def run_hook(message_file, source=None, sha=None, budget=None):
+    """Fill in the commit message file. Never raises and never takes longer than budget.
+
+    Generation that runs past the budget is abandoned, not stopped: run as
+    `python -m gitgenie.hook`, the process exits without waiting for it.
+    """
+    try:
+        if source in SKIP_SOURCES or _user_wrote_message(message_file, source):
+            return 0
+        message = _precomputed_message()
+        if message is None:
+            if budget is None:
+                from .config import get_setting
+
+                budget = get_setting('hook_budget')
+            message = _generate_within(budget)
+            if message is None:
+                from .heuristic import heuristic_message
+
+                message = heuristic_message()
+        if message:
+            _write_message(message_file, message)
+    except Exception:
+        pass
+    return 0
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if not args:
+        return 0
+    return run_hook(*args[:3])
+
+
+if __name__ == '__main__':
+    code = main()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # Exit now instead of letting the interpreter join generation threads
+    # (chunk summaries, the structure pool) that outlived the budget.
+    os._exit(code)
@@ -1,21 +1,142 @@
+import io
+import threading
+import time
+
+import httpx
 import ollama
 
-def generate_text(prompt):
-    try:
-        stream = ollama.chat(
-            model='llama3',
-            messages=[{'role': 'user', 'content': prompt}],
-            stream=True
-        )
-        result = ""
-        for chunk in stream:
-            content = chunk['message']['content']
-            print(content, end='', flush=True)
-            result += content
-        print() 
-        return result
-    except Exception as e:
-        return None
+from . import profiling
+from .backends import Backend, build_router
+from .config import get_setting, settings_key
+from .sinks import streaming
+from .token_budget import count_tokens
+
+
+class LLMClient(Backend):
+    """Ollama backend that reuses one pooled HTTP connection and keeps the model loaded."""
+
+    kind = 'ollama'
+
+    def __init__(self, model=None, host=None, connect_timeout=None, read_timeout=None, keep_alive=None, **kwargs):
+        super().__init__(model, host or get_setting('ollama_host'), connect_timeout, read_timeout, **kwargs)
+        self.keep_alive = keep_alive if keep_alive is not None else get_setting('keep_alive')
+        self._client = None
+
+    @property
+    def client(self):
+        """The underlying ollama.Client, created on first use and shared afterwards."""
+        with self._lock:
+            if self._client is None:
+                self._client = ollama.Client(
+                    host=self.host,
+                    timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                )
+            return self._client
+
+    def _stream(self, prompt, sink, options, stop_when, stats):
+        start = time.perf_counter()
+        first_token = None
+        text = io.StringIO()
+        with profiling.phase('generation'), streaming(sink):
+            kwargs = {}
+            if options:
+                kwargs['options'] = options
+            stream = self.client.chat(
+                model=self.model,
+                messages=[{'role': 'user', 'content': prompt}],
+                stream=True,
+                keep_alive=self.keep_alive,
+                **kwargs,
+            )
+            for chunk in stream:
+                content = chunk['message']['content']
+                if content:
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    stats['chunks'] += 1
+                    sink.write(content)
+                    text.write(content)
+                if chunk.get('done'):
+                    for name in profiling.OLLAMA_METRICS:
+                        stats[name] = chunk.get(name)
+                elif stop_when is not None and stop_when(text.getvalue()):
+                    stats['stopped_early'] = True
+                    if hasattr(stream, 'close'):
+                        stream.close()
+                    break
+        end = time.perf_counter()
+        stats['total_time'] = end - start
+        if first_token is not None:
+            stats['time_to_first_token'] = first_token - start
+            stats['streaming_time'] = end - first_token
+        return text.getvalue()
+
+    def warm_up(self):
+        """Load the model into memory without generating anything.
+
+        The model is loaded with the num_ctx most requests use (see
+        generation_options); Ollama reloads it whenever num_ctx changes.
+        """
+        try:
+            self.client.chat(model=self.model, messages=[], keep_alive=self.keep_alive,
+                             options={'num_ctx': default_context()})
+            return True
+        except Exception:
+            return False
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide Router over the configured backends.
+
+    Code running under override_settings() gets its own Router for each
+    distinct set of overrides.
+    """
+    key = settings_key()
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = build_router()
+        return client
+
+
+def reset_client():
+    """Drop the cached Routers so the next call builds a new one."""
+    with _clients_lock:
+        _clients.clear()
+
+
+def default_context():
+    """num_ctx for every request that fits in it: min_context, capped at max_context."""
+    return min(get_setting('min_context'), get_setting('max_context'))
+
+
+def generation_options(prompt, num_predict=None, **options):
+    """Build Ollama options for prompt, with a num_ctx that holds the prompt and the output.
+
+    num_ctx stays at default_context() unless the prompt plus num_predict
+    tokens would overflow it; only then is max_context used. Ollama reloads
+    the model whenever num_ctx changes, so sizing it to each prompt would
+    undo warm-up and keep_alive.
+    """
+    needed = count_tokens(prompt) + (num_predict or 512)
+    num_ctx = default_context()
+    options['num_ctx'] = num_ctx if needed <= num_ctx else get_setting('max_context')
+    if num_predict is not None:
+        options['num_predict'] = num_predict
+    return options
+
+
+def generate_text(prompt, echo=True, options=None, stop_when=None, task=None, sink=None):
+    """Generate text for prompt with the configured backends.
+
+    Output streams to sink (see sinks.resolve_sink): by default to the
+    terminal, or nowhere with echo=False.
+    """
+    return get_client().generate(prompt, echo=echo, options=options, stop_when=stop_when, task=task, sink=sink)
     
 if __name__ == '__main__':
     print("Testing generate_text()...")
@@ -24,4 +145,4 @@ if __name__ == '__main__':
     if result:
         print(f"Success: {result}")
     else:
-        print("Error: Ollama might not be running")
\ No newline at end of file
+        print("Error: Ollama might not be running")
@@ -1,13 +1,19 @@
-from .git_utils import get_commit_log
-from .llm_client import generate_text
-def generate_pr_description(commits, base_branch='main'):
-    commit_summary = ""
-    for commit in commits:
-        commit_summary += f"- {commit['hash']}: {commit['message']}\n"
+from concurrent.futures import ThreadPoolExecutor
 
-    prompt = f"""You are an expert at writing GitHub Pull Request descriptions.
+from . import profiling
+from .cache import cache_get, cache_key, cache_set
+from .commit_analyzer import SUMMARY_GENERATION, report_packing, summarize_chunks
+from .config import get_setting
+from .diff_filter import compact_diff
+from .diff_parser import chunk_diff
+from .git_utils import bind_session, get_commit_diff, get_commit_log
+from .llm_client import generate_text, generation_options
+from .sinks import resolve_sink, streaming
+from .token_budget import count_tokens, fit_text, pack_diff, prompt_budget
 
-Based on the following commits, generate a comprehensive PR description.
+PR_PROMPT_TEMPLATE = """You are an expert at writing GitHub Pull Request descriptions.
+
+Based on the following summary of the commits, generate a comprehensive PR description.
 
 Commits being merged into '{base_branch}':
 {commit_summary}
@@ -32,7 +38,158 @@ Use markdown formatting. Be clear and professional. Focus on what reviewers need
 
 Generate only the PR description, nothing else."""
 
-    pr_description = generate_text(prompt)
+COMMIT_SUMMARY_PROMPT_TEMPLATE = """You are reviewing a single git commit.
+
+Summarize what this commit changes in 1-3 short bullet points. Focus on behavior, not on file paths or line numbers.
+
+Commit message:
+{message}
+
+Git diff:
+{diff}
+
+Generate only the bullet points, nothing else."""
+
+MERGE_PROMPT_TEMPLATE = """You are summarizing a group of consecutive git commits.
+
+Below are summaries of each commit, oldest first. Combine them into 3-6 short bullet points that describe the overall change. Merge related items and drop details a reviewer would not need.
+
+Commit summaries:
+{summaries}
+
+Generate only the bullet points, nothing else."""
+
+MERGE_GENERATION = {'num_predict': 256, 'temperature': 0.2}
+PR_GENERATION = {'num_predict': 1024, 'temperature': 0.3}
+
+
+def _commit_summary_line(commit, summary):
+    subject = commit['message'].split('\n', 1)[0]
+    if summary is None:
+        return f"- {commit['hash']}: {commit['message']}\n"
+    bullets = ''.join(f"  {line.strip()}\n" for line in summary.strip().splitlines() if line.strip())
+    return f"- {commit['hash']}: {subject}\n{bullets}"
+
+
+def summarize_commit(commit, use_cache=True):
+    """Summarize one commit's diff, caching the result by commit SHA.
+
+    Commits without a 'sha' (or whose diff can't be read) are summarized by
+    their message alone, without asking the model.
+    """
+    sha = commit.get('sha')
+    if not sha:
+        return _commit_summary_line(commit, None)
+    key = cache_key('commit-summary', sha, get_setting('model'), COMMIT_SUMMARY_PROMPT_TEMPLATE)
+    if use_cache:
+        cached = cache_get(key)
+        if cached is not None:
+            return cached
+
+    diff = get_commit_diff(sha, context_lines=get_setting('diff_context_lines'))
+    if diff is None:
+        return _commit_summary_line(commit, None)
+    if get_setting('diff_filter_enabled'):
+        diff = compact_diff(diff).diff
+
+    max_tokens = get_setting('chunk_token_budget')
+    if count_tokens(diff) <= max_tokens:
+        budget = prompt_budget(COMMIT_SUMMARY_PROMPT_TEMPLATE, SUMMARY_GENERATION['num_predict'], task='summary')
+        with profiling.phase('prompt_build'):
+            message = fit_text(commit['message'], budget // 4, 'message').text
+            packing = pack_diff(diff, budget - count_tokens(message))
+            prompt = COMMIT_SUMMARY_PROMPT_TEMPLATE.format(message=message, diff=packing.text)
+        report_packing(f"commit {commit['hash']}", packing)
+        summary = generate_text(prompt, echo=False, options=generation_options(prompt, **SUMMARY_GENERATION), task='summary')
+    else:
+        parts = summarize_chunks(chunk_diff(diff, max_tokens), max_workers=1)
+        summary = '\n'.join(part.strip() for part in parts) if parts is not None else None
+    if summary is None:
+        return None
+
+    line = _commit_summary_line(commit, summary)
+    cache_set(key, line)
+    return line
+
+
+def merge_summaries(summaries, use_cache=True):
+    """Merge a batch of summaries into one, cached by the batch content."""
+    joined = ''.join(summaries)
+    key = cache_key('merge-summary', joined, get_setting('model'), MERGE_PROMPT_TEMPLATE)
+    if use_cache:
+        cached = cache_get(key)
+        if cached is not None:
+            return cached
+    with profiling.phase('prompt_build'):
+        packing = fit_text(joined, prompt_budget(MERGE_PROMPT_TEMPLATE, MERGE_GENERATION['num_predict'], task='merge'),
+                           'summaries')
+        prompt = MERGE_PROMPT_TEMPLATE.format(summaries=packing.text)
+    report_packing('merge', packing)
+    merged = generate_text(prompt, echo=False, options=generation_options(prompt, **MERGE_GENERATION), task='merge')
+    if merged is None:
+        return None
+    merged = ''.join(f"{line.strip()}\n" for line in merged.strip().splitlines() if line.strip())
+    cache_set(key, merged)
+    return merged
+
+
+def _map(func, items, max_workers):
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        return list(executor.map(bind_session(func), items))
+
+
+def summarize_commits(commits, use_cache=True, batch_size=None, max_workers=None):
+    """Summarize commits hierarchically and return the text for the final prompt.
+
+    Each commit is summarized once (and cached by SHA). While there are more
+    than batch_size summaries, they are merged in batches of batch_size. Commits
+    are processed oldest first so that a new commit only changes the last batch
+    at each level. Returns None if any model call fails.
+    """
+    if batch_size is None:
+        batch_size = get_setting('pr_batch_size')
+    if max_workers is None:
+        max_workers = get_setting('max_concurrency')
+    batch_size = max(2, batch_size)
+
+    ordered = list(reversed(commits))
+    summaries = _map(lambda commit: summarize_commit(commit, use_cache), ordered, max_workers)
+    while None not in summaries and len(summaries) > batch_size:
+        batches = [summaries[i:i + batch_size] for i in range(0, len(summaries), batch_size)]
+        summaries = _map(lambda batch: merge_summaries(batch, use_cache), batches, max_workers)
+    if None in summaries:
+        return None
+    return ''.join(summaries)
+
+
+def generate_pr_description(commits, base_branch='main', use_cache=True, batch_size=None, max_workers=None,
+                            echo=True, sink=None):
+    """Generate a PR description for commits (newest first).
+
+    The description streams to sink, or to the terminal if echo is set.
+    """
+    commit_summary = summarize_commits(commits, use_cache, batch_size, max_workers)
+    if commit_summary is None:
+        return None
+
+    key = cache_key('pr', base_branch, commit_summary, get_setting('model'), PR_PROMPT_TEMPLATE)
+    if use_cache:
+        with profiling.phase('cache_lookup'):
+            cached = cache_get(key)
+        if cached is not None:
+            with streaming(resolve_sink(sink, echo)) as output:
+                output.write(cached)
+            return cached
+
+    with profiling.phase('prompt_build'):
+        budget = prompt_budget(PR_PROMPT_TEMPLATE, PR_GENERATION['num_predict'], task='pr') - count_tokens(base_branch)
+        packing = fit_text(commit_summary, budget, 'commits')
+        prompt = PR_PROMPT_TEMPLATE.format(base_branch=base_branch, commit_summary=packing.text)
+    report_packing('pr', packing)
+
+    pr_description = generate_text(prompt, echo=echo, options=generation_options(prompt, **PR_GENERATION), task='pr',
+                                   sink=sink)
+    cache_set(key, pr_description)
     return pr_description
     
 
@@ -49,4 +206,4 @@ if __name__ == '__main__':
             print("--- Generated PR Description ---")
             print(result)
         else:
-            print("Error: Failed to generate PR description")
\ No newline at end of file
+            print("Error: Failed to generate PR description")
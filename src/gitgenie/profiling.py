@@ -0,0 +1,195 @@
+import contextvars
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Metadata Ollama attaches to the final chunk of a stream. Durations are in nanoseconds.
+OLLAMA_METRICS = (
+    'total_duration',
+    'load_duration',
+    'prompt_eval_count',
+    'prompt_eval_duration',
+    'eval_count',
+    'eval_duration',
+)
+
+
+class Profiler:
+    """Collects phase timings and generation stats for one CLI command."""
+
+    def __init__(self, command):
+        self.command = command
+        self.run_id = uuid.uuid4().hex[:12]
+        self.phases = {}
+        self.generations = []
+        self.packings = []
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Add seconds to the named phase."""
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record_generation(self, stats):
+        with self._lock:
+            self.generations.append(dict(stats))
+
+    def record_packing(self, name, packing):
+        """Remember how a prompt was packed into its token budget."""
+        with self._lock:
+            self.packings.append((name, packing))
+
+    def generation_summary(self):
+        """Combine the stats of every generation in this run."""
+        if not self.generations:
+            return {}
+        summary = {
+            'requests': len(self.generations),
+            'time_to_first_token': self.generations[0].get('time_to_first_token'),
+            'chunks': sum(g.get('chunks', 0) for g in self.generations),
+            'queue_wait': sum(g.get('queue_wait', 0.0) for g in self.generations),
+            'retries': sum(g.get('retries', 0) for g in self.generations),
+        }
+        for name in OLLAMA_METRICS:
+            values = [g[name] for g in self.generations if g.get(name) is not None]
+            summary[name] = sum(values) if values else None
+        if summary['eval_count'] and summary['eval_duration']:
+            summary['tokens_per_second'] = summary['eval_count'] / (summary['eval_duration'] / 1e9)
+        else:
+            streaming = sum(g.get('streaming_time', 0.0) for g in self.generations)
+            summary['tokens_per_second'] = summary['chunks'] / streaming if streaming else None
+        return summary
+
+    def to_records(self):
+        """Return JSON-serializable records: one per phase, one for generation, then one per packed prompt."""
+        records = [
+            {
+                'run_id': self.run_id,
+                'command': self.command,
+                'type': 'phase',
+                'phase': name,
+                'duration_ms': round(seconds * 1000, 3),
+            }
+            for name, seconds in self.phases.items()
+        ]
+        summary = self.generation_summary()
+        if summary:
+            record = {'run_id': self.run_id, 'command': self.command, 'type': 'generation'}
+            for name, value in summary.items():
+                if value is None:
+                    record[name] = None
+                elif name in ('time_to_first_token', 'queue_wait'):
+                    record[name + '_ms'] = round(value * 1000, 3)
+                elif name.endswith('_duration'):
+                    record[name + '_ms'] = round(value / 1e6, 3)
+                elif isinstance(value, float):
+                    record[name] = round(value, 3)
+                else:
+                    record[name] = value
+            records.append(record)
+        for name, packing in self.packings:
+            records.append({'run_id': self.run_id, 'command': self.command, 'type': 'packing',
+                            'prompt': name, **packing.to_dict()})
+        return records
+
+    def render_json(self):
+        return '\n'.join(json.dumps(record) for record in self.to_records())
+
+    def render_table(self):
+        lines = [f"Profile for '{self.command}' (run {self.run_id})"]
+        for name, seconds in self.phases.items():
+            lines.append(f"  {name:<24}{seconds * 1000:>12.1f} ms")
+        summary = self.generation_summary()
+        if summary:
+            lines.append('  generation stats:')
+            ttft = summary['time_to_first_token']
+            tps = summary['tokens_per_second']
+            lines.append(f"    {'requests':<22}{summary['requests']:>12}")
+            if ttft is not None:
+                lines.append(f"    {'time to first token':<22}{ttft * 1000:>12.1f} ms")
+            if tps is not None:
+                lines.append(f"    {'tokens/sec':<22}{tps:>12.1f}")
+            if summary['queue_wait']:
+                lines.append(f"    {'queue wait':<22}{summary['queue_wait'] * 1000:>12.1f} ms")
+            if summary['retries']:
+                lines.append(f"    {'retries':<22}{summary['retries']:>12}")
+            for name in ('prompt_eval_count', 'eval_count'):
+                if summary[name] is not None:
+                    lines.append(f"    {name:<22}{summary[name]:>12}")
+            for name in ('load_duration', 'prompt_eval_duration', 'eval_duration'):
+                if summary[name] is not None:
+                    lines.append(f"    {name:<22}{summary[name] / 1e6:>12.1f} ms")
+        if self.packings:
+            lines.append('  prompt packing:')
+            for name, packing in self.packings:
+                lines.append(f"    {name:<22}{packing.summary()}")
+        return '\n'.join(lines)
+
+    def render(self, fmt):
+        return self.render_json() if fmt == 'json' else self.render_table()
+
+
+_active = None
+_scoped = contextvars.ContextVar('gitgenie_profiler', default=None)
+
+
+def start(command):
+    """Start profiling a command and make it the active profiler."""
+    global _active
+    _active = Profiler(command)
+    return _active
+
+
+def stop():
+    """Stop profiling and return the profiler that was active, if any."""
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def get_profiler():
+    return _scoped.get() or _active
+
+
+@contextmanager
+def scope(command):
+    """Collect into a Profiler of its own in this thread or context, e.g. per item of a parallel run."""
+    profiler = Profiler(command)
+    token = _scoped.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _scoped.reset(token)
+
+
+@contextmanager
+def phase(name):
+    """Time a block against the active profiler. Does nothing when profiling is off."""
+    profiler = get_profiler()
+    if profiler is None:
+        yield
+        return
+    with profiler.phase(name):
+        yield
+
+
+def record_generation(stats):
+    profiler = get_profiler()
+    if profiler is not None:
+        profiler.record_generation(stats)
+
+
+def record_packing(name, packing):
+    profiler = get_profiler()
+    if profiler is not None:
+        profiler.record_packing(name, packing)
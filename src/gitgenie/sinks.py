@@ -0,0 +1,195 @@
+"""Where streamed model output goes while it is generated.
+
+A sink gets start() before a response, write() for every chunk of text and
+end() when the response is done. Backends accumulate the full text
+themselves, so a sink only has to display it (or not).
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .config import get_setting
+
+
+class Sink:
+    """Discards everything. Base class for the other sinks."""
+
+    def start(self):
+        pass
+
+    def write(self, text):
+        pass
+
+    def end(self):
+        pass
+
+
+class SilentSink(Sink):
+    """For batch use and library callers that only want the return value."""
+
+
+class BufferedSink(Sink):
+    """Writes to a stream (stdout by default) in batches instead of once per token.
+
+    Text is flushed when a line is complete, when `buffer_size` characters are
+    pending, and at the end of the response.
+    """
+
+    def __init__(self, stream=None, buffer_size=4096):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._pending = []
+        self._size = 0
+
+    def _flush(self):
+        stream = self.stream or sys.stdout
+        if self._pending:
+            stream.write(''.join(self._pending))
+            self._pending = []
+            self._size = 0
+        stream.flush()
+
+    def write(self, text):
+        self._pending.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size or '\n' in text:
+            self._flush()
+
+    def end(self):
+        self._pending.append('\n')
+        self._flush()
+
+
+class LiveSink(Sink):
+    """Renders the response in place with rich, at most `refresh_per_second` times a second.
+
+    A placeholder (e.g. a heuristic draft) is shown dimmed until the first
+    chunk of text replaces it.
+    """
+
+    def __init__(self, console=None, refresh_per_second=None, placeholder=None):
+        self.console = console
+        self.placeholder = placeholder
+        self.refresh_per_second = refresh_per_second or get_setting('live_refresh_per_second')
+        self._live = None
+        self._parts = []
+        self._last_refresh = 0.0
+
+    def _text(self):
+        from rich.text import Text
+
+        if not self._parts and self.placeholder:
+            return Text(self.placeholder, style='dim')
+        return Text(''.join(self._parts))
+
+    def start(self):
+        from rich.live import Live
+
+        self._parts = []
+        self._last_refresh = 0.0
+        self._live = Live(self._text(), console=self.console, auto_refresh=False, transient=False)
+        self._live.start()
+
+    def write(self, text):
+        self._parts.append(text)
+        now = time.monotonic()
+        if self._live is not None and now - self._last_refresh >= 1 / self.refresh_per_second:
+            self._last_refresh = now
+            self._live.update(self._text(), refresh=True)
+
+    def end(self):
+        if self._live is not None:
+            self._live.update(self._text(), refresh=True)
+            self._live.stop()
+            self._live = None
+
+
+class CallbackSink(Sink):
+    """Calls on_text(chunk) for every chunk, and on_end() when the response is done."""
+
+    def __init__(self, on_text, on_end=None):
+        self.on_text = on_text
+        self.on_end = on_end
+
+    def write(self, text):
+        self.on_text(text)
+
+    def end(self):
+        if self.on_end is not None:
+            self.on_end()
+
+
+class DetachableSink(Sink):
+    """Forwards to another sink until detach() is called, then drops everything.
+
+    For output from a generation the caller has stopped waiting for: detach()
+    ends the response on the wrapped sink (a LiveSink stops redrawing) and
+    whatever the generation writes afterwards is discarded.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self._active = False
+        self._detached = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if not self._detached:
+                self._active = True
+                self.sink.start()
+
+    def write(self, text):
+        with self._lock:
+            if not self._detached:
+                self.sink.write(text)
+
+    def end(self):
+        with self._lock:
+            if self._active:
+                self._active = False
+                self.sink.end()
+
+    def detach(self):
+        with self._lock:
+            if self._active:
+                self._active = False
+                self.sink.end()
+            self._detached = True
+
+
+@contextmanager
+def streaming(sink):
+    """Bracket one response with sink.start() and sink.end(), even if it fails."""
+    sink.start()
+    try:
+        yield sink
+    finally:
+        sink.end()
+
+
+def default_sink(stream=None, placeholder=None):
+    """LiveSink on a terminal (if live_output is on), else a BufferedSink.
+
+    placeholder is only shown by the LiveSink.
+    """
+    stream = stream or sys.stdout
+    if get_setting('live_output') and getattr(stream, 'isatty', lambda: False)():
+        from rich.console import Console
+
+        return LiveSink(Console(file=stream), placeholder=placeholder)
+    return BufferedSink(stream)
+
+
+def resolve_sink(sink=None, echo=True):
+    """Turn the sink/echo arguments of the generate functions into a Sink.
+
+    sink may be a Sink or a callable taking each chunk of text. Without one,
+    echo picks the default sink (True) or silence (False).
+    """
+    if sink is None:
+        return default_sink() if echo else SilentSink()
+    if isinstance(sink, Sink):
+        return sink
+    return CallbackSink(sink)
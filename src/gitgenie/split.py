@@ -0,0 +1,92 @@
+"""Split staged changes into one commit per package or scope.
+
+A file belongs to the first `split_rules` directory pattern its path falls
+under (e.g. "packages/*" puts packages/api/x.py in "packages/api"), else to
+the nearest directory holding one of `split_markers` (pyproject.toml,
+package.json, ...), else to the repository root. Messages for the groups are
+generated concurrently, and the commits are then created in order from
+temporary indexes, leaving the working tree alone.
+"""
+import fnmatch
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from . import profiling
+from .commit_analyzer import generate_commit_message, prepare_staged_diff
+from .config import get_setting
+from .git_utils import bind_session, commit_staged_groups, find_indexed_files, get_staged_entries
+
+
+class SplitGroup:
+    """Staged entries that go into one commit, and the message generated for them."""
+
+    def __init__(self, scope, entries):
+        self.scope = scope
+        self.entries = entries
+        self.message = None
+        self.notes = []
+
+    @property
+    def label(self):
+        return self.scope or '(root)'
+
+    @property
+    def paths(self):
+        return [path for _, _, _, path in self.entries]
+
+
+def scope_for(path, rules, packages):
+    """Group for path: a rule match, else the nearest package directory, else '' (the root)."""
+    parts = path.split('/')
+    for rule in rules:
+        depth = rule.strip('/').count('/') + 1
+        if len(parts) > depth and fnmatch.fnmatchcase('/'.join(parts[:depth]), rule.strip('/')):
+            return '/'.join(parts[:depth])
+    directory = posixpath.dirname(path)
+    while directory:
+        if directory in packages:
+            return directory
+        directory = posixpath.dirname(directory)
+    return ''
+
+
+def plan_split(rules=None, markers=None):
+    """Group the staged changes by scope. Returns a list of SplitGroups, or None outside a repository.
+
+    Groups are ordered by scope, with files at the root committed last.
+    """
+    entries = get_staged_entries()
+    if entries is None:
+        return None
+    if rules is None:
+        rules = get_setting('split_rules')
+    if markers is None:
+        markers = get_setting('split_markers')
+    packages = {posixpath.dirname(path) for path in find_indexed_files(markers)}
+    groups = {}
+    for entry in entries:
+        groups.setdefault(scope_for(entry[3], rules, packages), []).append(entry)
+    return [SplitGroup(scope, groups[scope]) for scope in sorted(groups, key=lambda scope: (scope == '', scope))]
+
+
+def generate_split_messages(groups, use_cache=True, max_workers=None):
+    """Generate a commit message for every group concurrently. Failed groups keep message None."""
+    def generate(group):
+        diff, group.notes = prepare_staged_diff(paths=group.paths)
+        if diff:
+            # One request at a time per group, so max_workers bounds the requests in flight.
+            group.message = generate_commit_message(diff, max_workers=1, use_cache=use_cache, echo=False)
+        return group
+
+    if max_workers is None:
+        max_workers = get_setting('max_concurrency')
+    with profiling.phase('split_generate'):
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as executor:
+            list(executor.map(bind_session(generate), groups))
+    return groups
+
+
+def commit_split(groups):
+    """Create one commit per group, in order. Returns the new commit hashes, or None on failure."""
+    with profiling.phase('commit_write'):
+        return commit_staged_groups([(group.entries, group.message) for group in groups])
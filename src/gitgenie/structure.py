@@ -0,0 +1,260 @@
+"""LLM-free summary of what a diff changes structurally.
+
+Each changed file's old and new contents are read from git and compared
+symbol by symbol: Python with `ast`, other code with a regular expression
+for common definition keywords. The result lists the functions and classes
+that were added, removed, modified or had their signature changed, which is
+much smaller than the hunks and the context around them.
+"""
+import ast
+import copy
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import get_setting
+from .diff_parser import file_diff_path, split_diff_by_file, split_file_hunks
+from .git_utils import read_blobs
+from .token_budget import _hunk_stats
+
+PYTHON_EXTENSIONS = ('.py', '.pyi')
+CODE_EXTENSIONS = (
+    '.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.go', '.rs', '.java', '.kt', '.kts', '.scala', '.swift',
+    '.c', '.h', '.cc', '.cpp', '.hpp', '.cs', '.rb', '.php', '.ex', '.exs', '.lua', '.sh', '.bash',
+)
+
+DEFINITION_PATTERN = re.compile(
+    r'^\s*(?:(?:export|default|pub(?:\([^)]*\))?|public|private|protected|internal|static|abstract|final|async)\s+)*'
+    r'(?P<kind>def|class|function|func|fn|interface|struct|enum|trait|impl|module)\s+'
+    r'(?:\([^)]*\)\s*)?'
+    r'(?P<name>[A-Za-z_$][\w$]*)'
+)
+ARROW_FUNCTION_PATTERN = re.compile(
+    r'^\s*(?:export\s+)?(?:const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?'
+    r'(?P<params>\([^)]*\)|[A-Za-z_$][\w$]*)\s*=>'
+)
+KINDS = {'def': 'function', 'function': 'function', 'func': 'function', 'fn': 'function'}
+
+# Files bigger than this are only counted, not parsed.
+MAX_PARSE_BYTES = 1024 * 1024
+# Symbols listed per file before the rest are summarized as a count.
+MAX_SYMBOLS_PER_FILE = 20
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+class Symbol:
+    """A definition in one version of a file."""
+
+    __slots__ = ('kind', 'signature', 'body')
+
+    def __init__(self, kind, signature, body):
+        self.kind = kind
+        self.signature = signature
+        self.body = body
+
+
+def _own_dump(node):
+    """ast.dump of a definition without the definitions nested in it, so each change is reported once."""
+    clone = copy.copy(node)
+    clone.body = [child for child in node.body if not isinstance(child, _DEFINITIONS)]
+    return ast.dump(clone)
+
+
+def python_symbols(source):
+    """Map qualified names (e.g. 'Engine.start') to Symbols. Raises SyntaxError."""
+    symbols = {}
+
+    def visit(node, prefix, in_class):
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, _DEFINITIONS):
+                continue
+            name = prefix + child.name
+            if isinstance(child, ast.ClassDef):
+                bases = ', '.join(ast.unparse(base) for base in child.bases)
+                symbols[name] = Symbol('class', f'({bases})' if bases else '', _own_dump(child))
+            else:
+                signature = f'({ast.unparse(child.args)})'
+                if child.returns is not None:
+                    signature += f' -> {ast.unparse(child.returns)}'
+                symbols[name] = Symbol('method' if in_class else 'function', signature, _own_dump(child))
+            visit(child, name + '.', isinstance(child, ast.ClassDef))
+
+    visit(ast.parse(source), '', False)
+    return symbols
+
+
+def regex_symbols(source):
+    """Map definition names to Symbols for languages without a parser here.
+
+    A definition's body is everything up to the next definition, so a change
+    anywhere in between marks it modified.
+    """
+    lines = source.splitlines()
+    found = []
+    for number, line in enumerate(lines):
+        match = DEFINITION_PATTERN.match(line) or ARROW_FUNCTION_PATTERN.match(line)
+        if match:
+            kind = match.groupdict().get('kind') or 'function'
+            signature = match.groupdict().get('params') or re.split(r'\{|=>', line[match.end():], maxsplit=1)[0].strip()
+            found.append((match.group('name'), KINDS.get(kind, kind), number, signature))
+    symbols = {}
+    for i, (name, kind, start, signature) in enumerate(found):
+        end = found[i + 1][2] if i + 1 < len(found) else len(lines)
+        body = '\n'.join(line.strip() for line in lines[start:end])
+        key = name
+        count = 2
+        while key in symbols:
+            key = f'{name} ({count})'
+            count += 1
+        symbols[key] = Symbol(kind, signature, body)
+    return symbols
+
+
+def _decode(blob):
+    if blob is None:
+        return ''
+    return blob.decode('utf-8', errors='replace')
+
+
+def _symbols(path, source):
+    if path.endswith(PYTHON_EXTENSIONS):
+        try:
+            return python_symbols(source)
+        except (SyntaxError, ValueError):
+            pass
+    return regex_symbols(source)
+
+
+def compare_symbols(old, new):
+    """List (change, kind, name, detail) for symbols added, removed, re-signed or modified."""
+    changes = []
+    for name, symbol in new.items():
+        before = old.get(name)
+        if before is None:
+            changes.append(('added', symbol.kind, name, symbol.signature))
+        elif before.signature != symbol.signature:
+            changes.append(('signature', symbol.kind, name, f'{before.signature} -> {symbol.signature}'))
+        elif before.body != symbol.body:
+            changes.append(('modified', symbol.kind, name, ''))
+    for name, symbol in old.items():
+        if name not in new:
+            changes.append(('removed', symbol.kind, name, symbol.signature))
+    return changes
+
+
+def analyze_file(path, old_blob, new_blob):
+    """Symbol changes between two versions of a file. Runs in worker processes."""
+    if not path.endswith(PYTHON_EXTENSIONS + CODE_EXTENSIONS):
+        return []
+    for blob in (old_blob, new_blob):
+        if blob is not None and (len(blob) > MAX_PARSE_BYTES or b'\0' in blob[:8000]):
+            return []
+    return compare_symbols(_symbols(path, _decode(old_blob)), _symbols(path, _decode(new_blob)))
+
+
+def _analyze_job(job):
+    return analyze_file(*job)
+
+
+class FileChange:
+    """One file in the diff: status (A, M, D or R), line counts and symbol changes."""
+
+    def __init__(self, path, status, added, removed, old_path=None):
+        self.path = path
+        self.status = status
+        self.added = added
+        self.removed = removed
+        self.old_path = old_path or path
+        self.symbols = []
+
+    def render(self):
+        name = f'{self.old_path} -> {self.path}' if self.status == 'R' else self.path
+        lines = [f'{self.status} {name} (+{self.added} -{self.removed})\n']
+        for change, kind, symbol, detail in self.symbols[:MAX_SYMBOLS_PER_FILE]:
+            if change == 'signature':
+                lines.append(f'  changed signature of {kind} {symbol}: {detail}\n')
+            elif change == 'modified':
+                lines.append(f'  modified {kind} {symbol}\n')
+            else:
+                lines.append(f'  {change} {kind} {symbol}{detail}\n')
+        if len(self.symbols) > MAX_SYMBOLS_PER_FILE:
+            lines.append(f'  ... and {len(self.symbols) - MAX_SYMBOLS_PER_FILE} more changed definitions\n')
+        return ''.join(lines)
+
+
+class ChangeSummary:
+    """Structural summary of a diff."""
+
+    def __init__(self, files):
+        self.files = files
+
+    @property
+    def symbol_count(self):
+        return sum(len(f.symbols) for f in self.files)
+
+    def render(self):
+        added = sum(f.added for f in self.files)
+        removed = sum(f.removed for f in self.files)
+        header = f'Change summary ({len(self.files)} files, +{added} -{removed}):\n'
+        return header + ''.join(f.render() for f in self.files)
+
+
+def _file_change(file_diff):
+    header, hunks = split_file_hunks(file_diff)
+    added = removed = 0
+    for hunk in hunks:
+        a, r = _hunk_stats(hunk)
+        added += a
+        removed += r
+    path = file_diff_path(file_diff)
+    old_path = None
+    status = 'M'
+    for line in header.splitlines():
+        if line.startswith('new file mode'):
+            status = 'A'
+        elif line.startswith('deleted file mode'):
+            status = 'D'
+        elif line.startswith('rename from '):
+            status = 'R'
+            old_path = line[len('rename from '):]
+    return FileChange(path, status, added, removed, old_path)
+
+
+def summarize_diff(diff, old_rev='HEAD', new_rev='', workers=None):
+    """Build a ChangeSummary for diff, reading file versions from git.
+
+    old_rev and new_rev name the versions on each side; the defaults ('HEAD'
+    and '', the index) fit the staged diff. Files are analyzed in a process
+    pool once there are at least structure_parallel_min_files of them.
+    """
+    files = [_file_change(file_diff) for file_diff in split_diff_by_file(diff)]
+    specs = {}
+    for change in files:
+        # Only code files are parsed, so don't read the others (data files can be huge).
+        if change.path.endswith(PYTHON_EXTENSIONS + CODE_EXTENSIONS):
+            specs[change] = (
+                None if change.status == 'A' else f'{old_rev}:{change.old_path}',
+                None if change.status == 'D' else f'{new_rev}:{change.path}',
+            )
+    blobs = read_blobs([spec for pair in specs.values() for spec in pair if spec is not None], MAX_PARSE_BYTES)
+    # Versions over MAX_PARSE_BYTES aren't in blobs; their files are only counted.
+    parsed = [
+        (change, pair) for change, pair in specs.items()
+        if all(spec is None or spec in blobs for spec in pair)
+    ]
+    jobs = [(change.path, blobs.get(old), blobs.get(new)) for change, (old, new) in parsed]
+
+    if workers is None:
+        workers = get_setting('structure_workers') or os.cpu_count() or 1
+    if workers > 1 and len(jobs) >= get_setting('structure_parallel_min_files'):
+        # spawn rather than fork: callers such as batch mode have threads running.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as executor:
+            results = list(executor.map(_analyze_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        results = [_analyze_job(job) for job in jobs]
+    for (change, _), symbols in zip(parsed, results):
+        change.symbols = symbols
+    return ChangeSummary(files)
@@ -0,0 +1,152 @@
+"""Admission control for requests to a shared Ollama server.
+
+Every gitgenie process on a machine that talks to the same host shares a
+small set of slot files. A request holds an exclusive lock on one slot while
+it runs, so at most `throttle_slots` requests are in flight across all
+processes. Locks are released by the OS if a process dies.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+
+from . import profiling
+from .config import get_setting
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are limited
+    fcntl = None
+
+RETRY_STATUS_CODES = (429, 502, 503)
+
+SLOTS_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gitgenie', 'slots')
+
+
+class ThrottleTimeout(TimeoutError):
+    """No request slot became free before the queue deadline."""
+
+
+class Throttle:
+    """Limits concurrent requests to `slots`, across processes where file locks are available.
+
+    slots <= 0 disables the limit. Waiting for a slot gives up after `timeout`
+    seconds with ThrottleTimeout.
+    """
+
+    def __init__(self, slots, directory, timeout=None, poll_interval=0.05):
+        self.slots = slots
+        self.directory = directory
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._local = threading.BoundedSemaphore(slots) if slots > 0 and fcntl is None else None
+
+    def _try_lock(self, index):
+        path = os.path.join(self.directory, f'slot-{index}')
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def acquire(self):
+        """Wait for a free slot and return a handle for release()."""
+        if self.slots <= 0:
+            return None
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        if self._local is not None:
+            if not self._local.acquire(timeout=self.timeout):
+                raise ThrottleTimeout(f'no request slot free after {self.timeout}s')
+            return self._local
+        os.makedirs(self.directory, exist_ok=True)
+        order = list(range(self.slots))
+        random.shuffle(order)
+        while True:
+            for index in order:
+                fd = self._try_lock(index)
+                if fd is not None:
+                    return fd
+            delay = self.poll_interval * random.uniform(0.5, 1.5)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ThrottleTimeout(f'no request slot free after {self.timeout}s')
+                delay = min(delay, remaining)
+            time.sleep(delay)
+
+    def release(self, handle):
+        if handle is None:
+            return
+        if handle is self._local:
+            self._local.release()
+            return
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        os.close(handle)
+
+    @contextmanager
+    def slot(self, stats=None):
+        """Hold a slot for the duration of the block.
+
+        Time spent waiting is recorded as the queue_wait phase and added to
+        stats['queue_wait'] if stats is given.
+        """
+        if self.slots <= 0:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            with profiling.phase('queue_wait'):
+                handle = self.acquire()
+        finally:
+            if stats is not None:
+                stats['queue_wait'] = stats.get('queue_wait', 0.0) + time.perf_counter() - start
+        try:
+            yield
+        finally:
+            self.release(handle)
+
+
+def is_retryable(error):
+    """True for errors that mean the server is busy or unreachable rather than the request is bad."""
+    status = getattr(error, 'status_code', None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    if status in RETRY_STATUS_CODES:
+        return True
+    return isinstance(error, (ConnectionError, httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError))
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Full-jitter exponential backoff: a random delay up to base * 2**attempt, at most cap."""
+    if base is None:
+        base = get_setting('retry_base_delay')
+    if cap is None:
+        cap = get_setting('retry_max_delay')
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def slots_dir(host=None):
+    """Slot directory shared by every process talking to host."""
+    directory = get_setting('throttle_dir') or SLOTS_DIR
+    name = hashlib.sha256((host or 'default').encode()).hexdigest()[:12]
+    return os.path.join(directory, name)
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle(host=None):
+    """Return the process-wide Throttle for host, built from the current settings."""
+    key = (host, get_setting('throttle_slots'), get_setting('throttle_timeout'), get_setting('throttle_dir'))
+    with _throttles_lock:
+        throttle = _throttles.get(key)
+        if throttle is None:
+            throttle = _throttles[key] = Throttle(key[1], slots_dir(host), key[2])
+        return throttle
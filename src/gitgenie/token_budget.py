@@ -0,0 +1,254 @@
+"""Prompt sizing: token counts, context windows and packing diffs into a budget.
+
+Token counts come from estimate_tokens() unless `tokenizer` is set to
+"tiktoken" and tiktoken is installed. Context windows come from the model name
+(MODEL_CONTEXT_LIMITS, overridable with `context_limits`), capped at
+`max_context` because that is the largest num_ctx gitgenie asks Ollama for.
+"""
+import re
+import threading
+
+from .config import get_setting
+from .diff_parser import estimate_tokens, file_diff_path, split_diff_by_file, split_file_hunks
+
+# Context windows of common model families, by the name before the ":tag".
+MODEL_CONTEXT_LIMITS = {
+    'llama2': 4096,
+    'llama3': 8192,
+    'llama3.1': 131072,
+    'llama3.2': 131072,
+    'llama3.3': 131072,
+    'codellama': 16384,
+    'mistral': 32768,
+    'mixtral': 32768,
+    'gemma': 8192,
+    'gemma2': 8192,
+    'phi3': 4096,
+    'qwen2.5': 32768,
+    'qwen2.5-coder': 32768,
+    'deepseek-coder': 16384,
+    'deepseek-coder-v2': 131072,
+    'starcoder2': 16384,
+}
+
+# Tokens kept free for chat formatting and estimation error.
+RESERVED_TOKENS = 64
+
+SIGNATURE_PATTERN = re.compile(
+    r'^\s*(?:export\s+|pub(?:\([^)]*\))?\s+|public\s+|private\s+|protected\s+|static\s+|async\s+)*'
+    r'(?:def|class|function|func|fn|interface|struct|enum|trait|impl|module)\b'
+)
+HUNK_CONTEXT = re.compile(r'^@@ [^@]* @@ ?(.*)$')
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _tiktoken_encoding():
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception:
+                _encoding = False
+        return _encoding or None
+
+
+def count_tokens(text):
+    """Token count for text, with tiktoken if configured and installed, else the heuristic."""
+    if not text:
+        return 0
+    if get_setting('tokenizer') == 'tiktoken':
+        encoding = _tiktoken_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+
+def context_limit(model):
+    """Context window of model in tokens, capped at max_context."""
+    limits = dict(MODEL_CONTEXT_LIMITS)
+    overrides = get_setting('context_limits')
+    if isinstance(overrides, dict):
+        limits.update(overrides)
+    name = model.split('/')[-1].lower()
+    limit = limits.get(name) or limits.get(name.split(':', 1)[0])
+    max_context = get_setting('max_context')
+    return min(limit, max_context) if limit else max_context
+
+
+def context_window(task=None):
+    """Smallest context window among the models that may serve task.
+
+    Prompts built for this window fit whichever backend the router picks.
+    """
+    specs = get_setting('backends') or [{'model': get_setting('model')}]
+    limits = [
+        spec.get('context_window') or context_limit(spec.get('model') or get_setting('model'))
+        for spec in specs
+        if task is None or not spec.get('tasks') or task in spec['tasks']
+    ]
+    return min(limits) if limits else context_limit(get_setting('model'))
+
+
+def prompt_budget(template, num_predict=None, task=None):
+    """Tokens left for the variable part of template once the output is accounted for."""
+    output = num_predict or 512
+    return max(0, context_window(task) - count_tokens(template) - output - RESERVED_TOKENS)
+
+
+class Packing:
+    """What went into a prompt section and what was left out to fit the budget."""
+
+    def __init__(self, text, budget, sections, total_hunks=0, omitted_hunks=0, omitted_lines=0):
+        self.text = text
+        self.budget = budget
+        self.tokens = count_tokens(text)
+        self.sections = sections
+        self.total_hunks = total_hunks
+        self.omitted_hunks = omitted_hunks
+        self.omitted_lines = omitted_lines
+
+    @property
+    def complete(self):
+        return not self.omitted_hunks and not self.omitted_lines
+
+    def summary(self):
+        """One-line human summary, e.g. for the CLI."""
+        text = f"{self.tokens}/{self.budget} tokens: {', '.join(self.sections)}"
+        if self.omitted_hunks:
+            text += f" ({self.omitted_hunks} of {self.total_hunks} hunks omitted)"
+        if self.omitted_lines:
+            text += f" ({self.omitted_lines} lines omitted)"
+        return text
+
+    def to_dict(self):
+        return {
+            'budget': self.budget,
+            'tokens': self.tokens,
+            'sections': list(self.sections),
+            'total_hunks': self.total_hunks,
+            'omitted_hunks': self.omitted_hunks,
+            'omitted_lines': self.omitted_lines,
+        }
+
+
+def fit_text(text, budget, name='text'):
+    """Keep whole lines of text from the top until budget, noting how many were dropped."""
+    if count_tokens(text) <= budget:
+        return Packing(text, budget, [name])
+    lines = text.splitlines(keepends=True)
+    kept = []
+    used = count_tokens('... (000000 more lines omitted)\n')
+    for line in lines:
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    omitted = len(lines) - len(kept)
+    kept.append(f"... ({omitted} more lines omitted)\n")
+    return Packing(''.join(kept), budget, [f'{name} (truncated)'], omitted_lines=omitted)
+
+
+def _hunk_stats(hunk):
+    added = removed = 0
+    for line in hunk.splitlines()[1:]:
+        if line.startswith('+'):
+            added += 1
+        elif line.startswith('-'):
+            removed += 1
+    return added, removed
+
+
+def _hunk_signatures(hunk):
+    """Definitions a hunk touches: its @@ context line and changed lines that declare something."""
+    signatures = []
+    match = HUNK_CONTEXT.match(hunk.split('\n', 1)[0])
+    if match and match.group(1).strip():
+        signatures.append(match.group(1).strip())
+    for line in hunk.splitlines()[1:]:
+        if line[:1] in ('+', '-') and SIGNATURE_PATTERN.match(line[1:]):
+            signatures.append(f"{line[0]}{line[1:].strip()}")
+    return [s[:120] for s in signatures]
+
+
+def pack_diff(diff, budget, overview=True):
+    """Fit a diff into budget tokens, most useful parts first.
+
+    A diff that fits is returned unchanged. Otherwise the packed text has, in
+    order of priority: per-file line counts, the signatures of changed
+    definitions, and then as many hunks as fit, largest changes first (shown
+    in their original order under their file headers). overview=False leaves
+    out the counts and signatures, for callers that describe those already.
+    """
+    if count_tokens(diff) <= budget:
+        return Packing(diff, budget, ['diff'])
+
+    files = []
+    for file_diff in split_diff_by_file(diff):
+        header, hunks = split_file_hunks(file_diff)
+        files.append((file_diff_path(file_diff), header, hunks))
+    total_hunks = sum(len(hunks) for _, _, hunks in files)
+
+    sections = []
+    parts = []
+    remaining = budget - count_tokens('# 000000 of 000000 hunks omitted to fit the context window\n')
+
+    stats_lines = ['Changed files:\n']
+    signature_lines = []
+    for path, _, hunks in files:
+        added = removed = 0
+        signatures = []
+        for hunk in hunks:
+            a, r = _hunk_stats(hunk)
+            added += a
+            removed += r
+            signatures.extend(s for s in _hunk_signatures(hunk) if s not in signatures)
+        stats_lines.append(f"  {path} (+{added} -{removed})\n")
+        if signatures:
+            signature_lines.append(f"  {path}: {'; '.join(signatures)}\n")
+
+    for name, lines in (('stats', stats_lines), ('signatures', ['Changed definitions:\n'] + signature_lines)):
+        if len(lines) < 2 or not overview:
+            continue
+        section = fit_text(''.join(lines), remaining, name)
+        if section.tokens > remaining:
+            continue
+        parts.append(section.text)
+        sections.extend(section.sections)
+        remaining -= section.tokens
+
+    ranked = []
+    for file_index, (path, header, hunks) in enumerate(files):
+        for hunk_index, hunk in enumerate(hunks):
+            added, removed = _hunk_stats(hunk)
+            score = added + removed + 5 * len(_hunk_signatures(hunk))
+            ranked.append((-score, file_index, hunk_index))
+    ranked.sort()
+
+    chosen = set()
+    headers_used = set()
+    for _, file_index, hunk_index in ranked:
+        header = files[file_index][1]
+        cost = count_tokens(files[file_index][2][hunk_index])
+        if file_index not in headers_used:
+            cost += count_tokens(header)
+        if cost > remaining:
+            continue
+        chosen.add((file_index, hunk_index))
+        headers_used.add(file_index)
+        remaining -= cost
+
+    for file_index, (path, header, hunks) in enumerate(files):
+        if file_index in headers_used:
+            parts.append(header + ''.join(h for i, h in enumerate(hunks) if (file_index, i) in chosen))
+    if chosen:
+        sections.append(f'{len(chosen)} hunks')
+    omitted = total_hunks - len(chosen)
+    if omitted:
+        parts.append(f"# {omitted} of {total_hunks} hunks omitted to fit the context window\n")
+    return Packing(''.join(parts), budget, sections, total_hunks, omitted)
@@ -0,0 +1,25 @@
+import pytest
+from gitgenie.config import reset_config
+from gitgenie.git_utils import reset_sessions
+from gitgenie.llm_client import reset_client
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(monkeypatch, tmp_path):
+    """Keep tests away from the user's config file and the repository cache, and retry without waiting.
+
+    Commits made with the git CLI need an identity even where no user.name is configured.
+    """
+    monkeypatch.setenv('GITGENIE_CONFIG', str(tmp_path / 'no-config.json'))
+    monkeypatch.setenv('GITGENIE_CACHE_ENABLED', '0')
+    monkeypatch.setenv('GITGENIE_RETRY_BASE_DELAY', '0')
+    for role in ('AUTHOR', 'COMMITTER'):
+        monkeypatch.setenv(f'GIT_{role}_NAME', 'Test User')
+        monkeypatch.setenv(f'GIT_{role}_EMAIL', 'test@example.com')
+    reset_config()
+    reset_client()
+    reset_sessions()
+    yield
+    reset_config()
+    reset_client()
+    reset_sessions()
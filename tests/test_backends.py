@@ -0,0 +1,249 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gitgenie.backends import Backend, OpenAIBackend, Router, build_router, make_backend
+from gitgenie.config import reset_config
+from gitgenie.llm_client import LLMClient, generate_text, get_client
+
+
+class _StubServer:
+    """Minimal local model server: OpenAI SSE on /v1/chat/completions, Ollama NDJSON on /api/chat."""
+
+    def __init__(self, tokens=('feat', ': add', ' stub'), status=200):
+        self.tokens = tokens
+        self.status = status
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._send(200, 'application/json', b'{"data": []}')
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.requests.append((self.path, body))
+                if stub.status != 200:
+                    self._send(stub.status, 'application/json', b'{"error": "busy"}')
+                elif self.path == '/v1/chat/completions':
+                    events = [{'choices': [{'delta': {'content': token}}]} for token in stub.tokens]
+                    events.append({'choices': [], 'usage': {'prompt_tokens': 12, 'completion_tokens': 3}})
+                    data = ''.join(f'data: {json.dumps(e)}\n\n' for e in events) + 'data: [DONE]\n\n'
+                    self._send(200, 'text/event-stream', data.encode())
+                else:
+                    lines = [{'message': {'role': 'assistant', 'content': t}, 'done': False} for t in stub.tokens]
+                    lines.append({'message': {'role': 'assistant', 'content': ''}, 'done': True, 'eval_count': 3})
+                    self._send(200, 'application/x-ndjson', ''.join(json.dumps(l) + '\n' for l in lines).encode())
+
+            def _send(self, status, content_type, data):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = _StubServer()
+    yield server
+    server.close()
+
+
+def _closed_port_url():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{s.getsockname()[1]}'
+
+
+class _FakeBackend(Backend):
+    kind = 'fake'
+
+    def __init__(self, name, reply='ok', fail=False, first_token=0.1, partial=None, **kwargs):
+        super().__init__(model='fake', name=name, **kwargs)
+        self.reply = reply
+        self.fail = fail
+        self.first_token = first_token
+        self.partial = partial
+        self.calls = 0
+
+    def _stream(self, prompt, sink, options, stop_when, stats):
+        self.calls += 1
+        if self.partial:
+            stats['chunks'] += 1
+            sink.write(self.partial)
+            raise ValueError('connection dropped')
+        if self.fail:
+            raise ValueError('broken')
+        stats['time_to_first_token'] = self.first_token
+        return self.reply
+
+
+class TestOpenAIBackend:
+    """Test suite for OpenAI-compatible servers."""
+
+    def test_streams_from_server(self, stub):
+        """Test that SSE deltas are joined and usage is reported."""
+        backend = OpenAIBackend(model='qwen', host=stub.url)
+        text, stats = backend.generate_with_stats('prompt', echo=False, options={'num_predict': 10, 'num_ctx': 4096})
+
+        assert text == 'feat: add stub'
+        assert stats['eval_count'] == 3
+        assert stats['prompt_eval_count'] == 12
+        path, body = stub.requests[0]
+        assert path == '/v1/chat/completions'
+        assert body['model'] == 'qwen'
+        assert body['max_tokens'] == 10
+        assert 'num_ctx' not in body
+
+    def test_stop_when_ends_stream(self, stub):
+        """Test that stop_when stops reading the stream."""
+        backend = OpenAIBackend(host=stub.url)
+        assert backend.generate('prompt', echo=False, stop_when=lambda text: text.startswith('feat')) == 'feat'
+
+    def test_busy_server_is_retried(self, stub, monkeypatch):
+        """Test that a 503 counts as retryable."""
+        monkeypatch.setenv('GITGENIE_RETRY_ATTEMPTS', '1')
+        stub.status = 503
+        text, stats = OpenAIBackend(host=stub.url).generate_with_stats('prompt', echo=False)
+        assert text is None
+        assert stats['retries'] == 1
+        assert len(stub.requests) == 2
+
+    def test_warm_up(self, stub):
+        """Test that warm_up checks the server is reachable."""
+        assert OpenAIBackend(host=stub.url).warm_up() is True
+        assert OpenAIBackend(host=_closed_port_url(), connect_timeout=1).warm_up() is False
+
+
+class TestRouter:
+    """Test suite for routing and failover."""
+
+    def test_routes_by_task_and_prompt_size(self):
+        """Test that task and size limits pick the backend."""
+        small = _FakeBackend('small', reply='small', tasks=['commit'], max_prompt_tokens=100)
+        large = _FakeBackend('large', reply='large', min_prompt_tokens=101)
+        pr = _FakeBackend('pr', reply='pr', tasks=['pr'])
+        router = Router([small, large, pr])
+
+        assert router.generate('short diff', echo=False, task='commit') == 'small'
+        assert router.generate('x' * 2000, echo=False, task='commit') == 'large'
+        assert router.generate('short', echo=False, task='pr') == 'pr'
+
+    def test_prefers_lower_latency(self):
+        """Test that once measured, the faster backend is tried first."""
+        slow = _FakeBackend('slow', first_token=2.0)
+        fast = _FakeBackend('fast', first_token=0.1)
+        router = Router([slow, fast])
+        router.generate('p', echo=False)
+        router.generate('p', echo=False)
+
+        assert [b.name for b in router.candidates()] == ['fast', 'slow']
+
+    def test_latency_is_smoothed(self):
+        """Test the moving average of time to first token."""
+        backend = _FakeBackend('a')
+        router = Router([backend], smoothing=0.5)
+        router.record_success(backend, 1.0)
+        router.record_success(backend, 3.0)
+        assert router.latency['a'] == 2.0
+
+    def test_fails_over_and_cools_down(self):
+        """Test that a failing backend is skipped until its cooldown ends."""
+        broken = _FakeBackend('broken', fail=True)
+        spare = _FakeBackend('spare', reply='spare')
+        router = Router([broken, spare], cooldown=60)
+
+        assert router.generate('p', echo=False) == 'spare'
+        assert router.generate('p', echo=False) == 'spare'
+        assert broken.calls == 1
+        assert [b.name for b in router.candidates()] == ['spare', 'broken']
+
+    def test_all_backends_failing(self):
+        """Test that generation returns None when every backend fails."""
+        router = Router([_FakeBackend('a', fail=True), _FakeBackend('b', fail=True)])
+        assert router.generate('p', echo=False) is None
+
+    def test_no_failover_after_partial_output(self):
+        """Test that a backend failing mid-stream isn't followed by another backend's text in the same sink."""
+        written = []
+        broken = _FakeBackend('broken', partial='feat: ha')
+        spare = _FakeBackend('spare', reply='spare')
+        router = Router([broken, spare])
+
+        assert router.generate('p', sink=written.append) is None
+        assert written == ['feat: ha']
+        assert spare.calls == 0
+
+    def test_failover_between_real_servers(self, stub, monkeypatch):
+        """Test failing over from an unreachable Ollama host to an OpenAI-compatible server."""
+        monkeypatch.setenv('GITGENIE_RETRY_ATTEMPTS', '0')
+        router = Router([
+            LLMClient(host=_closed_port_url(), connect_timeout=1),
+            OpenAIBackend(host=stub.url),
+        ])
+        assert router.generate('prompt', echo=False) == 'feat: add stub'
+
+
+class TestConfiguredBackends:
+    """Test suite for building backends from the config file."""
+
+    def test_default_is_one_ollama_backend(self):
+        """Test that without a backends setting, the configured model and host are used."""
+        router = get_client()
+        assert len(router.backends) == 1
+        assert isinstance(router.backends[0], LLMClient)
+        assert router.backends[0].model == 'llama3'
+
+    def test_backends_from_config(self, stub, tmp_path, monkeypatch):
+        """Test that generate_text routes through the configured backends."""
+        config = tmp_path / 'config.json'
+        config.write_text(json.dumps({'backends': [
+            {'type': 'ollama', 'host': stub.url, 'model': 'small', 'tasks': ['commit']},
+            {'type': 'openai', 'host': stub.url, 'model': 'large', 'tasks': ['pr']},
+        ]}))
+        monkeypatch.setenv('GITGENIE_CONFIG', str(config))
+        reset_config()
+
+        assert generate_text('prompt', echo=False, task='commit') == 'feat: add stub'
+        assert generate_text('prompt', echo=False, task='pr') == 'feat: add stub'
+        assert [(path, body['model']) for path, body in stub.requests] == [
+            ('/api/chat', 'small'), ('/v1/chat/completions', 'large'),
+        ]
+
+    def test_backends_from_environment(self, monkeypatch):
+        """Test that GITGENIE_BACKENDS is read as JSON."""
+        monkeypatch.setenv('GITGENIE_BACKENDS', json.dumps([{'type': 'openai', 'host': 'http://gpu:8000', 'model': 'q'}]))
+        router = build_router()
+        assert [b.name for b in router.backends] == ['openai:q@http://gpu:8000']
+
+    def test_unknown_backend_type(self):
+        """Test that a typo in the backend type is reported."""
+        with pytest.raises(ValueError):
+            make_backend({'type': 'nope'})
+
+    def test_build_router_names(self):
+        """Test that backends get readable default names."""
+        router = build_router()
+        assert router.backends[0].name.startswith('ollama:llama3@')
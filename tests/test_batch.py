@@ -0,0 +1,148 @@
+import io
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from git import Repo
+
+from gitgenie.batch import commit_jobs, repo_jobs, run_batch
+from gitgenie.cli import main
+
+
+def _repo(path, staged=True):
+    path.mkdir()
+    repo = Repo.init(path, initial_branch='main')
+    (path / 'base.txt').write_text('base\n')
+    repo.index.add(['base.txt'])
+    repo.index.commit('Initial commit')
+    if staged:
+        (path / 'new.txt').write_text(f'{path.name}\n')
+        repo.index.add(['new.txt'])
+    return repo
+
+
+def _records(out):
+    return sorted((json.loads(line) for line in out.getvalue().splitlines()), key=lambda r: r['index'])
+
+
+class TestBatch:
+    """Test suite for non-interactive batch generation."""
+
+    def test_repo_jobs_write_one_line_each(self, tmp_path):
+        """Test that each repository gets a JSON line with its status and timings."""
+        _repo(tmp_path / 'one')
+        _repo(tmp_path / 'two', staged=False)
+        (tmp_path / 'plain').mkdir()
+        out = io.StringIO()
+        with patch('gitgenie.batch.generate_commit_message', return_value='feat: add file') as mock_generate:
+            counts = run_batch(repo_jobs([tmp_path / 'one', tmp_path / 'two', tmp_path / 'plain']), out)
+
+        assert counts == {'ok': 1, 'empty': 1, 'error': 1}
+        one, two, plain = _records(out)
+        assert one['status'] == 'ok'
+        assert one['message'] == 'feat: add file'
+        assert {'read_ms', 'queue_ms', 'generate_ms', 'latency_ms'} <= set(one)
+        assert two['status'] == 'empty'
+        assert plain['status'] == 'error'
+        assert '+one' in mock_generate.call_args[0][0]
+        assert mock_generate.call_args.kwargs['echo'] is False
+
+    def test_generation_failure_is_reported(self, tmp_path):
+        """Test that a failed generation is recorded instead of stopping the batch."""
+        _repo(tmp_path / 'one')
+        out = io.StringIO()
+        with patch('gitgenie.batch.generate_commit_message', side_effect=RuntimeError('boom')):
+            counts = run_batch(repo_jobs([tmp_path / 'one']), out)
+        assert counts['error'] == 1
+        assert _records(out)[0]['error'] == 'boom'
+
+    def test_model_concurrency_is_bounded(self, tmp_path):
+        """Test that no more than `concurrency` generations run at once."""
+        paths = []
+        for i in range(6):
+            _repo(tmp_path / f'repo{i}')
+            paths.append(tmp_path / f'repo{i}')
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def slow_generate(diff, **kwargs):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return 'chore: update'
+
+        with patch('gitgenie.batch.generate_commit_message', side_effect=slow_generate):
+            counts = run_batch(repo_jobs(paths), io.StringIO(), git_workers=6, concurrency=2)
+        assert counts['ok'] == 6
+        assert active[1] == 2
+
+    def test_chunk_summaries_count_towards_concurrency(self, tmp_path, monkeypatch):
+        """Test that chunked diffs don't put more than `concurrency` requests in flight."""
+        paths = []
+        for i in range(3):
+            repo = _repo(tmp_path / f'repo{i}')
+            for n in range(4):
+                (tmp_path / f'repo{i}' / f'file{n}.txt').write_text(f'line {n}\n' * 50)
+                repo.index.add([f'file{n}.txt'])
+            paths.append(tmp_path / f'repo{i}')
+        monkeypatch.setenv('GITGENIE_CHUNK_TOKEN_BUDGET', '200')
+        monkeypatch.setenv('GITGENIE_STRUCTURE_SUMMARY', '0')
+        monkeypatch.setenv('GITGENIE_CACHE_ENABLED', '0')
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def slow_generate(prompt, **kwargs):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return 'chore: update'
+
+        with patch('gitgenie.commit_analyzer.generate_text', side_effect=slow_generate) as mock_generate:
+            counts = run_batch(repo_jobs(paths), io.StringIO(), git_workers=3, concurrency=2)
+        assert counts['ok'] == 3
+        assert mock_generate.call_count > 6
+        assert active[1] <= 2
+
+    def test_commit_range_jobs(self, tmp_path):
+        """Test that --range style jobs generate from each commit's own diff."""
+        repo = _repo(tmp_path / 'repo', staged=False)
+        repo.git.checkout('-b', 'feature')
+        for i in range(3):
+            (tmp_path / 'repo' / f'file{i}.txt').write_text(f'content {i}\n')
+            repo.index.add([f'file{i}.txt'])
+            repo.index.commit(f'wip {i}')
+
+        jobs = commit_jobs('main..feature', repo=tmp_path / 'repo')
+        assert [job['original_message'] for job in jobs] == ['wip 2', 'wip 1', 'wip 0']
+        out = io.StringIO()
+        with patch('gitgenie.batch.generate_commit_message', side_effect=lambda diff, **kwargs: diff.split('\n')[0]):
+            run_batch(jobs, out)
+        records = _records(out)
+        assert [r['sha'] for r in records] == [job['sha'] for job in jobs]
+        assert 'file2.txt' in records[0]['message']
+
+    def test_commit_jobs_bad_range(self, tmp_path):
+        """Test that an unknown revision range returns None."""
+        _repo(tmp_path / 'repo', staged=False)
+        assert commit_jobs('nope..HEAD', repo=tmp_path / 'repo') is None
+
+    def test_cli_runs_outside_a_repository(self, tmp_path, monkeypatch):
+        """Test that `gitgenie batch` accepts repository paths from anywhere."""
+        _repo(tmp_path / 'one')
+        outside = tmp_path / 'outside'
+        outside.mkdir()
+        monkeypatch.chdir(outside)
+        with patch('gitgenie.cli._warm_up'), \
+                patch('gitgenie.batch.generate_commit_message', return_value='feat: add file'):
+            result = CliRunner().invoke(main, ['batch', str(tmp_path / 'one')])
+        assert result.exit_code == 0
+        assert json.loads(result.stdout.splitlines()[0])['status'] == 'ok'
+        assert '1 ok, 0 empty, 0 failed' in result.stderr
@@ -0,0 +1,115 @@
+import os
+import time
+from unittest.mock import patch
+from git import Repo
+from gitgenie.cache import ResponseCache, cache_key
+from gitgenie.commit_analyzer import generate_commit_message
+from gitgenie.pr_generator import generate_pr_description
+
+
+class TestCacheKey:
+    """Test suite for cache_key function."""
+
+    def test_same_parts_give_same_key(self):
+        """Test that keys are deterministic."""
+        assert cache_key('diff', 'llama3') == cache_key('diff', 'llama3')
+
+    def test_different_parts_give_different_keys(self):
+        """Test that any change in the parts changes the key."""
+        assert cache_key('diff', 'llama3') != cache_key('diff', 'mistral')
+        assert cache_key('ab', 'c') != cache_key('a', 'bc')
+
+
+class TestResponseCache:
+    """Test suite for ResponseCache class."""
+
+    def test_get_missing_key(self, tmp_path):
+        """Test that a missing key returns None."""
+        cache = ResponseCache(str(tmp_path / 'c' / 'cache.sqlite'))
+        assert cache.get('missing') is None
+
+    def test_set_and_get(self, tmp_path):
+        """Test that stored values can be read back."""
+        cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+        cache.set('key', 'feat: add thing')
+        assert cache.get('key') == 'feat: add thing'
+
+    def test_expired_entries_are_dropped(self, tmp_path):
+        """Test that entries older than max_age are not returned."""
+        cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_age=60)
+        with patch('gitgenie.cache.time.time', return_value=time.time() - 120):
+            cache.set('old', 'stale')
+        assert cache.get('old') is None
+
+    def test_size_eviction_drops_least_recently_used(self, tmp_path):
+        """Test that the cache stays under max_bytes by evicting old entries."""
+        cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_bytes=25)
+        now = time.time()
+        with patch('gitgenie.cache.time.time', return_value=now):
+            cache.set('a', 'x' * 10)
+        with patch('gitgenie.cache.time.time', return_value=now + 1):
+            cache.set('b', 'y' * 10)
+        with patch('gitgenie.cache.time.time', return_value=now + 2):
+            cache.get('a')
+        with patch('gitgenie.cache.time.time', return_value=now + 3):
+            cache.set('c', 'z' * 10)
+        assert cache.get('a') == 'x' * 10
+        assert cache.get('b') is None
+        assert cache.get('c') == 'z' * 10
+
+
+class TestGeneratorCaching:
+    """Test that generators reuse cached results inside a repository."""
+
+    def _repo(self, tmp_path, monkeypatch):
+        Repo.init(tmp_path)
+        monkeypatch.setenv('GITGENIE_CACHE_ENABLED', '1')
+        monkeypatch.chdir(tmp_path)
+
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_commit_message_is_cached(self, mock_generate, tmp_path, monkeypatch):
+        """Test that the same diff is only sent to the model once."""
+        self._repo(tmp_path, monkeypatch)
+        mock_generate.return_value = 'fix(core): handle empty input'
+
+        first = generate_commit_message('diff --git a/x b/x\n+y\n')
+        second = generate_commit_message('diff --git a/x b/x\n+y\n')
+
+        assert first == second == 'fix(core): handle empty input'
+        mock_generate.assert_called_once()
+        assert os.path.exists(tmp_path / '.git' / 'gitgenie' / 'cache.sqlite')
+
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_commit_message_skip_cache(self, mock_generate, tmp_path, monkeypatch):
+        """Test that use_cache=False always regenerates and stores the new result."""
+        self._repo(tmp_path, monkeypatch)
+        mock_generate.side_effect = ['feat: first', 'feat: second']
+
+        generate_commit_message('diff --git a/x b/x\n+y\n')
+        regenerated = generate_commit_message('diff --git a/x b/x\n+y\n', use_cache=False)
+
+        assert regenerated == 'feat: second'
+        assert generate_commit_message('diff --git a/x b/x\n+y\n') == 'feat: second'
+        assert mock_generate.call_count == 2
+
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_failed_generation_is_not_cached(self, mock_generate, tmp_path, monkeypatch):
+        """Test that a None result is not stored."""
+        self._repo(tmp_path, monkeypatch)
+        mock_generate.side_effect = [None, 'feat: works']
+
+        assert generate_commit_message('diff') is None
+        assert generate_commit_message('diff') == 'feat: works'
+
+    @patch('gitgenie.pr_generator.generate_text')
+    def test_pr_description_is_cached(self, mock_generate, tmp_path, monkeypatch):
+        """Test that the same commit range is only described once."""
+        self._repo(tmp_path, monkeypatch)
+        mock_generate.return_value = '# Title'
+        commits = [{'hash': 'abc1234', 'message': 'feat: thing'}]
+
+        generate_pr_description(commits)
+        generate_pr_description(commits)
+        generate_pr_description(commits, base_branch='develop')
+
+        assert mock_generate.call_count == 2
@@ -0,0 +1,81 @@
+import itertools
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch
+from gitgenie.candidates import CandidatePool
+
+
+class TestCandidatePool:
+    """Test suite for CandidatePool class."""
+
+    @patch('gitgenie.candidates.generate_commit_message')
+    def test_prefetch_keeps_count_in_flight(self, mock_generate):
+        """Test that prefetch starts `count` generations in the background."""
+        mock_generate.return_value = 'feat: x'
+        pool = CandidatePool('diff', 3)
+        pool.prefetch()
+        pool.take_all()
+        pool.close()
+
+        assert mock_generate.call_count == 3
+        kwargs = mock_generate.call_args[1]
+        assert kwargs['use_cache'] is False
+        assert kwargs['echo'] is False
+        assert kwargs['temperature'] == 0.8
+        seeds = {c[1]['seed'] for c in mock_generate.call_args_list}
+        assert len(seeds) == 3
+
+    @patch('gitgenie.candidates.generate_commit_message')
+    def test_next_skips_messages_already_seen(self, mock_generate):
+        """Test that next() does not offer a repeat of a shown message."""
+        counter = itertools.count()
+        lock = threading.Lock()
+
+        def generate(*args, **kwargs):
+            with lock:
+                n = next(counter)
+            return 'feat: first' if n == 0 else f'feat: candidate {n}'
+
+        mock_generate.side_effect = generate
+        pool = CandidatePool('diff', 2, max_workers=1)
+        pool.mark_seen('feat: first')
+
+        assert pool.next() == 'feat: candidate 1'
+        assert pool.next() == 'feat: candidate 2'
+        pool.close()
+
+    @patch('gitgenie.candidates.generate_commit_message')
+    def test_next_returns_none_when_every_candidate_fails(self, mock_generate):
+        """Test that next() reports failure when no candidate could be generated."""
+        mock_generate.return_value = None
+        pool = CandidatePool('diff', 2)
+
+        assert pool.next() is None
+        pool.close()
+
+    @patch('gitgenie.candidates.generate_commit_message')
+    def test_take_all_returns_distinct_candidates(self, mock_generate):
+        """Test that take_all waits for every candidate and drops duplicates."""
+        mock_generate.side_effect = ['feat: a', 'feat: a', 'feat: b']
+        pool = CandidatePool('diff', 3, max_workers=1)
+
+        assert pool.take_all() == ['feat: a', 'feat: b']
+        pool.close()
+
+    def test_close_does_not_hold_up_exit(self):
+        """Test that a process exits without waiting for candidates still being generated."""
+        script = (
+            'import time\n'
+            'from unittest.mock import patch\n'
+            'from gitgenie.candidates import CandidatePool\n'
+            'with patch("gitgenie.candidates.generate_commit_message", side_effect=lambda *a, **k: time.sleep(5)):\n'
+            '    pool = CandidatePool("diff", 2)\n'
+            '    pool.prefetch()\n'
+            '    time.sleep(0.2)\n'
+            '    pool.close()\n'
+        )
+        start = time.monotonic()
+        subprocess.run([sys.executable, '-c', script], check=True, timeout=30)
+        assert time.monotonic() - start < 4
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+# Cumulative import time allowed for gitgenie.cli, in microseconds. Importing
+# GitPython and the ollama client alone takes several times this.
+IMPORT_BUDGET_US = 250_000
+
+HEAVY_MODULES = ('git', 'ollama', 'httpx', 'gitgenie.commit_analyzer', 'gitgenie.llm_client')
+
+
+def _run_python(code, *flags):
+    return subprocess.run(
+        [sys.executable, *flags, '-c', code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+    )
+
+
+class TestCliStartup:
+    """Keep `gitgenie --help` fast by not importing heavy modules up front."""
+
+    def test_help_does_not_import_heavy_modules(self):
+        """Test that --help runs without GitPython or the ollama client."""
+        code = (
+            "import sys\n"
+            "from gitgenie.cli import main\n"
+            "try:\n"
+            "    main(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            f"print('LOADED:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+        )
+        loaded = _run_python(code).stdout.decode().strip().splitlines()[-1]
+        assert loaded == 'LOADED:'
+
+    def test_import_time_within_budget(self):
+        """Test that importing gitgenie.cli stays under the import-time budget."""
+        stderr = _run_python('import gitgenie.cli', '-X', 'importtime').stderr.decode()
+        for line in stderr.splitlines():
+            fields = [field.strip() for field in line.split('|')]
+            if len(fields) == 3 and fields[2] == 'gitgenie.cli':
+                assert int(fields[1]) < IMPORT_BUDGET_US
+                return
+        assert False, 'gitgenie.cli not found in -X importtime output'
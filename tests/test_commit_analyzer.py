@@ -0,0 +1,120 @@
+from git import Repo
+from unittest.mock import patch
+from gitgenie.commit_analyzer import (
+    extract_commit_message, generate_commit_message, is_subject_complete, summarize_chunks,
+)
+
+
+def _big_diff(files=4, lines=50):
+    diff = ''
+    for i in range(files):
+        diff += f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n"
+        diff += f"@@ -1,0 +1,{lines} @@\n" + ''.join(f"+line {n} of file {i}\n" for n in range(lines))
+    return diff
+
+
+class TestGenerateCommitMessage:
+    """Test suite for generate_commit_message function."""
+
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_small_diff_uses_single_prompt(self, mock_generate):
+        """Test that a small diff is sent to the model in one prompt."""
+        mock_generate.return_value = 'feat(app): add thing'
+
+        result = generate_commit_message('diff --git a/a b/a\n+x\n', max_tokens=1000)
+
+        assert result == 'feat(app): add thing'
+        mock_generate.assert_called_once()
+        assert '+x' in mock_generate.call_args[0][0]
+
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_large_diff_is_summarized_then_combined(self, mock_generate):
+        """Test that a large diff is summarized per chunk before the final message."""
+        mock_generate.side_effect = lambda prompt, echo=True, **kwargs: (
+            '- changed a file' if not echo else 'refactor(core): reorganize modules'
+        )
+
+        result = generate_commit_message(_big_diff(), max_tokens=300, max_workers=2)
+
+        assert result == 'refactor(core): reorganize modules'
+        silent_calls = [c for c in mock_generate.call_args_list if c[1].get('echo') is False]
+        assert len(silent_calls) > 1
+        final_prompt = mock_generate.call_args_list[-1][0][0]
+        assert '- changed a file' in final_prompt
+        assert 'line 0 of file 0' not in final_prompt
+
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_large_diff_fails_if_a_chunk_fails(self, mock_generate):
+        """Test that a failed chunk summary makes the whole generation fail."""
+        mock_generate.return_value = None
+
+        assert generate_commit_message(_big_diff(), max_tokens=300) is None
+
+
+class TestSummarizeChunks:
+    """Test suite for summarize_chunks function."""
+
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_summaries_keep_chunk_order(self, mock_generate):
+        """Test that summaries come back in the same order as the chunks."""
+        mock_generate.side_effect = lambda prompt, echo=True, **kwargs: prompt.rsplit('\n', 3)[-3]
+
+        chunks = [f'chunk-{i}' for i in range(8)]
+        summaries = summarize_chunks(chunks, max_workers=4)
+
+        assert summaries == chunks
+
+    def test_no_cache_resummarizes_chunks(self, tmp_path, monkeypatch):
+        """Test that use_cache=False generates chunk summaries again instead of reusing cached ones."""
+        Repo.init(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GITGENIE_CACHE_ENABLED', '1')
+        with patch('gitgenie.commit_analyzer.generate_text', return_value='summary') as mock_generate:
+            summarize_chunks(['chunk-1', 'chunk-2'], max_workers=1)
+            summarize_chunks(['chunk-1', 'chunk-2'], max_workers=1)
+            assert mock_generate.call_count == 2
+            summarize_chunks(['chunk-1', 'chunk-2'], max_workers=1, use_cache=False)
+            assert mock_generate.call_count == 4
+
+    def test_regenerate_resummarizes_chunks(self, tmp_path, monkeypatch):
+        """Test that generate_commit_message passes use_cache on to the chunk summaries."""
+        Repo.init(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GITGENIE_CACHE_ENABLED', '1')
+        with patch('gitgenie.commit_analyzer.summarize_chunks', return_value=['summary']) as mock_summarize, \
+                patch('gitgenie.commit_analyzer.generate_text', return_value='feat: x'):
+            generate_commit_message(_big_diff(), max_tokens=300, use_cache=False, echo=False)
+        assert mock_summarize.call_args.args[2] is False
+
+
+class TestCommitMessageLimits:
+    """Test suite for bounded generation of commit messages."""
+
+    def test_is_subject_complete(self):
+        """Test that only a finished subject line counts as complete."""
+        assert not is_subject_complete('feat(api): add end')
+        assert is_subject_complete('feat(api): add endpoint\n')
+        assert is_subject_complete('Here is the message:\n\nfix: handle nulls\nExpl')
+        assert not is_subject_complete('Here is the message:\n')
+
+    def test_extract_commit_message_strips_preamble_and_fences(self):
+        """Test that the subject is pulled out of chatty output."""
+        text = 'Here is your commit message:\n\n```\nfix(db): close connections on error\n```\nThis fixes...'
+        assert extract_commit_message(text) == 'fix(db): close connections on error'
+
+    def test_extract_commit_message_without_conventional_line(self):
+        """Test that non-conventional output is returned without fences."""
+        assert extract_commit_message('```\nUpdate stuff\n```') == 'Update stuff'
+
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_generation_is_bounded(self, mock_generate):
+        """Test that commit generation sends limits and an early-stop check."""
+        mock_generate.return_value = 'feat(app): add thing\n'
+
+        result = generate_commit_message('diff --git a/a b/a\n+x\n', max_tokens=1000)
+
+        assert result == 'feat(app): add thing'
+        kwargs = mock_generate.call_args[1]
+        assert kwargs['options']['num_predict'] == 64
+        assert kwargs['options']['num_ctx'] == 2048
+        assert kwargs['stop_when'] is is_subject_complete
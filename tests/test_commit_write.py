@@ -0,0 +1,81 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+from git import Repo
+
+from gitgenie.git_utils import commit_with_message, get_staged_changes
+
+
+def _repo_with_staged_file(path):
+    repo = Repo.init(path)
+    (path / 'file.txt').write_text('hello\n')
+    repo.index.add(['file.txt'])
+    return repo
+
+
+def _install_hook(repo, name, script):
+    hook = os.path.join(repo.git_dir, 'hooks', name)
+    os.makedirs(os.path.dirname(hook), exist_ok=True)
+    with open(hook, 'w') as f:
+        f.write('#!/bin/sh\n' + script)
+    os.chmod(hook, 0o755)
+
+
+class TestCommitWithMessage:
+    """Test suite for writing commits."""
+
+    def test_native_commit_runs_hooks(self, tmp_path, monkeypatch):
+        """Test that the git backend commits the index and honours commit-msg hooks."""
+        repo = _repo_with_staged_file(tmp_path)
+        _install_hook(repo, 'commit-msg', 'printf "\\nReviewed-by: hook\\n" >> "$1"\n')
+        monkeypatch.chdir(tmp_path)
+
+        assert commit_with_message('feat: add file') is True
+        assert repo.head.commit.message == 'feat: add file\n\nReviewed-by: hook\n'
+        assert get_staged_changes() == ''
+
+    def test_rejected_by_hook(self, tmp_path, monkeypatch):
+        """Test that a failing pre-commit hook stops the commit instead of being bypassed."""
+        repo = _repo_with_staged_file(tmp_path)
+        _install_hook(repo, 'pre-commit', 'exit 1\n')
+        monkeypatch.chdir(tmp_path)
+
+        assert commit_with_message('feat: add file') is None
+        assert not repo.head.is_valid()
+
+    def test_multiline_message_is_kept(self, tmp_path, monkeypatch):
+        """Test that the message reaches git unchanged over stdin."""
+        repo = _repo_with_staged_file(tmp_path)
+        monkeypatch.chdir(tmp_path)
+
+        assert commit_with_message('feat: add file\n\nWith a body that mentions -m and "quotes".') is True
+        assert repo.head.commit.message == 'feat: add file\n\nWith a body that mentions -m and "quotes".\n'
+
+    def test_gitpython_backend(self, tmp_path, monkeypatch):
+        """Test that commit_backend=gitpython commits through GitPython instead of `git commit`."""
+        repo = _repo_with_staged_file(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GITGENIE_COMMIT_BACKEND', 'gitpython')
+
+        with patch('gitgenie.git_utils.subprocess.run', wraps=subprocess.run) as run:
+            assert commit_with_message('feat: add file') is True
+        run.assert_not_called()
+        assert repo.head.commit.message == 'feat: add file'
+
+    def test_falls_back_without_git(self, tmp_path, monkeypatch):
+        """Test that GitPython is used when the git executable can't be run."""
+        repo = _repo_with_staged_file(tmp_path)
+        monkeypatch.chdir(tmp_path)
+
+        with patch('gitgenie.git_utils.subprocess.run', side_effect=FileNotFoundError('git')) as run:
+            assert commit_with_message('feat: add file') is True
+        assert run.call_args[0][0][:2] == ['git', 'commit']
+        assert repo.head.commit.message == 'feat: add file'
+
+    def test_outside_repo(self, tmp_path, monkeypatch):
+        """Test that committing outside a repository returns None."""
+        monkeypatch.chdir(tmp_path)
+        with patch('gitgenie.git_utils.subprocess.run', wraps=subprocess.run) as run:
+            assert commit_with_message('feat: add file') is None
+        run.assert_not_called()
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from unittest.mock import patch
+from click.testing import CliRunner
+from git import Repo
+from gitgenie.cli import main
+from gitgenie.daemon import load_precomputed, precompute, run_daemon, save_precomputed
+from gitgenie.git_utils import get_staged_key
+
+
+def _staged_repo(tmp_path, monkeypatch):
+    repo = Repo.init(tmp_path)
+    (tmp_path / 'a.txt').write_text('a\n')
+    repo.index.add(['a.txt'])
+    monkeypatch.chdir(tmp_path)
+    return repo
+
+
+class TestPrecomputed:
+    """Test suite for saving and loading precomputed messages."""
+
+    def test_load_matches_current_index(self, tmp_path, monkeypatch):
+        """Test that a message saved for the current staged changes is returned."""
+        _staged_repo(tmp_path, monkeypatch)
+        save_precomputed(str(tmp_path / '.git'), get_staged_key(), 'feat: add a')
+
+        assert load_precomputed() == 'feat: add a'
+
+    def test_load_ignores_stale_key(self, tmp_path, monkeypatch):
+        """Test that restaging different content invalidates the message."""
+        repo = _staged_repo(tmp_path, monkeypatch)
+        save_precomputed(str(tmp_path / '.git'), get_staged_key(), 'feat: add a')
+
+        (tmp_path / 'b.txt').write_text('b\n')
+        repo.index.add(['b.txt'])
+
+        assert load_precomputed() is None
+
+    def test_load_without_file(self, tmp_path, monkeypatch):
+        """Test that nothing is returned before the daemon has run."""
+        _staged_repo(tmp_path, monkeypatch)
+        assert load_precomputed() is None
+
+    def test_staged_key_leaves_index_alone(self, tmp_path, monkeypatch):
+        """Test that the key is read without touching .git/index, even while another git holds its lock."""
+        _staged_repo(tmp_path, monkeypatch)
+        index = tmp_path / '.git' / 'index'
+        before = os.stat(index).st_mtime_ns
+        key = get_staged_key()
+        (tmp_path / '.git' / 'index.lock').write_text('')
+
+        assert get_staged_key() == key is not None
+        assert os.stat(index).st_mtime_ns == before
+
+    @patch('gitgenie.commit_analyzer.prepare_staged_diff')
+    def test_commit_uses_message_before_reading_diff(self, mock_prepare, tmp_path, monkeypatch):
+        """Test that `gitgenie commit` takes the daemon's message without preparing the diff."""
+        repo = _staged_repo(tmp_path, monkeypatch)
+        save_precomputed(str(tmp_path / '.git'), get_staged_key(), 'feat: add a')
+
+        result = CliRunner().invoke(main, ['commit'], input='c\n')
+
+        assert 'Using precomputed commit message:' in result.output
+        mock_prepare.assert_not_called()
+        assert repo.head.commit.message.strip() == 'feat: add a'
+
+    @patch('gitgenie.daemon.generate_commit_message', return_value='feat: add a')
+    def test_precompute_saves_message(self, mock_generate, tmp_path, monkeypatch):
+        """Test that precompute generates silently and saves for the staged changes."""
+        _staged_repo(tmp_path, monkeypatch)
+
+        key = precompute(str(tmp_path / '.git'))
+
+        assert key == get_staged_key()
+        assert mock_generate.call_args[1]['echo'] is False
+        assert load_precomputed() == 'feat: add a'
+
+
+class TestRunDaemon:
+    """Test suite for run_daemon function."""
+
+    @patch('gitgenie.daemon.generate_commit_message')
+    def test_daemon_regenerates_after_index_changes(self, mock_generate, tmp_path, monkeypatch):
+        """Test that the daemon picks up new staged changes after the debounce."""
+        repo = _staged_repo(tmp_path, monkeypatch)
+        mock_generate.side_effect = ['feat: add a', 'feat: add b']
+        stop = threading.Event()
+        thread = threading.Thread(target=run_daemon, kwargs={'interval': 0.02, 'debounce': 0.05, 'stop_event': stop})
+        thread.start()
+        try:
+            deadline = time.time() + 5
+            while load_precomputed() != 'feat: add a' and time.time() < deadline:
+                time.sleep(0.02)
+            assert load_precomputed() == 'feat: add a'
+
+            (tmp_path / 'b.txt').write_text('b\n')
+            repo.index.add(['b.txt'])
+            while load_precomputed() != 'feat: add b' and time.time() < deadline:
+                time.sleep(0.02)
+            assert load_precomputed() == 'feat: add b'
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+        assert mock_generate.call_count == 2
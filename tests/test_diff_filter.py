@@ -0,0 +1,119 @@
+import os
+from git import Repo
+from gitgenie.diff_filter import compact_diff, is_whitespace_only, matches_glob
+
+
+def _file(path, *hunks, header_extra=''):
+    return (
+        f"diff --git a/{path} b/{path}\n{header_extra}"
+        f"--- a/{path}\n+++ b/{path}\n" + ''.join(hunks)
+    )
+
+
+def _hunk(removed, added, start=1):
+    lines = ''.join(f"-{line}\n" for line in removed) + ''.join(f"+{line}\n" for line in added)
+    return f"@@ -{start},{len(removed)} +{start},{len(added)} @@\n" + lines
+
+
+class TestMatchesGlob:
+    """Test suite for matches_glob function."""
+
+    def test_basename_pattern_matches_anywhere(self):
+        """Test that patterns without a slash match the file name in any directory."""
+        assert matches_glob('web/package-lock.json', 'package-lock.json')
+        assert matches_glob('Cargo.lock', '*.lock')
+        assert not matches_glob('src/lock.py', '*.lock')
+
+    def test_directory_pattern_matches_nested(self):
+        """Test that directory patterns match at the root and below."""
+        assert matches_glob('vendor/lib/a.go', 'vendor/*')
+        assert matches_glob('services/api/vendor/b.go', 'vendor/*')
+        assert not matches_glob('src/vendors.py', 'vendor/*')
+
+
+class TestIsWhitespaceOnly:
+    """Test suite for is_whitespace_only function."""
+
+    def test_reindented_hunk(self):
+        """Test that re-indentation counts as whitespace only."""
+        assert is_whitespace_only(_hunk(['  x = 1'], ['    x = 1']))
+
+    def test_real_change(self):
+        """Test that a content change is kept."""
+        assert not is_whitespace_only(_hunk(['x = 1'], ['x = 2']))
+
+    def test_trailing_spaces_and_blank_lines(self):
+        """Test that trailing whitespace and added blank lines count as whitespace only."""
+        assert is_whitespace_only(_hunk(['x = 1  ', 'y = 2'], ['x = 1', '', 'y = 2']))
+
+    def test_merged_tokens_are_real_changes(self):
+        """Test that removing whitespace between tokens, or joining lines, is kept."""
+        assert not is_whitespace_only(_hunk(['foo bar'], ['foobar']))
+        assert not is_whitespace_only(_hunk(['    return a'], ['    returna']))
+        assert not is_whitespace_only(_hunk(['x = a', '+b'], ['x = a+b']))
+
+
+class TestCompactDiff:
+    """Test suite for compact_diff function."""
+
+    def test_excluded_files_are_omitted_and_listed(self):
+        """Test that lockfiles are dropped but still mentioned."""
+        diff = _file('src/app.py', _hunk([], ['print(1)'])) + _file('package-lock.json', _hunk([], ['{}'] * 50))
+        result = compact_diff(diff, use_gitattributes=False)
+        assert '+print(1)' in result.diff
+        assert '+{}' not in result.diff
+        assert result.omitted == [('package-lock.json', 'excluded by package-lock.json')]
+        assert 'package-lock.json' in result.diff
+        assert result.tokens_saved > 0
+
+    def test_binary_files_are_omitted(self):
+        """Test that binary file stubs are dropped."""
+        diff = "diff --git a/logo.png b/logo.png\nindex 1..2 100644\nBinary files a/logo.png and b/logo.png differ\n"
+        result = compact_diff(diff, exclude=[], use_gitattributes=False)
+        assert result.omitted == [('logo.png', 'binary')]
+
+    def test_whitespace_hunks_are_dropped(self):
+        """Test that whitespace-only hunks are removed and real ones kept."""
+        diff = _file('a.py', _hunk(['  x'], ['    x'], start=1), _hunk(['y = 1'], ['y = 2'], start=20))
+        result = compact_diff(diff, exclude=[], use_gitattributes=False)
+        assert '+    x' not in result.diff
+        assert '+y = 2' in result.diff
+
+    def test_repeated_hunks_are_collapsed(self):
+        """Test that a mass replace keeps one representative plus a count."""
+        diff = ''.join(_file(f'm{i}.py', _hunk(['import old_name'], ['import new_name'])) for i in range(10))
+        result = compact_diff(diff, exclude=[], use_gitattributes=False, collapse_threshold=3)
+        assert result.diff.count('+import new_name') == 1
+        assert 'repeated in 9 more hunks' in result.diff
+        assert result.collapsed == 9
+
+    def test_mass_renames_are_collapsed(self):
+        """Test that many pure renames collapse into one representative."""
+        diff = ''.join(
+            f"diff --git a/old{i}.py b/new{i}.py\nsimilarity index 100%\nrename from old{i}.py\nrename to new{i}.py\n"
+            for i in range(5)
+        )
+        result = compact_diff(diff, exclude=[], use_gitattributes=False, collapse_threshold=3)
+        assert result.diff.count('rename to') == 1
+        assert '4 more renamed files' in result.diff
+
+    def test_collapse_below_threshold_keeps_everything(self):
+        """Test that changes repeated fewer times than the threshold are kept."""
+        diff = ''.join(_file(f'm{i}.py', _hunk(['a'], ['b'])) for i in range(2))
+        result = compact_diff(diff, exclude=[], use_gitattributes=False, collapse_threshold=3)
+        assert result.diff == diff
+        assert result.tokens_saved == 0
+
+    def test_linguist_generated_files_are_omitted(self, tmp_path):
+        """Test that .gitattributes linguist-generated files are dropped."""
+        Repo.init(tmp_path)
+        (tmp_path / '.gitattributes').write_text('gen/** linguist-generated\n')
+        diff = _file('gen/api.py', _hunk([], ['x'])) + _file('src/main.py', _hunk([], ['y']))
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            result = compact_diff(diff, exclude=[])
+        finally:
+            os.chdir(original_dir)
+        assert result.omitted == [('gen/api.py', 'generated')]
+        assert '+y' in result.diff
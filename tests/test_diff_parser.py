@@ -0,0 +1,99 @@
+from gitgenie.diff_parser import (
+    chunk_diff, estimate_tokens, iter_diff_records, split_diff_by_file, split_file_hunks,
+)
+
+
+def _file_diff(name, hunks):
+    header = (
+        f"diff --git a/{name} b/{name}\n"
+        f"--- a/{name}\n"
+        f"+++ b/{name}\n"
+    )
+    return header + ''.join(hunks)
+
+
+def _hunk(start, lines):
+    body = ''.join(f"+{line}\n" for line in lines)
+    return f"@@ -{start},0 +{start},{len(lines)} @@\n" + body
+
+
+class TestSplitDiff:
+    """Test suite for splitting diffs into files and hunks."""
+
+    def test_split_diff_by_file(self):
+        """Test that each file in a diff becomes its own entry."""
+        diff = _file_diff('a.py', [_hunk(1, ['a'])]) + _file_diff('b.py', [_hunk(1, ['b'])])
+        files = split_diff_by_file(diff)
+        assert len(files) == 2
+        assert files[0].startswith('diff --git a/a.py')
+        assert files[1].startswith('diff --git a/b.py')
+
+    def test_split_diff_by_file_empty(self):
+        """Test that an empty diff has no files."""
+        assert split_diff_by_file('') == []
+
+    def test_split_file_hunks(self):
+        """Test that a file diff is split into header and hunks."""
+        file_diff = _file_diff('a.py', [_hunk(1, ['one']), _hunk(10, ['two'])])
+        header, hunks = split_file_hunks(file_diff)
+        assert header.startswith('diff --git a/a.py')
+        assert '+++ b/a.py' in header
+        assert len(hunks) == 2
+        assert '+one' in hunks[0]
+        assert '+two' in hunks[1]
+
+
+class TestChunkDiff:
+    """Test suite for chunk_diff function."""
+
+    def test_small_diff_is_one_chunk(self):
+        """Test that a diff under the budget stays in one chunk."""
+        diff = _file_diff('a.py', [_hunk(1, ['a'])]) + _file_diff('b.py', [_hunk(1, ['b'])])
+        assert chunk_diff(diff, 1000) == [diff]
+
+    def test_files_are_packed_under_budget(self):
+        """Test that files are spread over chunks that respect the budget."""
+        diff = ''.join(_file_diff(f'f{i}.py', [_hunk(1, ['x' * 40] * 5)]) for i in range(10))
+        chunks = chunk_diff(diff, 150)
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 150 for chunk in chunks)
+        assert ''.join(chunks) == diff
+
+    def test_large_file_is_split_per_hunk_with_header(self):
+        """Test that an oversized file is split by hunk and keeps its header."""
+        hunks = [_hunk(i * 100, ['y' * 40] * 5) for i in range(6)]
+        diff = _file_diff('big.py', hunks)
+        chunks = chunk_diff(diff, 120)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.startswith('diff --git a/big.py')
+            assert estimate_tokens(chunk) <= 120
+
+    def test_oversized_hunk_is_split_by_lines(self):
+        """Test that a single hunk bigger than the budget is split by lines."""
+        diff = _file_diff('huge.py', [_hunk(1, ['z' * 40] * 100)])
+        chunks = chunk_diff(diff, 200)
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+        assert sum(chunk.count('+' + 'z' * 40) for chunk in chunks) == 100
+
+
+class TestIterDiffRecords:
+    """Test suite for iter_diff_records function."""
+
+    def test_records_for_files_and_hunks(self):
+        """Test that a diff is parsed into file and hunk records with paths."""
+        diff = _file_diff('a.py', [_hunk(1, ['x']), _hunk(9, ['y'])]) + _file_diff('b.py', [_hunk(1, ['z'])])
+        records = list(iter_diff_records(diff.splitlines(keepends=True)))
+        assert [(r.kind, r.path) for r in records] == [
+            ('file', 'a.py'), ('hunk', 'a.py'), ('hunk', 'a.py'), ('file', 'b.py'), ('hunk', 'b.py'),
+        ]
+        assert ''.join(r.text for r in records) == diff
+
+    def test_large_hunk_is_split_into_pieces(self):
+        """Test that no record grows past max_record_chars."""
+        diff = _file_diff('big.py', [_hunk(1, ['w' * 50] * 100)])
+        records = list(iter_diff_records(diff.splitlines(keepends=True), max_record_chars=500))
+        assert all(len(r.text) <= 500 for r in records)
+        assert all(r.path == 'big.py' for r in records)
+        assert ''.join(r.text for r in records) == diff
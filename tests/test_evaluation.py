@@ -0,0 +1,188 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+from git import Repo
+
+from gitgenie.cli import main
+from gitgenie.config import get_setting, override_settings
+from gitgenie.evaluation import Report, load_variants, score_message, summarize
+from gitgenie.llm_client import get_client
+
+MESSAGES = ['feat(parser): add parser', 'fix(parser): handle empty input', 'Update readme']
+
+
+def _history(tmp_path, monkeypatch):
+    repo = Repo.init(tmp_path)
+    for i, message in enumerate(MESSAGES):
+        (tmp_path / f'file_{i}.py').write_text(f'value = {i}\n')
+        repo.index.add([f'file_{i}.py'])
+        repo.index.commit(message)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('GITGENIE_WARM_UP', '0')
+    return repo
+
+
+def _fake_chat(**kwargs):
+    """Stream a reply that names the model, with Ollama's token counts on the last chunk."""
+    reply = 'feat(parser): add parser' if kwargs['model'] == 'llama3' else 'chore: update files'
+    return [
+        {'message': {'content': reply}},
+        {'message': {'content': ''}, 'done': True, 'prompt_eval_count': 321, 'eval_count': 9},
+    ]
+
+
+class TestScoring:
+    """Test suite for scoring generated messages against the originals."""
+
+    def test_exact_match(self):
+        """Test a generated message identical to the original."""
+        assert score_message('feat(parser): add parser', 'feat(parser): add parser\n\nBody.') == {
+            'type_match': True, 'scope_match': True, 'length_ok': True, 'similarity': 1.0,
+        }
+
+    def test_mismatches(self):
+        """Test type and scope mismatches, overlong subjects and partial similarity."""
+        scores = score_message('fix: ' + 'x' * 80, 'feat(api): add things')
+        assert scores['type_match'] is False
+        assert scores['scope_match'] is False
+        assert scores['length_ok'] is False
+        assert 0 <= scores['similarity'] < 0.5
+
+    def test_non_conventional_original(self):
+        """Test that type and scope aren't scored against free-form messages."""
+        scores = score_message('docs(readme): update readme', 'Update readme')
+        assert scores['type_match'] is None and scores['scope_match'] is None
+        assert scores['similarity'] > 0.5
+
+    def test_summarize(self):
+        """Test per-variant rates and latency percentiles."""
+        records = [
+            {'variant': 'a', 'status': 'ok', 'latency_ms': 100.0, 'type_match': True, 'scope_match': None,
+             'length_ok': True, 'similarity': 1.0, 'prompt_tokens': 10, 'generated_tokens': 5},
+            {'variant': 'a', 'status': 'ok', 'latency_ms': 300.0, 'type_match': False, 'scope_match': None,
+             'length_ok': True, 'similarity': 0.5, 'prompt_tokens': 30, 'generated_tokens': 5},
+            {'variant': 'a', 'status': 'error', 'latency_ms': 5.0},
+        ]
+        [summary] = summarize(records)
+        assert summary['commits'] == 3 and summary['errors'] == 1
+        assert summary['latency_p50_ms'] == 300.0
+        assert summary['type_match'] == 0.5
+        assert summary['scope_match'] is None
+        assert summary['similarity'] == 0.75
+        assert summary['prompt_tokens'] == 20
+
+
+class TestVariants:
+    """Test suite for variants and setting overrides."""
+
+    def test_load_variants(self, tmp_path, monkeypatch):
+        """Test variants from a file, from the setting, and the default."""
+        assert load_variants() == [{'name': 'default'}]
+        path = tmp_path / 'variants.json'
+        path.write_text(json.dumps([{'name': 'small', 'model': 'phi3'}]))
+        assert load_variants(str(path)) == [{'name': 'small', 'model': 'phi3'}]
+
+    def test_invalid_variants(self, tmp_path):
+        """Test that unnamed, duplicate and misspelt variants are rejected."""
+        path = tmp_path / 'variants.json'
+        for variants in ([{'model': 'phi3'}], [{'name': 'a'}, {'name': 'a'}], [{'name': 'a', 'modle': 'phi3'}]):
+            path.write_text(json.dumps(variants))
+            with pytest.raises(ValueError):
+                load_variants(str(path))
+
+    def test_overrides_are_scoped(self):
+        """Test that overrides apply inside the block only and get their own client."""
+        default_client = get_client()
+        with override_settings(model='phi3'):
+            assert get_setting('model') == 'phi3'
+            assert get_client() is not default_client
+            assert get_client().backends[0].model == 'phi3'
+        assert get_setting('model') == 'llama3'
+        assert get_client() is default_client
+
+
+class TestEvalCommand:
+    """Test suite for `gitgenie eval`."""
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_replays_history_per_variant(self, mock_client, tmp_path, monkeypatch):
+        """Test one scored record per commit and variant, with tokens from the model."""
+        _history(tmp_path, monkeypatch)
+        mock_client.return_value.chat.side_effect = _fake_chat
+        variants = tmp_path / 'variants.json'
+        variants.write_text(json.dumps([{'name': 'llama', 'model': 'llama3'}, {'name': 'phi', 'model': 'phi3'}]))
+        report = tmp_path / 'report.jsonl'
+
+        result = CliRunner().invoke(main, ['eval', '-n', '2', '--variants', str(variants), '-o', str(report)])
+
+        assert result.exit_code == 0, result.output
+        records = [json.loads(line) for line in report.read_text().splitlines()]
+        assert len(records) == 4
+        by_key = {(r['variant'], r['original']): r for r in records}
+        assert set(by_key) == {(v, m) for v in ('llama', 'phi') for m in MESSAGES[1:]}
+        hit = by_key[('llama', 'fix(parser): handle empty input')]
+        assert hit['message'] == 'feat(parser): add parser'
+        assert hit['type_match'] is False and hit['scope_match'] is True
+        assert hit['prompt_tokens'] == 321 and hit['generated_tokens'] == 9
+        assert by_key[('phi', 'Update readme')]['message'] == 'chore: update files'
+        assert 'variant' in result.output and 'llama' in result.output and 'phi' in result.output
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_resume_skips_finished_results(self, mock_client, tmp_path, monkeypatch):
+        """Test that a second run only does the work the first one didn't finish."""
+        _history(tmp_path, monkeypatch)
+        mock_client.return_value.chat.side_effect = _fake_chat
+        report = tmp_path / 'report.csv'
+
+        CliRunner().invoke(main, ['eval', '-n', '1', '-o', str(report)])
+        assert mock_client.return_value.chat.call_count == 1
+        result = CliRunner().invoke(main, ['eval', '-n', '3', '-o', str(report)])
+
+        assert 'Resuming: 1 results already in' in result.output
+        assert mock_client.return_value.chat.call_count == 3
+        records = Report(str(report)).load()
+        assert len(records) == 3
+        assert all(r['length_ok'] is True and r['prompt_tokens'] == 321.0 for r in records)
+
+        CliRunner().invoke(main, ['eval', '-n', '3', '-o', str(report), '--fresh'])
+        assert mock_client.return_value.chat.call_count == 6
+        assert len(report.read_text().splitlines()) == 4  # header + 3 rows
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_variants_change_diff_and_prompt(self, mock_client, tmp_path, monkeypatch):
+        """Test that structure_summary and commit_prompt variants reach the replayed pipeline."""
+        repo = _history(tmp_path, monkeypatch)
+        (tmp_path / 'engine.py').write_text(''.join(f'def step_{i}(x):\n    return x + {i}\n\n' for i in range(400)))
+        repo.index.add(['engine.py'])
+        repo.index.commit('feat(engine): add steps')
+        mock_client.return_value.chat.side_effect = _fake_chat
+        variants = tmp_path / 'variants.json'
+        variants.write_text(json.dumps([
+            {'name': 'raw', 'structure_summary': False},
+            {'name': 'summary', 'structure_summary': True},
+            {'name': 'terse', 'commit_prompt': 'TERSE PROMPT\n{diff}'},
+        ]))
+        report = tmp_path / 'report.jsonl'
+
+        CliRunner().invoke(main, ['eval', '-n', '1', '--variants', str(variants), '-o', str(report), '--concurrency', '1'])
+
+        tokens = {r['variant']: r['diff_tokens'] for r in map(json.loads, report.read_text().splitlines())}
+        assert tokens['summary'] < tokens['raw']
+        prompts = [call.kwargs['messages'][0]['content'] for call in mock_client.return_value.chat.call_args_list]
+        assert sum(prompt.startswith('TERSE PROMPT\n') for prompt in prompts) == 1
+        assert sum('Change summary (1 files, ' in prompt for prompt in prompts) == 2  # summary and terse
+
+    def test_failures_are_recorded_and_retried(self, tmp_path, monkeypatch):
+        """Test that failed generations are reported and run again on resume."""
+        _history(tmp_path, monkeypatch)
+        report = tmp_path / 'report.jsonl'
+        with patch('gitgenie.evaluation.generate_commit_message', return_value=None):
+            CliRunner().invoke(main, ['eval', '-n', '1', '-o', str(report)])
+        assert json.loads(report.read_text())['status'] == 'error'
+
+        with patch('gitgenie.evaluation.generate_commit_message', return_value='docs: update readme') as mock_generate:
+            CliRunner().invoke(main, ['eval', '-n', '1', '-o', str(report)])
+        assert mock_generate.called
+        assert Report(str(report)).load()[0]['status'] == 'ok'
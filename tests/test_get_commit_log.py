@@ -0,0 +1,109 @@
+import os
+import types
+from git import Repo
+from gitgenie.git_utils import get_commit_log, iter_commit_log
+
+
+def _make_repo(tmp_path, feature_commits=3):
+    """Create a repo with one commit on main and some on a feature branch."""
+    repo = Repo.init(tmp_path, initial_branch='main')
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'Test Author')
+        config.set_value('user', 'email', 'test@example.com')
+    (tmp_path / 'base.txt').write_text('base')
+    repo.index.add(['base.txt'])
+    repo.index.commit('Initial commit')
+    repo.git.checkout('-b', 'feature')
+    for i in range(feature_commits):
+        (tmp_path / f'file{i}.txt').write_text(str(i))
+        repo.index.add([f'file{i}.txt'])
+        repo.index.commit(f'feat: add file {i}\n\nBody for commit {i}.\n')
+    return repo
+
+
+class TestGetCommitLog:
+    """Test suite for get_commit_log and iter_commit_log functions."""
+
+    def test_matches_gitpython_fields(self, tmp_path):
+        """Test that each record has the same fields GitPython would give."""
+        repo = _make_repo(tmp_path)
+        expected = [
+            {
+                'sha': c.hexsha,
+                'hash': c.hexsha[:7],
+                'message': c.message.strip(),
+                'author': c.author.name,
+                'date': c.committed_datetime.isoformat(),
+            }
+            for c in repo.iter_commits('main..feature')
+        ]
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            assert get_commit_log('main') == expected
+        finally:
+            os.chdir(original_dir)
+
+    def test_multiline_messages_are_kept(self, tmp_path):
+        """Test that commit bodies survive the -z stream."""
+        _make_repo(tmp_path, feature_commits=1)
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            commits = get_commit_log('main')
+            assert commits[0]['message'] == 'feat: add file 0\n\nBody for commit 0.'
+        finally:
+            os.chdir(original_dir)
+
+    def test_limit(self, tmp_path):
+        """Test that limit returns only the newest commits."""
+        _make_repo(tmp_path, feature_commits=5)
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            commits = get_commit_log('main', limit=2)
+            assert [c['message'].splitlines()[0] for c in commits] == ['feat: add file 4', 'feat: add file 3']
+        finally:
+            os.chdir(original_dir)
+
+    def test_iter_commit_log_is_lazy(self, tmp_path):
+        """Test that iter_commit_log returns a generator."""
+        _make_repo(tmp_path)
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            commits = iter_commit_log('main')
+            assert isinstance(commits, types.GeneratorType)
+            assert next(commits)['message'].startswith('feat: add file 2')
+            commits.close()
+        finally:
+            os.chdir(original_dir)
+
+    def test_no_commits_ahead_of_main(self, tmp_path):
+        """Test that an up-to-date branch gives an empty list."""
+        _make_repo(tmp_path, feature_commits=0)
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            assert get_commit_log('main') == []
+        finally:
+            os.chdir(original_dir)
+
+    def test_unknown_base_branch(self, tmp_path):
+        """Test that an unknown base branch returns None."""
+        _make_repo(tmp_path)
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            assert get_commit_log('does-not-exist') is None
+        finally:
+            os.chdir(original_dir)
+
+    def test_not_in_repo(self, tmp_path):
+        """Test that get_commit_log returns None outside a git repo."""
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            assert get_commit_log() is None
+        finally:
+            os.chdir(original_dir)
@@ -1,7 +1,7 @@
 # tests/test_get_staged_changes.py
 import os
 from git import Repo
-from gitgenie.git_utils import get_staged_changes
+from gitgenie.git_utils import get_session, get_staged_changes, get_staged_diff
 
 
 class TestGetStagedChanges:
@@ -152,4 +152,110 @@ class TestGetStagedChanges:
             result = get_staged_changes()
             assert result == ""  # Should be empty since nothing is staged
         finally:
-            os.chdir(original_dir)
\ No newline at end of file
+            os.chdir(original_dir)
+
+    def test_get_staged_changes_with_context_lines(self, tmp_path):
+        """Test that context_lines limits the unchanged lines around a hunk."""
+        repo = Repo.init(tmp_path)
+        test_file = tmp_path / "test.txt"
+        test_file.write_text("".join(f"line {i}\n" for i in range(20)))
+        repo.index.add(["test.txt"])
+        repo.index.commit("Initial commit")
+
+        test_file.write_text("".join(f"line {i}\n" if i != 10 else "changed\n" for i in range(20)))
+        repo.index.add(["test.txt"])
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            result = get_staged_changes(context_lines=0)
+            assert "+changed" in result
+            assert " line 9" not in result.splitlines()
+            assert " line 9" in get_staged_changes().splitlines()
+        finally:
+            os.chdir(original_dir)
+
+    def test_get_staged_changes_respects_byte_budget(self, tmp_path):
+        """Test that a diff over max_bytes is cut off and the rest listed by name."""
+        repo = Repo.init(tmp_path)
+        (tmp_path / "base.txt").write_text("base")
+        repo.index.add(["base.txt"])
+        repo.index.commit("Initial commit")
+
+        for name in ("a_small.txt", "b_big.txt", "c_after.txt"):
+            lines = 5 if name != "b_big.txt" else 5000
+            (tmp_path / name).write_text("".join(f"{name} line {i}\n" for i in range(lines)))
+        repo.index.add(["a_small.txt", "b_big.txt", "c_after.txt"])
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            result = get_staged_diff(max_bytes=4000, max_tokens=0)
+        finally:
+            os.chdir(original_dir)
+
+        assert result.truncated
+        assert len(result.text) < 6000
+        assert "+a_small.txt line 4" in result.text
+        assert "Diff truncated" in result.text
+        assert "b_big.txt (+5000 -0)" in result.text
+        assert "c_after.txt (+5 -0)" in result.text
+        assert "a_small.txt (+" not in result.text
+
+    def test_get_staged_changes_within_budget_is_not_truncated(self, tmp_path):
+        """Test that a small diff is returned whole."""
+        repo = Repo.init(tmp_path)
+        (tmp_path / "a.txt").write_text("hello\n")
+        repo.index.add(["a.txt"])
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            result = get_staged_diff(max_bytes=10000)
+        finally:
+            os.chdir(original_dir)
+
+        assert not result.truncated
+        assert result.text.endswith("+hello")
+
+    def test_byte_budget_counts_encoded_bytes(self, tmp_path):
+        """Test that max_bytes counts UTF-8 bytes, not characters."""
+        repo = Repo.init(tmp_path)
+        (tmp_path / "umlauts.txt").write_text("".join(f"{i:04} üüüüüüüü\n" for i in range(400)), encoding="utf-8")
+        repo.index.add(["umlauts.txt"])
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            result = get_staged_diff(max_bytes=8000, max_tokens=0)
+        finally:
+            os.chdir(original_dir)
+
+        assert result.truncated
+        assert result.bytes_read <= 8000
+        assert "umlauts.txt (+400 -0)" in result.text
+
+    def test_paths_keep_prefixes_under_diff_config(self, tmp_path):
+        """Test that diff.noprefix and friends don't change the a/ and b/ paths gitgenie parses."""
+        repo = Repo.init(tmp_path)
+        with repo.config_writer() as config:
+            config.set_value("diff", "noprefix", "true")
+            config.set_value("diff", "mnemonicPrefix", "true")
+            config.set_value("diff", "srcPrefix", "src/")
+        (tmp_path / "a.txt").write_text("hello\n")
+        repo.index.add(["a.txt"])
+        sha = repo.index.commit("Add a").hexsha
+        (tmp_path / "a.txt").write_text("hello\nworld\n")
+        repo.index.add(["a.txt"])
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            staged = get_staged_diff().text
+            commit = get_session().get_commit_diff(sha)
+        finally:
+            os.chdir(original_dir)
+
+        assert staged.startswith("diff --git a/a.txt b/a.txt\n")
+        assert "--- a/a.txt\n+++ b/a.txt\n" in staged
+        assert commit.startswith("diff --git a/a.txt b/a.txt\n")
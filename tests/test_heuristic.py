@@ -0,0 +1,139 @@
+import io
+import time
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from git import Repo
+from rich.console import Console
+
+from gitgenie.cli import main
+from gitgenie.heuristic import classify, draft_message, heuristic_message, infer_scope, staged_files
+from gitgenie.sinks import LiveSink, streaming
+
+
+def _staged_repo(tmp_path, monkeypatch):
+    repo = Repo.init(tmp_path)
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'parser.py').write_text('def parse():\n    pass\n')
+    (tmp_path / 'README.md').write_text('# Project\n')
+    repo.index.add(['src/parser.py', 'README.md'])
+    repo.index.commit('Initial commit')
+    (tmp_path / 'src' / 'parser.py').write_text('def parse(text):\n    return text\n')
+    (tmp_path / 'tests').mkdir()
+    (tmp_path / 'tests' / 'test_parser.py').write_text('def test_parse():\n    pass\n')
+    repo.index.add(['src/parser.py', 'tests/test_parser.py'])
+    repo.index.remove(['README.md'], working_tree=True)
+    monkeypatch.chdir(tmp_path)
+    return repo
+
+
+class TestDraftMessage:
+    """Test suite for the LLM-free message draft."""
+
+    def test_classify(self):
+        """Test the path rules for each kind of file."""
+        assert classify('tests/test_cli.py') == 'test'
+        assert classify('web/src/App.test.tsx') == 'test'
+        assert classify('docs/guide/setup.md') == 'docs'
+        assert classify('README.md') == 'docs'
+        assert classify('pyproject.toml') == 'build'
+        assert classify('.github/workflows/ci.yml') == 'build'
+        assert classify('src/gitgenie/cli.py') == 'code'
+
+    def test_infer_scope(self):
+        """Test that the scope is the deepest shared non-generic directory or module."""
+        assert infer_scope(['src/gitgenie/cli.py', 'src/gitgenie/hook.py']) == 'gitgenie'
+        assert infer_scope(['src/gitgenie/cli.py']) == 'cli'
+        assert infer_scope(['tests/test_hook.py']) == 'hook'
+        assert infer_scope(['packages/api/server.py', 'packages/web/app.js']) is None
+
+    def test_types(self):
+        """Test how the kind of file and the line counts pick the type."""
+        assert draft_message([('src/auth/token.py', 40, 0, 'A')]) == 'feat(token): add token'
+        assert draft_message([('src/auth/token.py', 3, 2, 'M')]) == 'fix(token): update token'
+        assert draft_message([('src/auth/token.py', 30, 40, 'M')]) == 'refactor(token): update token'
+        assert draft_message([('src/auth/legacy.py', 0, 80, 'D')]) == 'refactor(legacy): remove legacy'
+        assert draft_message([('tests/test_token.py', 5, 1, 'M')]) == 'test(token): update token'
+        assert draft_message([('README.md', 5, 1, 'M')]) == 'docs(readme): update readme'
+        assert draft_message([('pyproject.toml', 1, 1, 'M')]) == 'chore(pyproject): update pyproject'
+        assert draft_message([]) is None
+
+    def test_code_outranks_tests_and_docs(self):
+        """Test that code changes decide the message when mixed with tests and docs."""
+        files = [('src/auth/a.py', 10, 0, 'M'), ('src/auth/b.py', 10, 0, 'M'), ('src/auth/c.py', 10, 0, 'M'),
+                 ('tests/test_a.py', 5, 0, 'M'), ('docs/auth.md', 3, 0, 'M')]
+        assert draft_message(files) == 'feat(auth): update 3 files'
+
+    def test_staged_files(self, tmp_path, monkeypatch):
+        """Test counts and statuses read from one git diff call."""
+        _staged_repo(tmp_path, monkeypatch)
+        assert sorted(staged_files()) == [
+            ('README.md', 0, 1, 'D'), ('src/parser.py', 2, 2, 'M'), ('tests/test_parser.py', 2, 0, 'A'),
+        ]
+        assert heuristic_message() == 'fix(parser): update parser'
+
+    def test_outside_repo(self, tmp_path):
+        """Test that no draft is made outside a repository."""
+        assert heuristic_message(str(tmp_path)) is None
+
+
+class TestCommitDraft:
+    """Test suite for the draft in `gitgenie commit`."""
+
+    def test_draft_is_shown_before_the_model(self, tmp_path, monkeypatch):
+        """Test that the draft is printed and then replaced by the model's message."""
+        repo = _staged_repo(tmp_path, monkeypatch)
+        with patch('gitgenie.commit_analyzer.generate_text', return_value='fix(parser): accept input text'):
+            result = CliRunner().invoke(main, ['commit'], input='c\n')
+
+        assert result.output.index('Draft: fix(parser): update parser') < result.output.index('Committed')
+        assert repo.head.commit.message.strip() == 'fix(parser): accept input text'
+
+    def test_falls_back_when_model_fails(self, tmp_path, monkeypatch):
+        """Test that the draft is offered when generation fails or times out."""
+        repo = _staged_repo(tmp_path, monkeypatch)
+        with patch('gitgenie.commit_analyzer.generate_text', return_value=None):
+            result = CliRunner().invoke(main, ['commit'], input='c\n')
+
+        assert 'Warning: the model did not respond, using the heuristic message:' in result.output
+        assert repo.head.commit.message.strip() == 'fix(parser): update parser'
+
+    def test_draft_comes_before_diff_preparation(self, tmp_path, monkeypatch):
+        """Test that the draft is printed before the staged diff is prepared."""
+        _staged_repo(tmp_path, monkeypatch)
+        events = []
+        with patch('gitgenie.commit_analyzer.prepare_staged_diff',
+                   side_effect=lambda *args, **kwargs: events.append('prepare') or (None, [])), \
+                patch('gitgenie.cli.click.echo', side_effect=lambda text='', **kwargs: events.append(text)):
+            CliRunner().invoke(main, ['commit'])
+        assert events[:2] == ['Draft: fix(parser): update parser', 'prepare']
+
+    def test_falls_back_when_budget_runs_out(self, tmp_path, monkeypatch):
+        """Test that the draft is used once commit_budget passes, without waiting for the model."""
+        repo = _staged_repo(tmp_path, monkeypatch)
+        monkeypatch.setenv('GITGENIE_COMMIT_BUDGET', '0.3')
+        start = time.monotonic()
+        with patch('gitgenie.commit_analyzer.generate_text', side_effect=lambda *a, **k: time.sleep(3)):
+            result = CliRunner().invoke(main, ['commit'], input='c\n')
+
+        assert time.monotonic() - start < 2
+        assert 'Warning: no message after 0.3s, using the heuristic message:' in result.output
+        assert repo.head.commit.message.strip() == 'fix(parser): update parser'
+
+    def test_fallback_off(self, tmp_path, monkeypatch):
+        """Test that heuristic_fallback=false keeps the error."""
+        _staged_repo(tmp_path, monkeypatch)
+        monkeypatch.setenv('GITGENIE_HEURISTIC_FALLBACK', '0')
+        with patch('gitgenie.commit_analyzer.generate_text', return_value=None):
+            result = CliRunner().invoke(main, ['commit'], input='c\n')
+        assert 'Error: Failed to generate commit message' in result.output
+
+    def test_live_sink_placeholder(self):
+        """Test that the live view shows the placeholder until text arrives."""
+        console = Console(file=io.StringIO(), force_terminal=True)
+        sink = LiveSink(console, placeholder='fix: draft')
+        with streaming(sink):
+            assert sink._text().plain == 'fix: draft'
+            sink.write('fix: real')
+            assert sink._text().plain == 'fix: real'
+        assert 'fix: real' in console.file.getvalue()
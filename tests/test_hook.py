@@ -0,0 +1,188 @@
+import os
+import socket
+import stat
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+from git import Repo
+from gitgenie.daemon import save_precomputed
+from gitgenie.git_utils import get_staged_key
+from gitgenie.hook import HOOK_MARKER, install_hook, run_hook, uninstall_hook
+
+
+def _staged_repo(tmp_path, monkeypatch):
+    repo = Repo.init(tmp_path)
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'Test Author')
+        config.set_value('user', 'email', 'test@example.com')
+    (tmp_path / 'app.py').write_text('print(1)\n')
+    repo.index.add(['app.py'])
+    monkeypatch.chdir(tmp_path)
+    return repo
+
+
+def _message_file(tmp_path, content='\n# Please enter the commit message\n'):
+    path = tmp_path / 'COMMIT_EDITMSG'
+    path.write_text(content)
+    return str(path)
+
+
+class TestInstallHook:
+    """Test suite for installing and removing the hook."""
+
+    def test_install_writes_executable_hook(self, tmp_path, monkeypatch):
+        """Test that install creates an executable hook script."""
+        _staged_repo(tmp_path, monkeypatch)
+        path = install_hook()
+        assert path == str(tmp_path / '.git' / 'hooks' / 'prepare-commit-msg')
+        with open(path) as f:
+            assert HOOK_MARKER in f.read()
+        assert os.stat(path).st_mode & stat.S_IXUSR
+
+    def test_install_refuses_foreign_hook(self, tmp_path, monkeypatch):
+        """Test that an existing hook is not overwritten without force."""
+        _staged_repo(tmp_path, monkeypatch)
+        hooks = tmp_path / '.git' / 'hooks'
+        hooks.mkdir(exist_ok=True)
+        (hooks / 'prepare-commit-msg').write_text('#!/bin/sh\necho mine\n')
+        try:
+            install_hook()
+            assert False, 'expected FileExistsError'
+        except FileExistsError:
+            pass
+        install_hook(force=True)
+        assert HOOK_MARKER in (hooks / 'prepare-commit-msg').read_text()
+
+    def test_uninstall_only_removes_own_hook(self, tmp_path, monkeypatch):
+        """Test that uninstall leaves foreign hooks alone."""
+        _staged_repo(tmp_path, monkeypatch)
+        install_hook()
+        assert uninstall_hook() is True
+        assert uninstall_hook() is False
+
+
+class TestRunHook:
+    """Test suite for run_hook function."""
+
+    def test_skips_when_message_supplied(self, tmp_path, monkeypatch):
+        """Test that -m, merges and amends are left alone."""
+        _staged_repo(tmp_path, monkeypatch)
+        for source in ('message', 'merge', 'commit', 'squash'):
+            path = _message_file(tmp_path, 'user message\n')
+            with patch('gitgenie.hook._generate_within') as mock_generate:
+                assert run_hook(path, source) == 0
+            mock_generate.assert_not_called()
+            assert open(path).read() == 'user message\n'
+
+    def test_verbose_diff_is_not_a_message(self, tmp_path, monkeypatch):
+        """Test that the diff below the scissors line of `git commit -v` is ignored."""
+        _staged_repo(tmp_path, monkeypatch)
+        scissors = '# ------------------------ >8 ------------------------\n'
+        path = _message_file(tmp_path, '\n# Please enter the commit message\n' + scissors + 'diff --git a/app.py b/app.py\n')
+        with patch('gitgenie.hook._precomputed_message', return_value='feat(app): print one'):
+            run_hook(path)
+        assert open(path).read().startswith('feat(app): print one\n')
+
+    def test_template_is_not_a_message(self, tmp_path, monkeypatch):
+        """Test that an unchanged commit.template gets a message, but edited text is kept."""
+        repo = _staged_repo(tmp_path, monkeypatch)
+        template = tmp_path / 'template.txt'
+        template.write_text('Why:\n\n# Explain the change\n')
+        with repo.config_writer() as config:
+            config.set_value('commit', 'template', str(template))
+
+        path = _message_file(tmp_path, template.read_text())
+        with patch('gitgenie.hook._precomputed_message', return_value='feat(app): print one'):
+            run_hook(path, 'template')
+        assert open(path).read() == 'feat(app): print one\n\nWhy:\n\n# Explain the change\n'
+
+        path = _message_file(tmp_path, 'Why: users asked\n')
+        with patch('gitgenie.hook._precomputed_message', return_value='feat(app): print one'):
+            run_hook(path, 'template')
+        assert open(path).read() == 'Why: users asked\n'
+
+    def test_uses_precomputed_message(self, tmp_path, monkeypatch):
+        """Test that the daemon's message is used without generating."""
+        _staged_repo(tmp_path, monkeypatch)
+        save_precomputed(str(tmp_path / '.git'), get_staged_key(), 'feat(app): print one')
+        path = _message_file(tmp_path)
+
+        with patch('gitgenie.hook._generate_within') as mock_generate:
+            run_hook(path)
+
+        mock_generate.assert_not_called()
+        assert open(path).read().startswith('feat(app): print one\n\n# Please enter')
+
+    @patch('gitgenie.commit_analyzer.generate_commit_message')
+    def test_generated_message_is_written(self, mock_generate, tmp_path, monkeypatch):
+        """Test that a generated message is put above git's comments."""
+        _staged_repo(tmp_path, monkeypatch)
+        mock_generate.return_value = 'feat(app): print one'
+        path = _message_file(tmp_path)
+
+        run_hook(path, budget=5)
+
+        assert open(path).read().startswith('feat(app): print one\n')
+
+    @patch('gitgenie.commit_analyzer.generate_commit_message')
+    def test_falls_back_when_budget_runs_out(self, mock_generate, tmp_path, monkeypatch):
+        """Test that a slow model is abandoned for the heuristic message."""
+        _staged_repo(tmp_path, monkeypatch)
+        mock_generate.side_effect = lambda *args, **kwargs: time.sleep(2) or 'feat: too late'
+        path = _message_file(tmp_path)
+
+        start = time.monotonic()
+        run_hook(path, budget=0.2)
+
+        assert time.monotonic() - start < 1.5
+        assert open(path).read().startswith('feat(app): add app\n')
+
+    def test_git_commit_runs_hook(self, tmp_path, monkeypatch):
+        """Test the installed hook end to end with a plain git commit."""
+        _staged_repo(tmp_path, monkeypatch)
+        install_hook()
+        env = dict(os.environ, GITGENIE_HOOK_BUDGET='0.5', GITGENIE_OLLAMA_HOST='http://127.0.0.1:9')
+
+        subprocess.run(['git', 'commit', '-q', '--no-edit'], cwd=tmp_path, env=env, check=True)
+
+        message = subprocess.run(
+            ['git', 'log', '-1', '--format=%s'], cwd=tmp_path, stdout=subprocess.PIPE, check=True,
+        ).stdout.decode().strip()
+        assert message == 'feat(app): add app'
+
+    def test_git_commit_verbose_runs_hook(self, tmp_path, monkeypatch):
+        """Test that commit.verbose doesn't stop the hook from writing a message."""
+        _staged_repo(tmp_path, monkeypatch)
+        install_hook()
+        env = dict(os.environ, GITGENIE_HOOK_BUDGET='0.5', GITGENIE_OLLAMA_HOST='http://127.0.0.1:9', GIT_EDITOR='true')
+
+        subprocess.run(['git', '-c', 'commit.verbose=true', 'commit', '-q'], cwd=tmp_path, env=env, check=True)
+
+        message = subprocess.run(
+            ['git', 'log', '-1', '--format=%s'], cwd=tmp_path, stdout=subprocess.PIPE, check=True,
+        ).stdout.decode().strip()
+        assert message == 'feat(app): add app'
+
+    def test_hook_process_exits_within_budget(self, tmp_path, monkeypatch):
+        """Test that the whole hook process ends on budget, with chunk summaries still waiting on the model."""
+        repo = _staged_repo(tmp_path, monkeypatch)
+        for n in range(30):
+            (tmp_path / f'mod{n}.txt').write_text(f'line {n}\n' * 40)
+        repo.index.add([f'mod{n}.txt' for n in range(30)])
+        path = _message_file(tmp_path)
+        with socket.socket() as server:
+            # Accepts connections into the backlog but never answers.
+            server.bind(('127.0.0.1', 0))
+            server.listen(64)
+            env = dict(
+                os.environ, GITGENIE_OLLAMA_HOST=f'http://127.0.0.1:{server.getsockname()[1]}',
+                GITGENIE_HOOK_BUDGET='1', GITGENIE_READ_TIMEOUT='20', GITGENIE_CHUNK_TOKEN_BUDGET='200',
+                GITGENIE_STRUCTURE_SUMMARY='0', GITGENIE_CACHE_ENABLED='0',
+            )
+            start = time.monotonic()
+            subprocess.run([sys.executable, '-m', 'gitgenie.hook', path], cwd=tmp_path, env=env, timeout=60)
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 6
+        assert open(path).read().startswith('feat(app): add app\n')
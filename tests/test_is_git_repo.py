@@ -77,4 +77,19 @@ class TestIsGitRepo:
             os.chdir(tmp_path)
             assert is_git_repo() is True
         finally:
-            os.chdir(original_dir)
\ No newline at end of file
+            os.chdir(original_dir)
+
+    def test_is_git_repo_in_linked_worktree(self, tmp_path):
+        """Test that a .git file pointing elsewhere (linked worktree) counts as a repo."""
+        repo = Repo.init(tmp_path / "main")
+        (tmp_path / "main" / "a.txt").write_text("a")
+        repo.index.add(["a.txt"])
+        repo.index.commit("Initial commit")
+        repo.git.worktree("add", str(tmp_path / "linked"))
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path / "linked")
+            assert is_git_repo() is True
+        finally:
+            os.chdir(original_dir)
@@ -1,37 +1,43 @@
+import ollama
 import pytest
 from unittest.mock import patch, MagicMock
-from gitgenie.llm_client import generate_text
+from gitgenie import profiling
+from gitgenie.llm_client import LLMClient, generate_text, generation_options, get_client
 
 
 class TestGenerateText:
     """Test suite for generate_text function."""
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_success(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_success(self, mock_client):
         """Test that generate_text returns content on successful response."""
+        mock_chat = mock_client.return_value.chat
         # Mock the ollama.chat response
-        mock_chat.return_value = {
+        mock_chat.return_value = [{
             'message': {
                 'content': 'This is the generated response'
             }
-        }
+        }]
         
         result = generate_text('Test prompt')
         
         assert result == 'This is the generated response'
         mock_chat.assert_called_once_with(
             model='llama3',
-            messages=[{'role': 'user', 'content': 'Test prompt'}]
+            messages=[{'role': 'user', 'content': 'Test prompt'}],
+            stream=True,
+            keep_alive='30m',
         )
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_with_different_prompts(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_with_different_prompts(self, mock_client):
         """Test that generate_text works with various prompts."""
-        mock_chat.return_value = {
+        mock_chat = mock_client.return_value.chat
+        mock_chat.return_value = [{
             'message': {
                 'content': 'Response content'
             }
-        }
+        }]
         
         prompts = [
             'Simple question',
@@ -44,36 +50,40 @@ class TestGenerateText:
             result = generate_text(prompt)
             assert result == 'Response content'
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_handles_connection_error(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_handles_connection_error(self, mock_client):
         """Test that generate_text returns None on connection error."""
+        mock_chat = mock_client.return_value.chat
         mock_chat.side_effect = ConnectionError('Cannot connect to Ollama')
         
         result = generate_text('Test prompt')
         
         assert result is None
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_handles_timeout_error(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_handles_timeout_error(self, mock_client):
         """Test that generate_text returns None on timeout."""
+        mock_chat = mock_client.return_value.chat
         mock_chat.side_effect = TimeoutError('Request timed out')
         
         result = generate_text('Test prompt')
         
         assert result is None
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_handles_generic_exception(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_handles_generic_exception(self, mock_client):
         """Test that generate_text returns None on any exception."""
+        mock_chat = mock_client.return_value.chat
         mock_chat.side_effect = Exception('Unknown error')
         
         result = generate_text('Test prompt')
         
         assert result is None
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_handles_key_error(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_handles_key_error(self, mock_client):
         """Test that generate_text returns None if response format is unexpected."""
+        mock_chat = mock_client.return_value.chat
         # Mock a malformed response
         mock_chat.return_value = {'wrong_key': 'value'}
         
@@ -81,27 +91,29 @@ class TestGenerateText:
         
         assert result is None
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_handles_empty_response(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_handles_empty_response(self, mock_client):
         """Test that generate_text handles empty content in response."""
-        mock_chat.return_value = {
+        mock_chat = mock_client.return_value.chat
+        mock_chat.return_value = [{
             'message': {
                 'content': ''
             }
-        }
+        }]
         
         result = generate_text('Test prompt')
         
         assert result == ''
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_uses_correct_model(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_uses_correct_model(self, mock_client):
         """Test that generate_text uses the llama3 model."""
-        mock_chat.return_value = {
+        mock_chat = mock_client.return_value.chat
+        mock_chat.return_value = [{
             'message': {
                 'content': 'Response'
             }
-        }
+        }]
         
         generate_text('Test')
         
@@ -109,14 +121,15 @@ class TestGenerateText:
         call_args = mock_chat.call_args
         assert call_args[1]['model'] == 'llama3'
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_formats_messages_correctly(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_formats_messages_correctly(self, mock_client):
         """Test that generate_text formats messages in the correct structure."""
-        mock_chat.return_value = {
+        mock_chat = mock_client.return_value.chat
+        mock_chat.return_value = [{
             'message': {
                 'content': 'Response'
             }
-        }
+        }]
         
         prompt = 'Tell me a story'
         generate_text(prompt)
@@ -128,18 +141,195 @@ class TestGenerateText:
         assert messages[0]['role'] == 'user'
         assert messages[0]['content'] == prompt
 
-    @patch('gitgenie.llm_client.ollama.chat')
-    def test_generate_text_with_long_prompt(self, mock_chat):
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_with_long_prompt(self, mock_client):
         """Test that generate_text handles long prompts."""
-        mock_chat.return_value = {
+        mock_chat = mock_client.return_value.chat
+        mock_chat.return_value = [{
             'message': {
                 'content': 'Response to long prompt'
             }
-        }
+        }]
         
         long_prompt = 'a' * 10000  # Very long prompt
         result = generate_text(long_prompt)
         
         assert result == 'Response to long prompt'
         call_args = mock_chat.call_args
-        assert call_args[1]['messages'][0]['content'] == long_prompt
\ No newline at end of file
+        assert call_args[1]['messages'][0]['content'] == long_prompt
+
+class TestLLMClient:
+    """Test suite for LLMClient class."""
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_client_is_reused_across_calls(self, mock_client):
+        """Test that one HTTP client serves every generation."""
+        mock_client.return_value.chat.return_value = [{'message': {'content': 'ok'}}]
+
+        generate_text('first')
+        generate_text('second')
+
+        mock_client.assert_called_once()
+        assert mock_client.return_value.chat.call_count == 2
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_client_uses_configured_timeouts_and_host(self, mock_client):
+        """Test that the HTTP client gets the host and timeouts."""
+        client = LLMClient(host='http://gpu-box:11434', connect_timeout=2, read_timeout=30)
+        client.client
+
+        kwargs = mock_client.call_args[1]
+        assert kwargs['host'] == 'http://gpu-box:11434'
+        assert kwargs['timeout'].connect == 2
+        assert kwargs['timeout'].read == 30
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_keep_alive_is_sent(self, mock_client):
+        """Test that keep_alive is passed on every chat request."""
+        mock_client.return_value.chat.return_value = [{'message': {'content': 'ok'}}]
+
+        LLMClient(keep_alive='1h').generate('prompt', echo=False)
+
+        assert mock_client.return_value.chat.call_args[1]['keep_alive'] == '1h'
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_warm_up_loads_model_without_messages(self, mock_client):
+        """Test that warm_up sends an empty chat request with the usual num_ctx."""
+        client = LLMClient(model='llama3', keep_alive='5m')
+
+        assert client.warm_up() is True
+        mock_client.return_value.chat.assert_called_once_with(
+            model='llama3', messages=[], keep_alive='5m', options={'num_ctx': 2048},
+        )
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_warm_up_matches_request_context(self, mock_client, monkeypatch):
+        """Test that warm-up and ordinary requests load the model with the same num_ctx."""
+        monkeypatch.setenv('GITGENIE_MIN_CONTEXT', '4096')
+        mock_client.return_value.chat.return_value = [{'message': {'content': 'x'}, 'done': True}]
+        client = LLMClient()
+        client.warm_up()
+        client.generate('x' * 4 * 3000, echo=False, options=generation_options('x' * 4 * 3000, num_predict=64))
+
+        contexts = [c.kwargs['options']['num_ctx'] for c in mock_client.return_value.chat.call_args_list]
+        assert contexts == [4096, 4096]
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_warm_up_failure_returns_false(self, mock_client):
+        """Test that warm_up never raises."""
+        mock_client.return_value.chat.side_effect = ConnectionError('down')
+
+        assert LLMClient().warm_up() is False
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_warm_up_in_background(self, mock_client):
+        """Test that the background warm-up runs in a daemon thread."""
+        thread = LLMClient().warm_up_in_background()
+        thread.join(timeout=5)
+
+        assert thread.daemon
+        mock_client.return_value.chat.assert_called_once()
+
+    def test_get_client_returns_shared_instance(self):
+        """Test that get_client always returns the same client."""
+        assert get_client() is get_client()
+
+
+class TestGenerationLimits:
+    """Test suite for generation options and early termination."""
+
+    def test_generation_options_pins_context(self):
+        """Test that num_ctx stays at min_context for every prompt that fits."""
+        assert generation_options('short', num_predict=64)['num_ctx'] == 2048
+        assert generation_options('x' * 4 * 1800, num_predict=64)['num_ctx'] == 2048
+
+    def test_generation_options_grows_only_on_overflow(self):
+        """Test that a prompt too big for min_context gets max_context, not the next power of two."""
+        assert generation_options('x' * 4 * 3000, num_predict=64)['num_ctx'] == 8192
+
+    def test_generation_options_caps_context(self):
+        """Test that num_ctx never exceeds max_context."""
+        assert generation_options('x' * 4 * 100000)['num_ctx'] == 8192
+
+    def test_generation_options_passes_other_options(self):
+        """Test that num_predict, temperature and stop are kept."""
+        options = generation_options('p', num_predict=10, temperature=0.1, stop=['\n'])
+        assert options['num_predict'] == 10
+        assert options['temperature'] == 0.1
+        assert options['stop'] == ['\n']
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_options_are_sent(self, mock_client):
+        """Test that options reach the chat request."""
+        mock_client.return_value.chat.return_value = [{'message': {'content': 'ok'}}]
+
+        generate_text('prompt', echo=False, options={'num_predict': 5})
+
+        assert mock_client.return_value.chat.call_args[1]['options'] == {'num_predict': 5}
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_stop_when_ends_stream_early(self, mock_client):
+        """Test that the stream is closed once stop_when returns True."""
+        consumed = []
+
+        def stream():
+            for token in ['feat: add x', '\n', 'Explanation', ' of the change']:
+                consumed.append(token)
+                yield {'message': {'content': token}}
+
+        mock_client.return_value.chat.return_value = stream()
+
+        result = generate_text('prompt', echo=False, stop_when=lambda text: text.endswith('\n'))
+
+        assert result == 'feat: add x\n'
+        assert consumed == ['feat: add x', '\n']
+
+
+class TestRetries:
+    """Test suite for retrying busy or unreachable servers."""
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_retries_busy_server(self, mock_client):
+        """Test that a 503 before any output is retried and the retry is counted."""
+        mock_client.return_value.chat.side_effect = [
+            ollama.ResponseError('server busy', 503),
+            [{'message': {'content': 'ok'}, 'done': True}],
+        ]
+        profiler = profiling.start('test')
+        try:
+            result = generate_text('prompt', echo=False)
+        finally:
+            profiling.stop()
+
+        assert result == 'ok'
+        assert mock_client.return_value.chat.call_count == 2
+        assert profiler.generations[0]['retries'] == 1
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_does_not_retry_bad_requests(self, mock_client):
+        """Test that errors other than busy or connection errors fail immediately."""
+        mock_client.return_value.chat.side_effect = ollama.ResponseError('model not found', 404)
+
+        assert generate_text('prompt', echo=False) is None
+        assert mock_client.return_value.chat.call_count == 1
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_gives_up_after_retry_attempts(self, mock_client, monkeypatch):
+        """Test that retries stop after retry_attempts."""
+        monkeypatch.setenv('GITGENIE_RETRY_ATTEMPTS', '2')
+        mock_client.return_value.chat.side_effect = ConnectionError('Cannot connect to Ollama')
+
+        assert generate_text('prompt', echo=False) is None
+        assert mock_client.return_value.chat.call_count == 3
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_does_not_retry_after_output(self, mock_client):
+        """Test that a stream failing midway is not retried, so output is never repeated."""
+        def stream():
+            yield {'message': {'content': 'feat'}}
+            raise ConnectionError('connection lost')
+
+        mock_client.return_value.chat.side_effect = lambda **kwargs: stream()
+
+        assert generate_text('prompt', echo=False) is None
+        assert mock_client.return_value.chat.call_count == 1
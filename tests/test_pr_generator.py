@@ -0,0 +1,100 @@
+from unittest.mock import patch
+from git import Repo
+from gitgenie.git_utils import get_commit_log
+from gitgenie.pr_generator import generate_pr_description
+
+
+def _fake_generate(prompt, echo=True, **kwargs):
+    if prompt.startswith('You are reviewing a single git commit'):
+        return '- summary of ' + prompt.split('Commit message:\n', 1)[1].split('\n', 1)[0]
+    if prompt.startswith('You are summarizing a group'):
+        return '- merged batch'
+    return '# PR title'
+
+
+def _add_commit(repo, tmp_path, i):
+    (tmp_path / f'file{i}.txt').write_text(f'content {i}\n')
+    repo.index.add([f'file{i}.txt'])
+    repo.index.commit(f'feat: add file {i}')
+
+
+def _make_repo(tmp_path, monkeypatch, commits):
+    repo = Repo.init(tmp_path, initial_branch='main')
+    (tmp_path / 'base.txt').write_text('base\n')
+    repo.index.add(['base.txt'])
+    repo.index.commit('Initial commit')
+    repo.git.checkout('-b', 'feature')
+    for i in range(commits):
+        _add_commit(repo, tmp_path, i)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('GITGENIE_CACHE_ENABLED', '1')
+    return repo
+
+
+def _prompts(mock_generate, prefix):
+    return [c[0][0] for c in mock_generate.call_args_list if c[0][0].startswith(prefix)]
+
+
+class TestGeneratePRDescription:
+    """Test suite for hierarchical PR description generation."""
+
+    @patch('gitgenie.pr_generator.generate_text', side_effect=_fake_generate)
+    def test_each_commit_is_summarized_from_its_diff(self, mock_generate, tmp_path, monkeypatch):
+        """Test that every commit's diff is summarized before the final prompt."""
+        _make_repo(tmp_path, monkeypatch, commits=3)
+
+        result = generate_pr_description(get_commit_log('main'))
+
+        assert result == '# PR title'
+        commit_prompts = _prompts(mock_generate, 'You are reviewing a single git commit')
+        assert len(commit_prompts) == 3
+        assert '+content 0' in ''.join(commit_prompts)
+        final_prompt = mock_generate.call_args_list[-1][0][0]
+        assert '- summary of feat: add file 2' in final_prompt
+
+    @patch('gitgenie.pr_generator.generate_text', side_effect=_fake_generate)
+    def test_summaries_are_merged_in_batches(self, mock_generate, tmp_path, monkeypatch):
+        """Test that more commits than batch_size are merged in a tree."""
+        _make_repo(tmp_path, monkeypatch, commits=5)
+
+        generate_pr_description(get_commit_log('main'), batch_size=2)
+
+        merge_prompts = _prompts(mock_generate, 'You are summarizing a group')
+        # 5 summaries -> 3 batches -> 2 batches -> final prompt
+        assert len(merge_prompts) == 5
+        final_prompt = mock_generate.call_args_list[-1][0][0]
+        assert '- merged batch' in final_prompt
+        assert '- summary of feat' not in final_prompt
+
+    @patch('gitgenie.pr_generator.generate_text', side_effect=_fake_generate)
+    def test_rerun_after_new_commit_only_summarizes_new_commit(self, mock_generate, tmp_path, monkeypatch):
+        """Test that cached per-commit summaries are reused when the branch grows."""
+        repo = _make_repo(tmp_path, monkeypatch, commits=3)
+        generate_pr_description(get_commit_log('main'))
+        mock_generate.reset_mock()
+
+        _add_commit(repo, tmp_path, 3)
+        generate_pr_description(get_commit_log('main'))
+
+        assert mock_generate.call_count == 2
+        commit_prompts = _prompts(mock_generate, 'You are reviewing a single git commit')
+        assert len(commit_prompts) == 1
+        assert 'feat: add file 3' in commit_prompts[0]
+
+    @patch('gitgenie.pr_generator.generate_text', side_effect=_fake_generate)
+    def test_commits_without_sha_use_message_only(self, mock_generate):
+        """Test that plain commit dicts are described from their messages."""
+        commits = [{'hash': 'abc1234', 'message': 'fix: thing'}]
+
+        generate_pr_description(commits)
+
+        mock_generate.assert_called_once()
+        assert '- abc1234: fix: thing' in mock_generate.call_args[0][0]
+
+    @patch('gitgenie.pr_generator.generate_text')
+    def test_failed_commit_summary_fails_generation(self, mock_generate, tmp_path, monkeypatch):
+        """Test that None from any model call makes the whole generation fail."""
+        _make_repo(tmp_path, monkeypatch, commits=2)
+        mock_generate.return_value = None
+
+        assert generate_pr_description(get_commit_log('main')) is None
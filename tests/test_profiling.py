@@ -0,0 +1,110 @@
+import json
+from unittest.mock import patch
+from click.testing import CliRunner
+from git import Repo
+from gitgenie import profiling
+from gitgenie.cli import main
+from gitgenie.llm_client import LLMClient
+
+
+class TestProfiler:
+    """Test suite for the Profiler class."""
+
+    def test_phases_accumulate(self):
+        """Test that repeated phases add up."""
+        profiler = profiling.Profiler('commit')
+        profiler.record('prompt_build', 0.5)
+        profiler.record('prompt_build', 0.25)
+        assert profiler.phases['prompt_build'] == 0.75
+
+    def test_phase_context_manager(self):
+        """Test that the phase context manager records a duration."""
+        profiler = profiling.Profiler('commit')
+        with profiler.phase('diff'):
+            pass
+        assert profiler.phases['diff'] >= 0
+
+    def test_generation_summary_uses_ollama_metrics(self):
+        """Test that tokens/sec comes from Ollama's eval metadata when present."""
+        profiler = profiling.Profiler('commit')
+        profiler.record_generation({
+            'chunks': 10, 'time_to_first_token': 0.2,
+            'eval_count': 50, 'eval_duration': 2_000_000_000,
+            'prompt_eval_count': 400, 'prompt_eval_duration': 500_000_000,
+        })
+        summary = profiler.generation_summary()
+        assert summary['tokens_per_second'] == 25
+        assert summary['prompt_eval_count'] == 400
+        assert summary['time_to_first_token'] == 0.2
+
+    def test_generation_summary_without_metadata(self):
+        """Test that tokens/sec falls back to streamed chunks over streaming time."""
+        profiler = profiling.Profiler('commit')
+        profiler.record_generation({'chunks': 20, 'streaming_time': 2.0})
+        assert profiler.generation_summary()['tokens_per_second'] == 10
+
+    def test_json_records(self):
+        """Test that JSON output has one line per phase plus a generation line."""
+        profiler = profiling.Profiler('pr')
+        profiler.record('commit_log', 0.01)
+        profiler.record_generation({'chunks': 3, 'eval_duration': 1_000_000})
+        records = [json.loads(line) for line in profiler.render_json().splitlines()]
+        assert records[0]['phase'] == 'commit_log'
+        assert records[0]['duration_ms'] == 10.0
+        assert records[1]['type'] == 'generation'
+        assert records[1]['eval_duration_ms'] == 1.0
+        assert all(r['run_id'] == profiler.run_id for r in records)
+
+    def test_phase_is_noop_without_active_profiler(self):
+        """Test that module-level phase() works when profiling is off."""
+        profiling.stop()
+        with profiling.phase('diff'):
+            pass
+        assert profiling.get_profiler() is None
+
+
+class TestGenerationStats:
+    """Test that LLMClient reports generation stats to the active profiler."""
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_final_chunk_metadata_is_captured(self, mock_client):
+        """Test that the done chunk's metadata ends up in the profile."""
+        mock_client.return_value.chat.return_value = [
+            {'message': {'content': 'feat'}},
+            {'message': {'content': ': x'}},
+            {'message': {'content': ''}, 'done': True, 'eval_count': 2,
+             'eval_duration': 1000, 'prompt_eval_count': 30},
+        ]
+        profiler = profiling.start('commit')
+        try:
+            LLMClient().generate('prompt', echo=False)
+        finally:
+            profiling.stop()
+
+        stats = profiler.generations[0]
+        assert stats['chunks'] == 2
+        assert stats['eval_count'] == 2
+        assert stats['prompt_eval_count'] == 30
+        assert 'time_to_first_token' in stats
+        assert 'generation' in profiler.phases
+
+
+class TestProfileFlag:
+    """Test the --profile flag on CLI commands."""
+
+    @patch('gitgenie.cli._warm_up')
+    @patch('gitgenie.commit_analyzer.generate_text')
+    def test_commit_profile_json(self, mock_generate, mock_warm_up, tmp_path, monkeypatch):
+        """Test that commit --profile=json prints phase records."""
+        repo = Repo.init(tmp_path)
+        (tmp_path / 'a.txt').write_text('a')
+        repo.index.add(['a.txt'])
+        monkeypatch.chdir(tmp_path)
+        mock_generate.return_value = 'feat: add a'
+
+        result = CliRunner().invoke(main, ['commit', '--profile=json'], input='q\n')
+
+        assert result.exit_code == 0
+        records = [json.loads(line) for line in result.output.splitlines() if line.startswith('{')]
+        phases = {r['phase'] for r in records if r['type'] == 'phase'}
+        assert {'repo_discovery', 'diff', 'prompt_build'} <= phases
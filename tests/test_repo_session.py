@@ -0,0 +1,105 @@
+import os
+import threading
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from git import Repo
+
+from gitgenie import git_utils
+from gitgenie.cli import main
+from gitgenie.git_utils import (
+    RepoSession, get_session, get_staged_changes, is_git_repo, set_default_repo, use_session,
+)
+
+
+def _repo_with_staged_file(path, name='file.txt'):
+    repo = Repo.init(path)
+    (path / name).write_text('hello\n')
+    repo.index.add([name])
+    return repo
+
+
+class TestRepoSession:
+    """Test suite for the shared repository session."""
+
+    def test_discovery_runs_once_per_path(self, tmp_path):
+        """Test that repeated helper calls reuse one session and discover the repo once."""
+        _repo_with_staged_file(tmp_path)
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            with patch('gitgenie.git_utils._find_worktree', wraps=git_utils._find_worktree) as find:
+                assert is_git_repo() is True
+                get_staged_changes()
+                get_staged_changes()
+            assert find.call_count == 1
+            assert get_session() is get_session(str(tmp_path))
+        finally:
+            os.chdir(original_dir)
+
+    def test_non_repo_is_not_cached(self, tmp_path):
+        """Test that a failed discovery is retried once the directory becomes a repo."""
+        assert get_session(str(tmp_path)).is_git_repo() is False
+        Repo.init(tmp_path)
+        assert get_session(str(tmp_path)).is_git_repo() is True
+
+    def test_repo_object_is_built_lazily(self, tmp_path):
+        """Test that the GitPython Repo is only created on first use and then reused."""
+        Repo.init(tmp_path)
+        session = RepoSession(str(tmp_path))
+        assert session._repo is None
+        assert session.repo is session.repo
+
+    def test_default_repo_path(self, tmp_path):
+        """Test that set_default_repo points helpers at another directory."""
+        repo_dir = tmp_path / 'repo'
+        outside = tmp_path / 'outside'
+        repo_dir.mkdir()
+        outside.mkdir()
+        _repo_with_staged_file(repo_dir)
+        original_dir = os.getcwd()
+        try:
+            os.chdir(outside)
+            assert is_git_repo() is False
+            set_default_repo(str(repo_dir))
+            assert '+hello' in get_staged_changes()
+        finally:
+            os.chdir(original_dir)
+
+    def test_use_session_is_per_thread(self, tmp_path):
+        """Test that use_session overrides the session only in the current thread."""
+        first = tmp_path / 'first'
+        second = tmp_path / 'second'
+        first.mkdir()
+        second.mkdir()
+        _repo_with_staged_file(first, 'first.txt')
+        _repo_with_staged_file(second, 'second.txt')
+        set_default_repo(str(first))
+        seen = {}
+
+        def worker():
+            with use_session(get_session(str(second))):
+                seen['diff'] = get_staged_changes()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert 'second.txt' in seen['diff']
+        assert 'first.txt' in get_staged_changes()
+
+    def test_cli_repo_option(self, tmp_path):
+        """Test that --repo lets the CLI run from outside the repository."""
+        repo_dir = tmp_path / 'repo'
+        outside = tmp_path / 'outside'
+        repo_dir.mkdir()
+        outside.mkdir()
+        Repo.init(repo_dir)
+        runner = CliRunner()
+        original_dir = os.getcwd()
+        try:
+            os.chdir(outside)
+            result = runner.invoke(main, ['--repo', str(repo_dir), 'hook', 'install'])
+        finally:
+            os.chdir(original_dir)
+        assert result.exit_code == 0
+        assert (repo_dir / '.git' / 'hooks' / 'prepare-commit-msg').exists()
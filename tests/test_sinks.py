@@ -0,0 +1,142 @@
+import io
+from unittest.mock import patch
+
+from git import Repo
+from rich.console import Console
+from rich.live import Live
+
+from gitgenie.commit_analyzer import generate_commit_message
+from gitgenie.llm_client import generate_text
+from gitgenie.sinks import (
+    BufferedSink, CallbackSink, DetachableSink, LiveSink, SilentSink, default_sink, resolve_sink, streaming,
+)
+
+
+class _CountingStream(io.StringIO):
+    def __init__(self, tty=False):
+        super().__init__()
+        self.tty = tty
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+    def isatty(self):
+        return self.tty
+
+
+def _stream(tokens):
+    return [{'message': {'content': token}} for token in tokens] + [{'message': {'content': ''}, 'done': True}]
+
+
+class TestSinks:
+    """Test suite for output sinks."""
+
+    def test_buffered_sink_batches_writes(self):
+        """Test that tokens are written per line, not per token."""
+        stream = _CountingStream()
+        sink = BufferedSink(stream)
+        with streaming(sink):
+            for token in ['feat', '(core)', ': add', ' x', '\n', 'more', ' text']:
+                sink.write(token)
+
+        assert stream.getvalue() == 'feat(core): add x\nmore text\n'
+        assert stream.writes == 2
+
+    def test_buffered_sink_flushes_large_output(self):
+        """Test that long lines are flushed once buffer_size is reached."""
+        stream = _CountingStream()
+        sink = BufferedSink(stream, buffer_size=10)
+        for _ in range(5):
+            sink.write('abcd')
+        assert stream.writes == 1
+
+    def test_live_sink_is_rate_limited(self):
+        """Test that the live view refreshes at most refresh_per_second times."""
+        console = Console(file=io.StringIO(), force_terminal=True)
+        sink = LiveSink(console, refresh_per_second=1)
+        with patch.object(Live, 'update', autospec=True, side_effect=Live.update) as update:
+            with streaming(sink):
+                for i in range(200):
+                    sink.write(f'token{i} ')
+        assert update.call_count <= 3
+        assert 'token199' in console.file.getvalue()
+
+    def test_callback_sink(self):
+        """Test that callbacks see every chunk and the end of the response."""
+        chunks = []
+        ended = []
+        with streaming(CallbackSink(chunks.append, lambda: ended.append(True))) as sink:
+            sink.write('a')
+            sink.write('b')
+        assert chunks == ['a', 'b']
+        assert ended == [True]
+
+    def test_detachable_sink(self):
+        """Test that detach() ends the response once and drops later output."""
+        chunks = []
+        ended = []
+        sink = DetachableSink(CallbackSink(chunks.append, lambda: ended.append(True)))
+        with streaming(sink):
+            sink.write('a')
+            sink.detach()
+            sink.write('b')
+        assert chunks == ['a']
+        assert ended == [True]
+
+    def test_default_sink_depends_on_terminal(self):
+        """Test that terminals get the live view and pipes the buffered writer."""
+        assert isinstance(default_sink(_CountingStream(tty=False)), BufferedSink)
+        assert isinstance(default_sink(_CountingStream(tty=True)), LiveSink)
+
+    def test_default_sink_live_output_off(self, monkeypatch):
+        """Test that live_output=false keeps terminals on the buffered writer."""
+        monkeypatch.setenv('GITGENIE_LIVE_OUTPUT', '0')
+        assert isinstance(default_sink(_CountingStream(tty=True)), BufferedSink)
+
+    def test_resolve_sink(self):
+        """Test how the echo and sink arguments map to sinks."""
+        assert isinstance(resolve_sink(None, echo=False), SilentSink)
+        assert isinstance(resolve_sink(print), CallbackSink)
+        sink = SilentSink()
+        assert resolve_sink(sink) is sink
+
+
+class TestStreamingGeneration:
+    """Test that generation streams to sinks."""
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_generate_text_to_callback(self, mock_client, capsys):
+        """Test that chunks go to the callback and nothing is printed."""
+        mock_client.return_value.chat.return_value = _stream(['feat', ': add', ' x'])
+        chunks = []
+
+        assert generate_text('prompt', sink=chunks.append) == 'feat: add x'
+        assert chunks == ['feat', ': add', ' x']
+        assert capsys.readouterr().out == ''
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_echo_false_is_silent(self, mock_client, capsys):
+        """Test that echo=False prints nothing."""
+        mock_client.return_value.chat.return_value = _stream(['feat: x'])
+        assert generate_text('prompt', echo=False) == 'feat: x'
+        assert capsys.readouterr().out == ''
+
+    @patch('gitgenie.llm_client.ollama.Client')
+    def test_default_output_is_printed(self, mock_client, capsys):
+        """Test that the default sink prints the response followed by a newline."""
+        mock_client.return_value.chat.return_value = _stream(['feat', ': x'])
+        generate_text('prompt')
+        assert capsys.readouterr().out == 'feat: x\n'
+
+    def test_cached_message_goes_to_sink(self, tmp_path, monkeypatch):
+        """Test that a cached commit message is shown through the same sink."""
+        Repo.init(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GITGENIE_CACHE_ENABLED', '1')
+        with patch('gitgenie.commit_analyzer.generate_text', return_value='feat: cached'):
+            generate_commit_message('diff', echo=False)
+        chunks = []
+        assert generate_commit_message('diff', sink=chunks.append) == 'feat: cached'
+        assert chunks == ['feat: cached']
@@ -0,0 +1,149 @@
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from git import Repo
+
+from gitgenie.cli import main
+from gitgenie.git_utils import get_staged_changes, get_staged_diff
+from gitgenie.split import commit_split, generate_split_messages, plan_split, scope_for
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _monorepo(tmp_path):
+    """Commit two packages and a README, then stage changes across all three and leave one unstaged."""
+    repo = Repo.init(tmp_path)
+    files = {
+        'packages/api/pyproject.toml': '[project]\n',
+        'packages/api/src/server.py': 'def serve():\n    pass\n',
+        'packages/web/package.json': '{}\n',
+        'packages/web/src/app.js': 'function app() {}\n',
+        'packages/web/src/old.js': 'function old() {}\n',
+        'README.md': '# Monorepo\n',
+    }
+    for name, text in files.items():
+        _write(tmp_path / name, text)
+    repo.index.add(list(files))
+    repo.index.commit("Initial commit")
+
+    _write(tmp_path / 'packages/api/src/server.py', 'def serve(port):\n    pass\n')
+    _write(tmp_path / 'packages/api/src/routes.py', 'ROUTES = []\n')
+    _write(tmp_path / 'packages/web/src/app.js', 'function app(props) {}\n')
+    _write(tmp_path / 'README.md', '# Monorepo\n\nTwo packages.\n')
+    repo.index.add(['packages/api/src/server.py', 'packages/api/src/routes.py', 'packages/web/src/app.js', 'README.md'])
+    repo.index.remove(['packages/web/src/old.js'], working_tree=True)
+    _write(tmp_path / 'README.md', '# Monorepo\n\nTwo packages.\n\nUnstaged.\n')
+    return repo
+
+
+def _fake_message(diff, **kwargs):
+    if 'packages/api' in diff:
+        return 'feat(api): add port and routes'
+    if 'packages/web' in diff:
+        return 'refactor(web): pass props to app'
+    return 'docs(readme): describe packages'
+
+
+class TestScopes:
+    """Test suite for grouping paths into scopes."""
+
+    def test_rules_win_over_packages(self):
+        """Test that a matching rule decides the group before package markers."""
+        packages = {'services/billing'}
+        assert scope_for('services/billing/app/x.py', ['services/*'], packages) == 'services/billing'
+        assert scope_for('docs/guide/intro.md', ['docs'], packages) == 'docs'
+        assert scope_for('docs', ['docs'], packages) == ''
+
+    def test_nearest_package(self):
+        """Test that files go to the closest directory holding a package manifest."""
+        packages = {'libs/core', 'libs/core/plugins/fast'}
+        assert scope_for('libs/core/plugins/fast/src/a.rs', [], packages) == 'libs/core/plugins/fast'
+        assert scope_for('libs/core/plugins/slow/b.rs', [], packages) == 'libs/core'
+        assert scope_for('setup.cfg', [], packages) == ''
+
+
+class TestSplitCommit:
+    """Test suite for committing staged changes per scope."""
+
+    def test_paths_are_literal(self, tmp_path, monkeypatch):
+        """Test that file names with glob characters only match themselves."""
+        repo = Repo.init(tmp_path)
+        _write(tmp_path / 'data[1].txt', 'bracket\n')
+        _write(tmp_path / 'data1.txt', 'plain\n')
+        repo.index.add(['data[1].txt', 'data1.txt'])
+        monkeypatch.chdir(tmp_path)
+        diff = get_staged_diff(paths=['data[1].txt']).text
+        assert '+bracket' in diff and '+plain' not in diff
+
+    def test_plan_groups_staged_files(self, tmp_path, monkeypatch):
+        """Test grouping by pyproject.toml and package.json, with the root last."""
+        _monorepo(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        groups = plan_split()
+        assert [group.label for group in groups] == ['packages/api', 'packages/web', '(root)']
+        assert sorted(groups[0].paths) == ['packages/api/src/routes.py', 'packages/api/src/server.py']
+        assert sorted(groups[1].paths) == ['packages/web/src/app.js', 'packages/web/src/old.js']
+
+    def test_messages_are_generated_per_group(self, tmp_path, monkeypatch):
+        """Test that each group's message sees only that group's diff."""
+        _monorepo(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        groups = plan_split()
+        with patch('gitgenie.split.generate_commit_message', side_effect=_fake_message) as mock_generate:
+            generate_split_messages(groups)
+
+        assert mock_generate.call_count == 3
+        for call in mock_generate.call_args_list:
+            assert call.kwargs['max_workers'] == 1
+            diff = call[0][0]
+            assert ('packages/api' in diff) + ('packages/web' in diff) + ('README.md' in diff) == 1
+        assert [group.message for group in groups] == [
+            'feat(api): add port and routes', 'refactor(web): pass props to app', 'docs(readme): describe packages',
+        ]
+
+    def test_commits_are_created_in_order(self, tmp_path, monkeypatch):
+        """Test one commit per group, ending at the staged tree, with the working tree untouched."""
+        repo = _monorepo(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        index_tree = repo.index.write_tree().hexsha
+        groups = plan_split()
+        for group, message in zip(groups, ['feat(api): a', 'fix(web): b', 'docs: c']):
+            group.message = message
+
+        commits = commit_split(groups)
+
+        assert commits == [commit.hexsha for commit in repo.iter_commits(max_count=3)][::-1]
+        assert [c.message.strip() for c in repo.iter_commits(max_count=4)] == ['docs: c', 'fix(web): b', 'feat(api): a', 'Initial commit']
+        assert sorted(repo.commit(commits[0]).stats.files) == ['packages/api/src/routes.py', 'packages/api/src/server.py']
+        assert sorted(repo.commit(commits[1]).stats.files) == ['packages/web/src/app.js', 'packages/web/src/old.js']
+        assert repo.head.commit.tree.hexsha == index_tree
+        assert get_staged_changes() == ''
+        assert (tmp_path / 'README.md').read_text().endswith('Unstaged.\n')
+        assert not list((tmp_path / '.git').glob('gitgenie-split-*'))
+
+    def test_cli_split(self, tmp_path, monkeypatch):
+        """Test `commit --split` end to end."""
+        repo = _monorepo(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        with patch('gitgenie.split.generate_commit_message', side_effect=_fake_message):
+            result = CliRunner().invoke(main, ['commit', '--split'], input='c\n')
+
+        assert result.exit_code == 0
+        assert '1. packages/api (2 files)\n   feat(api): add port and routes\n' in result.output
+        assert 'Created 3 commits' in result.output
+        assert repo.head.commit.message.strip() == 'docs(readme): describe packages'
+
+    def test_cli_split_single_scope(self, tmp_path, monkeypatch):
+        """Test that a single scope falls back to the normal commit flow."""
+        repo = Repo.init(tmp_path)
+        _write(tmp_path / 'a.txt', 'a\n')
+        repo.index.add(['a.txt'])
+        monkeypatch.chdir(tmp_path)
+        with patch('gitgenie.commit_analyzer.generate_text', return_value='feat: add a'):
+            result = CliRunner().invoke(main, ['commit', '--split'], input='c\n')
+
+        assert 'All staged changes are in (root), making a single commit' in result.output
+        assert repo.head.commit.message.strip() == 'feat: add a'
@@ -0,0 +1,226 @@
+from unittest.mock import patch
+
+from git import Repo
+
+from gitgenie.commit_analyzer import prepare_staged_diff
+from gitgenie.git_utils import get_staged_diff, read_blobs
+from gitgenie.structure import analyze_file, python_symbols, regex_symbols, summarize_diff
+
+OLD_PY = b'''import os
+
+
+class Engine(Base):
+    def start(self):
+        return 1
+
+    def stop(self):
+        return 0
+
+
+def helper(a):
+    return a
+
+
+def unused():
+    pass
+'''
+
+NEW_PY = b'''import os
+
+
+class Engine(Base):
+    def start(self):
+        return 2
+
+    def stop(self):
+        return 0
+
+    def pause(self, seconds=1.0):
+        pass
+
+
+def helper(a, b=None) -> int:
+    return a
+
+
+def added():
+    pass
+'''
+
+OLD_JS = b'''export function render(props) {
+  return props.title;
+}
+
+const format = (value) => value.trim();
+'''
+
+NEW_JS = b'''export function render(props, options) {
+  return props.title;
+}
+
+const format = (value) => value.trim().toLowerCase();
+
+class Widget {
+}
+'''
+
+
+def _commit_and_stage(tmp_path, before, after):
+    repo = Repo.init(tmp_path)
+    for name, content in before.items():
+        (tmp_path / name).write_bytes(content)
+    repo.index.add(list(before))
+    repo.index.commit("Initial commit")
+    for name, content in after.items():
+        if content is None:
+            repo.index.remove([name], working_tree=True)
+        else:
+            (tmp_path / name).write_bytes(content)
+            repo.index.add([name])
+    return repo
+
+
+class TestSymbols:
+    """Test suite for per-file symbol comparison."""
+
+    def test_python_changes(self):
+        """Test that ast finds added, removed, modified and re-signed definitions."""
+        changes = analyze_file('engine.py', OLD_PY, NEW_PY)
+        assert set(changes) == {
+            ('modified', 'method', 'Engine.start', ''),
+            ('added', 'method', 'Engine.pause', '(self, seconds=1.0)'),
+            ('signature', 'function', 'helper', '(a) -> (a, b=None) -> int'),
+            ('added', 'function', 'added', '()'),
+            ('removed', 'function', 'unused', '()'),
+        }
+
+    def test_nested_change_is_reported_once(self):
+        """Test that a change inside a method does not also mark its class modified."""
+        old = python_symbols(OLD_PY.decode())
+        new = python_symbols(NEW_PY.decode())
+        assert old['Engine'].body == new['Engine'].body
+
+    def test_regex_fallback(self):
+        """Test definition matching for languages without a parser."""
+        changes = analyze_file('ui.js', OLD_JS, NEW_JS)
+        assert set(changes) == {
+            ('signature', 'function', 'render', '(props) -> (props, options)'),
+            ('modified', 'function', 'format', ''),
+            ('added', 'class', 'Widget', ''),
+        }
+
+    def test_python_syntax_error_uses_regex(self):
+        """Test that unparsable Python still gets a summary."""
+        changes = analyze_file('broken.py', b'def old(:\n', b'def new(:\n')
+        assert {(change, name) for change, _, name, _ in changes} == {('added', 'new'), ('removed', 'old')}
+
+    def test_duplicate_names_are_kept_apart(self):
+        """Test that overloads with the same name are tracked separately."""
+        symbols = regex_symbols('fn a() {}\nfn a(x) {}\n')
+        assert list(symbols) == ['a', 'a (2)']
+
+    def test_non_code_and_binary_files_are_skipped(self):
+        """Test that only code files are parsed."""
+        assert analyze_file('README.md', b'# a', b'# b') == []
+        assert analyze_file('data.py', b'\0\1', b'def f(): pass') == []
+
+
+class TestSummarizeDiff:
+    """Test suite for summaries of staged diffs."""
+
+    def test_read_blobs(self, tmp_path, monkeypatch):
+        """Test that HEAD and index versions come back from one batch read."""
+        _commit_and_stage(tmp_path, {'engine.py': OLD_PY}, {'engine.py': NEW_PY})
+        monkeypatch.chdir(tmp_path)
+        blobs = read_blobs(['HEAD:engine.py', ':engine.py', 'HEAD:missing.py'])
+        assert blobs == {'HEAD:engine.py': OLD_PY, ':engine.py': NEW_PY, 'HEAD:missing.py': None}
+
+    def test_read_blobs_size_limit(self, tmp_path, monkeypatch):
+        """Test that blobs over max_size are left out without being read."""
+        _commit_and_stage(tmp_path, {'engine.py': OLD_PY}, {'engine.py': NEW_PY})
+        monkeypatch.chdir(tmp_path)
+        blobs = read_blobs(['HEAD:engine.py', ':engine.py', 'HEAD:missing.py'], max_size=len(OLD_PY))
+        assert blobs == {'HEAD:engine.py': OLD_PY, 'HEAD:missing.py': None}
+
+    def test_large_and_non_code_files_are_not_read(self, tmp_path, monkeypatch):
+        """Test that data files and versions over MAX_PARSE_BYTES are only counted."""
+        _commit_and_stage(
+            tmp_path,
+            {'engine.py': OLD_PY, 'big.py': OLD_PY, 'data.csv': b'a,b\n'},
+            {'engine.py': NEW_PY, 'big.py': NEW_PY, 'data.csv': b'a,b\n1,2\n'},
+        )
+        monkeypatch.chdir(tmp_path)
+        with patch('gitgenie.structure.MAX_PARSE_BYTES', len(NEW_PY) - 1), \
+                patch('gitgenie.structure.read_blobs', wraps=read_blobs) as mock_read:
+            summary = summarize_diff(get_staged_diff().text, workers=1)
+        assert not any('data.csv' in spec for spec in mock_read.call_args[0][0])
+        changes = {change.path: change for change in summary.files}
+        assert changes['data.csv'].added == 1 and changes['data.csv'].symbols == []
+        assert changes['big.py'].symbols == []
+
+    def test_summary_of_staged_changes(self, tmp_path, monkeypatch):
+        """Test file statuses, line counts and symbols for added, modified and deleted files."""
+        _commit_and_stage(
+            tmp_path,
+            {'engine.py': OLD_PY, 'ui.js': OLD_JS},
+            {'engine.py': NEW_PY, 'ui.js': None, 'new.py': b'def fresh():\n    pass\n'},
+        )
+        monkeypatch.chdir(tmp_path)
+        summary = summarize_diff(get_staged_diff().text)
+        text = summary.render()
+
+        assert text.startswith('Change summary (3 files, ')
+        assert 'A new.py (+2 -0)\n  added function fresh()\n' in text
+        assert 'D ui.js (+0 -5)\n  removed function render(props)\n  removed function format(value)\n' in text
+        assert '  changed signature of function helper: (a) -> (a, b=None) -> int\n' in text
+        assert '  modified method Engine.start\n' in text
+
+    def test_large_diffs_use_process_pool(self, tmp_path, monkeypatch):
+        """Test that enough files are analyzed in worker processes with the same result."""
+        names = [f'mod{i}.py' for i in range(4)]
+        _commit_and_stage(tmp_path, {n: OLD_PY for n in names}, {n: NEW_PY for n in names})
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GITGENIE_STRUCTURE_PARALLEL_MIN_FILES', '3')
+        diff = get_staged_diff().text
+
+        with patch('gitgenie.structure.ProcessPoolExecutor') as pool:
+            pool.return_value.__enter__.return_value.map.side_effect = lambda f, jobs, chunksize: map(f, jobs)
+            parallel = summarize_diff(diff, workers=2).render()
+        assert pool.called
+        assert parallel == summarize_diff(diff, workers=1).render()
+
+    def test_process_pool_runs(self, tmp_path, monkeypatch):
+        """Test the real process pool end to end."""
+        names = [f'mod{i}.py' for i in range(2)]
+        _commit_and_stage(tmp_path, {n: OLD_PY for n in names}, {n: NEW_PY for n in names})
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GITGENIE_STRUCTURE_PARALLEL_MIN_FILES', '2')
+        summary = summarize_diff(get_staged_diff().text, workers=2)
+        assert summary.symbol_count == 10
+
+    def test_prepare_staged_diff_uses_summary(self, tmp_path, monkeypatch):
+        """Test that big staged diffs are sent as a summary plus an excerpt."""
+        _commit_and_stage(
+            tmp_path,
+            {'engine.py': OLD_PY, 'ui.js': OLD_JS},
+            {'engine.py': NEW_PY + b'x = 1\n' * 2000, 'ui.js': NEW_JS},
+        )
+        monkeypatch.chdir(tmp_path)
+        diff, notes = prepare_staged_diff()
+
+        assert diff.startswith('Change summary (2 files, ')
+        assert 'M engine.py (+2006 -3)\n' in diff
+        summary, excerpt = diff.split('\nDiff excerpt:\n')
+        assert '+export function render(props, options) {' in excerpt
+        assert 'x = 1' not in excerpt
+        assert any(note.startswith('Summarized 2 files and 8 changed definitions') for note in notes)
+
+    def test_small_diffs_and_setting_off_keep_raw_diff(self, tmp_path, monkeypatch):
+        """Test that the summary only replaces diffs over structure_min_tokens."""
+        _commit_and_stage(tmp_path, {'engine.py': OLD_PY}, {'engine.py': NEW_PY + b'x = 1\n' * 2000})
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GITGENIE_STRUCTURE_SUMMARY', '0')
+        assert prepare_staged_diff()[0].startswith('diff --git')
+        monkeypatch.setenv('GITGENIE_STRUCTURE_SUMMARY', '1')
+        monkeypatch.setenv('GITGENIE_STRUCTURE_MIN_TOKENS', '100000')
+        assert prepare_staged_diff()[0].startswith('diff --git')
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import ollama
+import pytest
+
+from gitgenie import profiling
+from gitgenie.throttle import Throttle, ThrottleTimeout, backoff_delay, get_throttle, is_retryable
+
+
+class TestThrottle:
+    """Test suite for cross-process request admission."""
+
+    def test_limits_slots(self, tmp_path):
+        """Test that only `slots` holders get in and a freed slot is reused."""
+        first = Throttle(2, str(tmp_path), timeout=0.2)
+        second = Throttle(2, str(tmp_path), timeout=0.2)
+        a = first.acquire()
+        b = second.acquire()
+        with pytest.raises(ThrottleTimeout):
+            first.acquire()
+        second.release(b)
+        first.release(first.acquire())
+        first.release(a)
+
+    def test_slots_are_shared_with_other_processes(self, tmp_path):
+        """Test that a slot held by another process blocks this one until it exits."""
+        holder = subprocess.Popen([
+            sys.executable, '-c',
+            'import sys, time; from gitgenie.throttle import Throttle; '
+            f'Throttle(1, {str(tmp_path)!r}).acquire(); print("held", flush=True); time.sleep(0.5)',
+        ], stdout=subprocess.PIPE)
+        try:
+            assert holder.stdout.readline().strip() == b'held'
+            throttle = Throttle(1, str(tmp_path), timeout=5)
+            with pytest.raises(ThrottleTimeout):
+                Throttle(1, str(tmp_path), timeout=0.1).acquire()
+            start = time.monotonic()
+            throttle.release(throttle.acquire())
+            assert time.monotonic() - start < 5
+        finally:
+            holder.wait()
+
+    def test_slot_reports_queue_wait(self, tmp_path):
+        """Test that waiting for a slot is recorded apart from generation."""
+        throttle = Throttle(1, str(tmp_path), timeout=1)
+        other = Throttle(1, str(tmp_path), timeout=1)
+        held = other.acquire()
+        stats = {}
+        profiler = profiling.start('test')
+        try:
+            timer = threading.Timer(0.2, other.release, [held])
+            timer.start()
+            with throttle.slot(stats):
+                pass
+        finally:
+            profiling.stop()
+        assert stats['queue_wait'] >= 0.15
+        assert profiler.phases['queue_wait'] >= 0.15
+
+    def test_disabled_by_default(self):
+        """Test that no slots are used unless throttle_slots is set."""
+        stats = {}
+        with get_throttle().slot(stats):
+            pass
+        assert stats == {}
+
+    def test_retryable_errors(self):
+        """Test which errors are worth retrying."""
+        assert is_retryable(ollama.ResponseError('busy', 503))
+        assert is_retryable(ollama.ResponseError('slow down', 429))
+        assert is_retryable(ConnectionError('refused'))
+        assert is_retryable(httpx.ConnectError('refused'))
+        assert not is_retryable(ollama.ResponseError('model not found', 404))
+        assert not is_retryable(ValueError('bad'))
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test that delays grow with the attempt but stay under the cap."""
+        delays = [backoff_delay(attempt, base=1.0, cap=4.0) for attempt in range(10) for _ in range(20)]
+        assert all(0 <= delay <= 4.0 for delay in delays)
+        assert len(set(delays)) > 1
@@ -0,0 +1,156 @@
+import json
+from unittest.mock import patch
+
+from gitgenie import profiling
+from gitgenie.commit_analyzer import COMMIT_PROMPT_TEMPLATE, generate_commit_message
+from gitgenie.config import reset_config
+from gitgenie.token_budget import (
+    context_limit, context_window, count_tokens, fit_text, pack_diff, prompt_budget,
+)
+
+
+def _file_diff(path, hunks):
+    text = f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+    for i, (context, lines) in enumerate(hunks):
+        text += f"@@ -{i * 100 + 1},3 +{i * 100 + 1},3 @@ {context}\n"
+        text += ''.join(f"{line}\n" for line in lines)
+    return text
+
+
+def _big_diff():
+    small = _file_diff('src/util.py', [('def helper():', ['-    return 1', '+    return 2'])])
+    large = _file_diff('src/core.py', [
+        ('class Engine:', ['+def start(self):'] + [f'+    step_{i}()' for i in range(40)]),
+        ('def stop(self):', [f'-    old_{i}()' for i in range(200)]),
+    ])
+    return small + large
+
+
+def _write_config(tmp_path, monkeypatch, **settings):
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps(settings))
+    monkeypatch.setenv('GITGENIE_CONFIG', str(config))
+    reset_config()
+
+
+class TestContextLimits:
+    """Test suite for per-model context windows."""
+
+    def test_known_models(self):
+        """Test that model names with tags and namespaces are recognized."""
+        assert context_limit('llama3') == 8192
+        assert context_limit('llama3:8b-instruct') == 8192
+        assert context_limit('phi3:mini') == 4096
+        assert context_limit('library/mistral:latest') == 8192  # capped at max_context
+
+    def test_unknown_model_uses_max_context(self):
+        """Test that unknown models fall back to max_context."""
+        assert context_limit('my-finetune') == 8192
+
+    def test_config_overrides(self, tmp_path, monkeypatch):
+        """Test that context_limits and max_context adjust the window."""
+        _write_config(tmp_path, monkeypatch, context_limits={'my-finetune': 2048}, max_context=32768)
+        assert context_limit('my-finetune') == 2048
+        assert context_limit('mistral') == 32768
+
+    def test_window_is_smallest_backend_for_task(self, tmp_path, monkeypatch):
+        """Test that prompts are sized for the smallest model that may serve the task."""
+        _write_config(tmp_path, monkeypatch, backends=[
+            {'model': 'phi3', 'tasks': ['commit']},
+            {'model': 'llama3'},
+        ])
+        assert context_window('commit') == 4096
+        assert context_window('pr') == 8192
+
+    def test_prompt_budget_leaves_room_for_output(self):
+        """Test that the budget subtracts the template and the output tokens."""
+        budget = prompt_budget(COMMIT_PROMPT_TEMPLATE, 64, task='commit')
+        assert budget + count_tokens(COMMIT_PROMPT_TEMPLATE) + 64 < 8192
+
+    def test_tiktoken_falls_back_to_heuristic(self, monkeypatch):
+        """Test that an unavailable tokenizer never breaks counting."""
+        monkeypatch.setenv('GITGENIE_TOKENIZER', 'tiktoken')
+        with patch('gitgenie.token_budget._tiktoken_encoding', return_value=None):
+            assert count_tokens('abcd' * 10) == 11
+
+
+class TestPacking:
+    """Test suite for priority packing."""
+
+    def test_diff_that_fits_is_unchanged(self):
+        """Test that small diffs pass through untouched."""
+        diff = _big_diff()
+        packing = pack_diff(diff, 100000)
+        assert packing.text == diff
+        assert packing.complete
+
+    def test_packs_stats_signatures_then_biggest_hunks(self):
+        """Test the priority order when the diff does not fit."""
+        diff = _big_diff()
+        packing = pack_diff(diff, 300)
+
+        assert packing.tokens <= 300
+        assert packing.text.startswith('Changed files:\n  src/util.py (+1 -1)\n  src/core.py (+41 -200)\n')
+        assert 'Changed definitions:' in packing.text
+        assert 'class Engine:; +def start(self):; def stop(self):' in packing.text
+        assert '+    step_0()' in packing.text
+        assert '-    old_0()' not in packing.text
+        assert packing.omitted_hunks == 1
+        assert packing.sections[:2] == ['stats', 'signatures']
+        assert packing.text.rstrip().endswith('# 1 of 3 hunks omitted to fit the context window')
+
+    def test_hunks_keep_original_order(self):
+        """Test that chosen hunks appear in diff order under their file headers."""
+        packing = pack_diff(_big_diff(), 400)
+        assert packing.text.index('src/util.py b/src/util.py') < packing.text.index('src/core.py b/src/core.py')
+
+    def test_tiny_budget_never_overflows(self):
+        """Test that the packed text stays within even a very small budget."""
+        for budget in (20, 50, 80):
+            assert pack_diff(_big_diff(), budget).tokens <= budget
+
+    def test_fit_text_truncates_lines(self):
+        """Test that plain text is cut at line boundaries with a note."""
+        text = ''.join(f'- summary line {i}\n' for i in range(100))
+        packing = fit_text(text, 60, 'summaries')
+        assert packing.tokens <= 60
+        assert packing.text.startswith('- summary line 0\n')
+        assert packing.text.endswith('more lines omitted)\n')
+        assert packing.sections == ['summaries (truncated)']
+
+
+class TestGeneratorsStayInBudget:
+    """Test that the generators build prompts within the context window."""
+
+    def test_commit_prompt_is_packed(self, tmp_path, monkeypatch):
+        """Test that a diff too big for a small model is packed and reported."""
+        _write_config(tmp_path, monkeypatch, model='phi3', max_context=1024, large_diff_strategy='pack')
+        notes = []
+        profiler = profiling.start('commit')
+        try:
+            with patch('gitgenie.commit_analyzer.generate_text', return_value='feat: start engine') as mock_generate:
+                generate_commit_message(_big_diff(), notes=notes)
+        finally:
+            profiling.stop()
+
+        prompt = mock_generate.call_args[0][0]
+        options = mock_generate.call_args.kwargs['options']
+        assert count_tokens(prompt) + options['num_predict'] <= 1024
+        assert options['num_ctx'] == 1024
+        assert notes and notes[0].startswith('Packed the commit prompt into')
+        assert profiler.packings[0][0] == 'commit'
+        assert any(r['type'] == 'packing' for r in profiler.to_records())
+
+    def test_chunked_prompts_fit(self, tmp_path, monkeypatch):
+        """Test that chunk and combine prompts respect the window too."""
+        _write_config(tmp_path, monkeypatch, max_context=1024, chunk_token_budget=5000)
+        seen = []
+
+        def fake_generate(prompt, **kwargs):
+            seen.append(count_tokens(prompt) + kwargs['options']['num_predict'])
+            return '- changed things' if prompt.startswith('You are reviewing') else 'feat: x'
+
+        with patch('gitgenie.commit_analyzer.generate_text', side_effect=fake_generate):
+            generate_commit_message(_big_diff() * 3, max_tokens=100)
+        assert len(seen) > 2
+        assert max(seen) <= 1024